@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+LISTING_KEYS = {
+    "Arrived": "arrivals",
+    "Departed": "departures",
+    "Enroute": "enroute",
+    "Scheduled": "scheduled",
+    "Search": "aircraft",
+    "AirlineFlightSchedules": "data",
+}
+
+
+def flight(number):
+    return {
+        "faFlightID": "SWA{0}-1400000000-airline-{0}".format(number),
+        "ident": "SWA{}".format(number),
+        "aircrafttype": "B737",
+        "origin": "KBNA",
+        "destination": "KATL",
+        "departuretime": 1400000000 + number * 60,
+        "arrivaltime": 1400003600 + number * 60,
+        "actualdeparturetime": 1400000000 + number * 60,
+        "actualarrivaltime": 1400003600 + number * 60,
+        "estimatedarrivaltime": 1400003600 + number * 60,
+        "filed_departuretime": 1400000000 + number * 60,
+        "originName": "Nashville Intl",
+        "destinationName": "Hartsfield-Jackson Intl",
+        "originCity": "Nashville, TN",
+        "destinationCity": "Atlanta, GA",
+        "altitude": 350,
+        "groundspeed": 450,
+        "latitude": 35.0 + (number % 100) / 100.0,
+        "longitude": -85.0 - (number % 100) / 100.0,
+    }
+
+
+def track_point(number):
+    return {
+        "timestamp": 1400000000 + number * 15,
+        "latitude": 36.12447 + number * 0.001,
+        "longitude": -86.67819 + number * 0.001,
+        "groundspeed": 300 + number % 150,
+        "altitude": min(350, number),
+        "altitudeStatus": "",
+        "updateType": "TZ" if number % 3 else "TA",
+        "altitudeChange": "C" if number < 350 else "",
+    }
+
+
+class Payloads(object):
+    """
+    Synthetic FlightXML2 responses. records sets the size of listings, AllAirports and track logs.
+    """
+    def __init__(self, records=1000):
+        self.records = records
+
+    def __call__(self, method, form):
+        def number(key, default):
+            return int(form.get(key, [default])[0])
+
+        if method in LISTING_KEYS:
+            offset = number("offset", 0)
+            how_many = number("howMany", 15)
+            end = min(self.records, offset + how_many)
+            return {"{}Result".format(method): {
+                "next_offset": end if end < self.records else -1,
+                LISTING_KEYS[method]: [flight(index) for index in range(offset, end)],
+            }}
+        if method == "AllAirports":
+            return {"AllAirportsResult": {"data": ["K{:05d}".format(index) for index in range(self.records)]}}
+        if method in ("GetLastTrack", "GetHistoricalTrack"):
+            return {"{}Result".format(method): {"data": [track_point(index) for index in range(self.records)]}}
+        if method == "AirportInfo":
+            return {"AirportInfoResult": {"name": "Nashville Intl", "location": "Nashville, TN",
+                                          "latitude": 36.1244722, "longitude": -86.6781944,
+                                          "timezone": ":America/Chicago"}}
+        if method == "Metar":
+            return {"MetarResult": "KBNA 161853Z 18008KT 10SM FEW250 29/17 A3002 RMK AO2"}
+        if method == "SetMaximumResultSize":
+            return {"SetMaximumResultSizeResult": 1}
+        return {"error": "unsupported method {}".format(method)}
+
+
+class RecordedPayloads(object):
+    """
+    Responses recorded from the real service, one <Method>.json file per method in directory. Methods without a
+    recording fall back to the synthetic payloads.
+    """
+    def __init__(self, directory, fallback=None):
+        self.directory = directory
+        self.fallback = fallback or Payloads()
+
+    def __call__(self, method, form):
+        path = os.path.join(self.directory, "{}.json".format(method))
+        if not os.path.exists(path):
+            return self.fallback(method, form)
+        with open(path) as f:
+            return json.load(f)
+
+
+class FakeFlightXMLServer(object):
+    """
+    Local stand-in for the FlightXML2 JSON endpoint, for offline benchmarks:
+
+        with FakeFlightXMLServer(latency=0.02, records=5000) as server:
+            client = Client("user", "key", base_url=server.base_url)
+
+    latency (plus up to jitter) seconds are slept before each answer. Keep-alive is supported.
+    """
+    def __init__(self, latency=0.0, jitter=0.0, records=1000, payloads=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.payloads = payloads or Payloads(records)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._rendered = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, delayed ACKs add 40ms per response
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                method = self.path.rstrip("/").rsplit("/", 1)[-1]
+                body = server.render(method, form)
+                delay = server.latency + random.random() * server.jitter
+                if delay:
+                    time.sleep(delay)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://{}:{}/json/FlightXML2/".format(host, port)
+
+    def render(self, method, form):
+        # Bodies are cached so that the server's own JSON encoding does not dominate the measurements
+        key = (method, tuple(sorted((name, tuple(values)) for name, values in form.items())))
+        with self._lock:
+            self.requests += 1
+            body = self._rendered.get(key)
+        if body is None:
+            body = json.dumps(self.payloads(method, form)).encode("utf-8")
+            with self._lock:
+                self._rendered[key] = body
+        return body
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,173 @@
+"""
+Offline benchmarks of the FlightXML client against a local stand-in server.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --latency 0.02 --records 20000 --output after.json --compare before.json
+
+Each scenario reports operations per second, client latency percentiles and the peak memory allocated while it ran
+(tracemalloc). With --compare, scenarios slower or hungrier than the baseline by more than --tolerance are listed
+and the exit status is 1.
+"""
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+from flightaware.client import Client
+from flightaware.metrics import MetricsCollector
+
+from benchmarks.fake_server import FakeFlightXMLServer, RecordedPayloads, Payloads
+
+
+def sequential_metar(client, options):
+    for _ in range(options.calls):
+        client.metar("KBNA")
+    return options.calls
+
+
+def batch_metar(client, options):
+    results = client.batch("Metar", [{"airport": "K{:03d}".format(index)} for index in range(options.calls)],
+                           max_workers=options.workers)
+    return len(results)
+
+
+def paginate_enroute(client, options):
+    return sum(1 for _ in client.iter_enroute("KBNA", page_size=options.page_size))
+
+
+def prefetch_enroute(client, options):
+    return sum(1 for _ in client.iter_enroute("KBNA", page_size=options.page_size, prefetch=True))
+
+
+def all_airports(client, options):
+    return len(client.all_airports())
+
+
+def stream_all_airports(client, options):
+    return sum(1 for _ in client.stream("AllAirports", records_key="data"))
+
+
+def track(client, options):
+    return len(client.get_last_track("SWA1"))
+
+
+def compact_track(client, options):
+    return len(client.get_last_track("SWA1", compact=True))
+
+
+SCENARIOS = [
+    ("sequential_metar", sequential_metar),
+    ("batch_metar", batch_metar),
+    ("paginate_enroute", paginate_enroute),
+    ("prefetch_enroute", prefetch_enroute),
+    ("all_airports", all_airports),
+    ("stream_all_airports", stream_all_airports),
+    ("track", track),
+    ("compact_track", compact_track),
+]
+
+
+def run_scenario(function, base_url, options):
+    metrics = MetricsCollector(window=100000)
+    with Client("benchmark", "benchmark", base_url=base_url, instrumentation=metrics,
+                pool_maxsize=max(options.workers, 10)) as client:
+        tracemalloc.start()
+        started = time.time()
+        operations = function(client, options)
+        elapsed = time.time() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies = sorted(latency for stats in metrics.methods.values() for latency in stats.recent)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100.0))] if latencies else None
+
+    return {
+        "operations": operations,
+        "requests": sum(stats.requests for stats in metrics.methods.values()),
+        "seconds": elapsed,
+        "throughput": operations / elapsed if elapsed else None,
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "peak_bytes": peak,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Scenarios whose throughput fell, or peak memory grew, by more than tolerance (a fraction) against baseline.
+    """
+    found = []
+    for name, result in sorted(results.items()):
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if before["throughput"] and result["throughput"] < before["throughput"] * (1 - tolerance):
+            found.append("{}: throughput {:.1f}/s, was {:.1f}/s".format(name, result["throughput"],
+                                                                      before["throughput"]))
+        if result["peak_bytes"] > before["peak_bytes"] * (1 + tolerance):
+            found.append("{}: peak memory {} bytes, was {}".format(name, result["peak_bytes"], before["peak_bytes"]))
+    return found
+
+
+def format_table(results):
+    lines = ["{:<22} {:>10} {:>9} {:>12} {:>9} {:>9} {:>9} {:>12}".format(
+        "scenario", "operations", "requests", "ops/s", "p50 ms", "p95 ms", "p99 ms", "peak KiB")]
+    for name, result in results.items():
+        milliseconds = [("{:.2f}".format(result[key] * 1000) if result[key] is not None else "-")
+                        for key in ("p50", "p95", "p99")]
+        lines.append("{:<22} {:>10} {:>9} {:>12.1f} {:>9} {:>9} {:>9} {:>12.1f}".format(
+            name, result["operations"], result["requests"], result["throughput"], milliseconds[0], milliseconds[1],
+            milliseconds[2], result["peak_bytes"] / 1024.0))
+    return "\n".join(lines)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the server waits before each answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random wait of up to this many seconds")
+    parser.add_argument("--records", type=int, default=5000,
+                        help="records in listings, AllAirports and track logs")
+    parser.add_argument("--recorded", help="directory of <Method>.json responses to serve instead of synthetic ones")
+    parser.add_argument("--calls", type=int, default=200, help="calls made by the Metar scenarios")
+    parser.add_argument("--workers", type=int, default=8, help="threads used by batch calls")
+    parser.add_argument("--page-size", type=int, default=200, help="records per page when paginating")
+    parser.add_argument("--scenario", action="append", choices=[name for name, _ in SCENARIOS],
+                        help="run only this scenario (may be repeated)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown or growth, as a fraction")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    payloads = Payloads(options.records)
+    if options.recorded:
+        payloads = RecordedPayloads(options.recorded, payloads)
+
+    results = {}
+    with FakeFlightXMLServer(latency=options.latency, jitter=options.jitter, payloads=payloads) as server:
+        for name, function in SCENARIOS:
+            if options.scenario and name not in options.scenario:
+                continue
+            results[name] = run_scenario(function, server.base_url, options)
+
+    print(format_table(results))
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if options.compare:
+        with open(options.compare) as f:
+            found = regressions(results, json.load(f), options.tolerance)
+        for line in found:
+            print("REGRESSION " + line)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
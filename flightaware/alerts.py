@@ -0,0 +1,149 @@
+import re
+from collections import namedtuple
+
+from flightaware.exceptions import FlightAwareError
+
+# Fields identifying an alert when reconciling; two alerts with the same values are taken to be the same alert
+ALERT_KEY_FIELDS = ("ident", "origin", "destination", "aircrafttype")
+
+# Event types a push channel can carry
+EVENT_TYPES = ("e_filed", "e_departure", "e_arrival", "e_diverted", "e_cancelled")
+
+DAY = 24 * 60 * 60
+
+# Calls needed to turn the current alerts into the desired ones: alert settings to create, (alert_id, settings) to
+# update and alert_ids to delete
+AlertPlan = namedtuple("AlertPlan", ["create", "update", "delete"])
+
+# Outcome of Client.sync_alerts: alert_ids created, updated and deleted, and BatchResults of the calls that failed
+AlertSync = namedtuple("AlertSync", ["created", "updated", "deleted", "failed"])
+
+
+def alert_data(alert_id=0, ident=None, origin=None, destination=None, aircrafttype=None, date_start=None,
+               date_end=None, channels=None, enabled=True, max_weekly=1000):
+    """
+    SetAlert request data; see Client.set_alert for the arguments.
+    """
+    data = {
+        "alert_id": alert_id,
+        "enabled": enabled,
+        "max_weekly": max_weekly
+    }
+    if ident is not None:
+        data["ident"] = ident
+    if origin is not None:
+        data["origin"] = origin
+    if destination is not None:
+        data["destination"] = destination
+    if aircrafttype is not None:
+        data["aircrafttype"] = aircrafttype
+    if date_start is not None:
+        data["date_start"] = date_start
+    if date_end is not None:
+        data["date_end"] = date_end
+    if channels:
+        data["channels"] = channels
+    return data
+
+
+def alert_key(alert):
+    return tuple(str(alert.get(field) or "").upper() for field in ALERT_KEY_FIELDS)
+
+
+def channel_events(channels):
+    """
+    Set of event types of a channel list, given either as the Tcl-style string SetAlert takes
+    ("{16 e_departure e_arrival}") or as the channel records GetAlerts returns.
+    """
+    if not channels:
+        return frozenset()
+    if isinstance(channels, str):
+        return frozenset(word for word in re.split(r"[\s{}]+", channels) if word in EVENT_TYPES)
+    events = set()
+    for channel in channels:
+        events.update(event for event in EVENT_TYPES if channel.get(event) in (True, 1, "1", "true"))
+    return frozenset(events)
+
+
+def _day(value):
+    # FlightXML rounds alert dates to whole days
+    return int(value) // DAY * DAY if value else 0
+
+
+def _differs(current, wanted):
+    if "enabled" in wanted and bool(wanted["enabled"]) != bool(current.get("enabled", True)):
+        return True
+    for field in ("date_start", "date_end"):
+        if wanted.get(field) is not None and _day(wanted[field]) != _day(current.get(field)):
+            return True
+    return "channels" in wanted and channel_events(wanted["channels"]) != channel_events(current.get("channels"))
+
+
+def plan_alerts(listing, desired, delete_extra=True):
+    """
+    Work out the fewest SetAlert and DeleteAlert calls that turn the alerts in listing (a GetAlerts result) into
+    desired, a list of dicts of set_alert arguments. Alerts are matched on ident, origin, destination and
+    aircrafttype; a matched alert is only updated when its enabled flag, dates or channel events differ from the
+    desired ones. Alerts not desired are deleted when delete_extra is set, as are duplicates of a desired alert.
+
+    Raises FlightAwareError when listing is an error record or holds no alert list, since planning against it would
+    create every desired alert again.
+    """
+    if not isinstance(listing, dict) or "error" in listing or "alerts" not in listing:
+        error = listing.get("error") if isinstance(listing, dict) and "error" in listing else listing
+        raise FlightAwareError("GetAlerts did not return a listing: {!r}".format(error))
+    current = {}
+    delete = []
+    for alert in listing["alerts"] or []:
+        key = alert_key(alert)
+        if key in current:
+            delete.append(alert["alert_id"])
+        else:
+            current[key] = alert
+
+    create = []
+    update = []
+    wanted_keys = set()
+    for wanted in desired:
+        key = alert_key(wanted)
+        if key in wanted_keys:
+            raise ValueError("alert {} is listed twice".format(key))
+        wanted_keys.add(key)
+        alert = current.get(key)
+        if alert is None:
+            create.append(wanted)
+        elif _differs(alert, wanted):
+            update.append((alert["alert_id"], wanted))
+
+    if delete_extra:
+        delete.extend(alert["alert_id"] for key, alert in current.items() if key not in wanted_keys)
+    return AlertPlan(create, update, sorted(delete))
+
+
+def plan_calls(plan):
+    # SetAlert and DeleteAlert request data carrying out a plan
+    sets = [alert_data(**wanted) for wanted in plan.create]
+    sets += [alert_data(**dict(wanted, alert_id=alert_id)) for alert_id, wanted in plan.update]
+    return sets, [{"alert_id": alert_id} for alert_id in plan.delete]
+
+
+def _failed(item):
+    return item.error is not None or not item.result or (isinstance(item.result, dict) and "error" in item.result)
+
+
+def summarize(plan, set_results, delete_results):
+    """
+    AlertSync for a plan from the BatchResults of its SetAlert and DeleteAlert calls.
+    """
+    created, updated, deleted, failed = [], [], [], []
+    for item in set_results:
+        if _failed(item):
+            failed.append(item)
+        else:
+            (created if item.index < len(plan.create) else updated).append(item.result)
+    for item in delete_results:
+        if _failed(item):
+            failed.append(item)
+        else:
+            deleted.append(item.data["alert_id"])
+    return AlertSync(created, updated, deleted, failed)
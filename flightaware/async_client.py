@@ -0,0 +1,408 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from urllib.parse import urlencode
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from flightaware.alerts import plan_alerts, plan_calls, summarize
+from flightaware.cache import MISSING, cache_key
+from flightaware.client import Client, BatchResult, BASE_URL, DEFAULT_CHUNK_SIZE, DEFAULT_TIMEOUT, MAX_RECORD_LENGTH, \
+    RECORD_KEYS, WRITE_METHODS
+from flightaware.coalesce import AsyncSingleFlight
+from flightaware.exceptions import FlightAwareError
+from flightaware.streaming import ArrayStreamParser
+
+logger = logging.getLogger("flightaware.async_client")
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+# Errors from aiohttp worth retrying by default
+TRANSPORT_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError) if aiohttp is not None else ()
+
+
+def encode_form(data):
+    """
+    Form-encode request data the way requests does: None values are dropped and sequences are repeated.
+    """
+    if not data:
+        return ""
+    return urlencode([(key, value) for key, value in data.items() if value is not None], doseq=True)
+
+
+class AsyncClient(Client):
+    """
+    asyncio flavour of Client. Every FlightXML method is inherited from Client and returns a coroutine, so
+
+        async with AsyncClient(username, api_key) as client:
+            arrivals = await asyncio.gather(*[client.arrived(airport) for airport in airports])
+
+    runs all of the calls on one event loop, with at most max_concurrency of them on the wire at once, or fewer when
+    an adaptive concurrency controller lowers the limit. Requires aiohttp.
+    """
+    def __init__(self, username, api_key, session=None, timeout=DEFAULT_TIMEOUT, base_url=BASE_URL,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_result_size=MAX_RECORD_LENGTH, cache=None,
+                 coalesce=False, rate_limiter=None, concurrency=None, retry=None, hedge=None, instrumentation=None,
+                 models=False):
+        """
+        username            FlightXML user name
+        api_key             FlightXML API key
+        session             optional aiohttp.ClientSession; one with a connection pool sized to max_concurrency is
+                            created on first use (and closed by close()) when omitted
+        timeout             default (connect, read) timeout in seconds, or a single number for both; see Client
+        base_url            FlightXML2 JSON endpoint
+        max_concurrency     maximum number of calls in flight at once
+        max_result_size     largest howMany the account accepts, if SetMaximumResultSize was already called for it
+        cache               optional response cache such as flightaware.cache.TTLCache
+        coalesce            share one upstream call between tasks making the same read call at the same time
+        rate_limiter        optional flightaware.ratelimit.RateLimiter throttling calls per query class
+        concurrency         optional flightaware.ratelimit.AdaptiveConcurrency lowering the calls in flight below
+                            max_concurrency as latency or errors rise; tasks wait for a slot without blocking the loop
+        retry               optional flightaware.retry.RetryPolicy; without one every call is tried exactly once
+        hedge               optional flightaware.retry.HedgePolicy sending duplicate requests for slow idempotent reads
+        instrumentation     optional flightaware.metrics.Instrumentation notified of requests, responses, errors,
+                            retries, hedges and cache lookups
+        models              return flights, schedules, airports, airlines and METARs as the slotted classes of
+                            flightaware.models instead of dicts
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncClient requires aiohttp")
+        self._configure(username, api_key, timeout, base_url, max_result_size, cache, rate_limiter, concurrency,
+                        retry, hedge, instrumentation, models)
+        # aiohttp takes the header rather than a requests auth object, so have the auth object write it
+        prepared = requests.Request("POST", base_url, auth=self.auth).prepare()
+        self.headers["Authorization"] = prepared.headers["Authorization"]
+        self.single_flight = AsyncSingleFlight() if coalesce else None
+        self.max_concurrency = max_concurrency
+        self._owns_session = session is None
+        self.session = session
+        self._semaphore = None
+        self._slots = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __enter__(self):
+        raise TypeError("use 'async with' with AsyncClient")
+
+    async def close(self):
+        """
+        Release the pooled connections. A session passed in by the caller is left open.
+        """
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        # aiohttp sessions have to be created from inside the running event loop
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.session = aiohttp.ClientSession(connector=connector)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._slots = asyncio.Condition()
+        return self.session
+
+    def _client_timeout(self, timeout):
+        if timeout is None:
+            timeout = self.timeout
+        if isinstance(timeout, (tuple, list)):
+            connect, read = timeout
+        else:
+            connect = read = timeout
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+    async def _throttle(self, method):
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(method)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _acquire_slot(self):
+        # Wait for the adaptive controller to allow another call in flight
+        async with self._slots:
+            await self._slots.wait_for(self.concurrency.try_acquire)
+
+    async def _release_slot(self, latency, failed):
+        self.concurrency.release(latency, failed)
+        async with self._slots:
+            self._slots.notify_all()
+
+    async def _send(self, url, method, data, timeout):
+        # One HTTP attempt; returns (status, decoded body, latency), leaving the body undecoded when the status is
+        # retryable. Latency is timed inside the concurrency semaphore, around the wire call only, as in Client._send
+        await self._throttle(method)
+        session = self._get_session()
+        instrumentation = self.instrumentation
+        concurrency = self.concurrency
+        async with self._semaphore:
+            if concurrency is not None:
+                await self._acquire_slot()
+            start = time.time()
+            latency = None
+            try:
+                async with session.post(url, data=encode_form(data), headers=self.headers,
+                                        timeout=self._client_timeout(timeout)) as r:
+                    status = r.status
+                    body = await r.read()
+                latency = time.time() - start
+            except Exception as e:
+                if instrumentation is not None:
+                    instrumentation.on_error(method, e, time.time() - start)
+                raise
+            finally:
+                if concurrency is not None:
+                    failed = latency is None or status == 429 or status >= 500
+                    await self._release_slot(time.time() - start if latency is None else latency, failed)
+        if self.retry is not None and self.retry.retryable_status(status):
+            if instrumentation is not None:
+                instrumentation.on_response(method, latency, status, len(body), 0.0)
+            return status, None, latency
+        decode_start = time.time()
+        result = json.loads(body)
+        if instrumentation is not None:
+            instrumentation.on_response(method, latency, status, len(body), time.time() - decode_start)
+        return status, result, latency
+
+    async def _hedged_send(self, url, method, data, timeout):
+        # See Client._hedged_send. A losing hedge is cancelled; the first request is left to finish even when the
+        # hedge wins, so that its full latency is recorded
+        hedge = self.hedge
+        if hedge is None or not hedge.applies(method):
+            return await self._send(url, method, data, timeout)
+
+        start = time.time()
+
+        def record(task):
+            if not task.cancelled() and task.exception() is None:
+                hedge.record(method, time.time() - start)
+
+        first = asyncio.ensure_future(self._send(url, method, data, timeout))
+        first.add_done_callback(record)
+        done, _ = await asyncio.wait([first], timeout=hedge.delay_for(method))
+        if done:
+            return first.result()
+
+        logger.debug("hedging %s after %.3fs", method, time.time() - start)
+        if self.instrumentation is not None:
+            self.instrumentation.on_hedge(method)
+        second = asyncio.ensure_future(self._send(url, method, data, timeout))
+        pending = set([first, second])
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+        except BaseException:
+            first.cancel()
+            raise
+        finally:
+            second.cancel()
+        raise error
+
+    async def _post(self, method, data=None, timeout=None):
+        url = os.path.join(self.base_url, method)
+        logger.debug("POST\n%s\n%s\n", url, data)
+
+        policy = self.retry
+        deadline = policy.start() if policy is not None else None
+        instrumentation = self.instrumentation
+        attempt = 0
+        while True:
+            if instrumentation is not None:
+                instrumentation.on_request(method)
+            try:
+                status, result, latency = await self._hedged_send(
+                    url, method, data, timeout if policy is None else policy.clip_timeout(timeout or self.timeout, deadline))
+            except Exception as e:
+                if policy is None or not isinstance(e, policy.retry_exceptions or TRANSPORT_ERRORS):
+                    raise
+                error = e
+            else:
+                if policy is None or not policy.retryable_status(status):
+                    return result
+                error = FlightAwareError("HTTP {} from {}".format(status, method))
+                if instrumentation is not None:
+                    instrumentation.on_error(method, error, latency)
+
+            attempt += 1
+            delay = policy.next_delay(attempt, deadline, method in WRITE_METHODS)
+            if delay is None:
+                raise error
+            logger.info("%s failed (%r), retrying in %.2fs", method, error, delay)
+            if instrumentation is not None:
+                instrumentation.on_retry(method, attempt, error, delay)
+            await asyncio.sleep(delay)
+
+    async def _request(self, method, data=None, transform=None, timeout=None, models=None):
+        transform = self._transform_for(method, transform, models)
+        key, result = self._cache_lookup(method, data)
+        if result is MISSING:
+            async def call():
+                result = self._unwrap(method, await self._post(method, data, timeout))
+                self._cache_store(key, method, result)
+                return result
+
+            if self.single_flight is None or method in WRITE_METHODS:
+                result = await call()
+            else:
+                result = await self.single_flight.do(key or cache_key(method, data), call)
+        if transform is not None:
+            result = transform(result)
+        return result
+
+    async def lat_lng_to_distance(self, lat1, lon1, lat2, lon2, remote=False):
+        result = Client.lat_lng_to_distance(self, lat1, lon1, lat2, lon2, remote)
+        return (await result) if remote else result
+
+    async def lat_lng_to_heading(self, lat1, lon1, lat2, lon2, remote=False):
+        result = Client.lat_lng_to_heading(self, lat1, lon1, lat2, lon2, remote)
+        return (await result) if remote else result
+
+    async def stream(self, method, data=None, records_key=None, timeout=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Async generator counterpart of Client.stream.
+        """
+        url = os.path.join(self.base_url, method)
+        logger.debug("POST (stream)\n%s\n%s\n", url, data)
+
+        parser = ArrayStreamParser(records_key or RECORD_KEYS.get(method, "data"))
+        session = self._get_session()
+        instrumentation = self.instrumentation
+        policy = self.retry
+        deadline = policy.start() if policy is not None else None
+        attempt = 0
+        while True:
+            await self._throttle(method)
+            if instrumentation is not None:
+                instrumentation.on_request(method)
+            size = 0
+            decode_time = 0.0
+            error = None
+            async with self._semaphore:
+                start = time.time()
+                latency = None
+                try:
+                    async with session.post(url, data=encode_form(data), headers=self.headers,
+                                            timeout=self._client_timeout(timeout if policy is None else
+                                                                         policy.clip_timeout(timeout or self.timeout,
+                                                                                             deadline))) as r:
+                        latency = time.time() - start
+                        # Check the status before yielding anything, so that error statuses can still be retried
+                        if r.status >= 400:
+                            error = FlightAwareError("HTTP {} from {}".format(r.status, method))
+                        else:
+                            async for chunk in r.content.iter_chunked(chunk_size):
+                                size += len(chunk)
+                                decode_start = time.time()
+                                records = parser.feed(chunk)
+                                decode_time += time.time() - decode_start
+                                for record in records:
+                                    yield record
+                    if error is None:
+                        decode_start = time.time()
+                        records = parser.close()
+                        decode_time += time.time() - decode_start
+                except Exception as e:
+                    if instrumentation is not None:
+                        instrumentation.on_error(method, e, time.time() - start)
+                    if latency is not None or policy is None or \
+                            not isinstance(e, policy.retry_exceptions or TRANSPORT_ERRORS):
+                        raise
+                    error = e
+            if error is None:
+                break
+            if latency is not None:
+                if instrumentation is not None:
+                    instrumentation.on_response(method, latency, r.status, 0, 0.0)
+                    instrumentation.on_error(method, error, latency)
+                if policy is None or not policy.retryable_status(r.status):
+                    raise error
+
+            attempt += 1
+            delay = policy.next_delay(attempt, deadline, method in WRITE_METHODS)
+            if delay is None:
+                raise error
+            logger.info("%s failed (%r), retrying in %.2fs", method, error, delay)
+            if instrumentation is not None:
+                instrumentation.on_retry(method, attempt, error, delay)
+            await asyncio.sleep(delay)
+        if instrumentation is not None:
+            instrumentation.on_response(method, latency, r.status, size, decode_time)
+        for record in records:
+            yield record
+
+    async def _paginate(self, method, data, page_size=None, prefetch=False, transform=None, models=None,
+                        timeout=None):
+        """
+        Async generator counterpart of Client._paginate; with prefetch the next page is requested as a task.
+        """
+        transform = self._transform_for(method, transform, models)
+        page_size = page_size or self.max_result_size
+        offset = data.get("offset") or 0
+
+        async def fetch(offset):
+            page = dict(data, howMany=page_size, offset=offset)
+            return self._page_records(method, await self._post(method, page, timeout))
+
+        pending = None
+        try:
+            while True:
+                records, next_offset = await (pending if pending is not None else fetch(offset))
+                more = records and next_offset is not None and next_offset > offset
+                pending = asyncio.ensure_future(fetch(next_offset)) if prefetch and more else None
+                if transform is not None:
+                    records = transform(records)
+                for record in records:
+                    yield record
+                if not more:
+                    break
+                offset = next_offset
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    async def _batch_call(self, index, method, data, transform, models=None, timeout=None):
+        try:
+            return BatchResult(index, data, await self._request(method, data, transform, timeout, models), None)
+        except Exception as e:
+            logger.warning("%s call %d of batch failed: %r", method, index, e)
+            return BatchResult(index, data, None, e)
+
+    async def batch(self, method, items, max_workers=None, transform=None, models=None, timeout=None):
+        """
+        See Client.batch. Concurrency is bounded by max_concurrency; max_workers is accepted for symmetry and ignored.
+        """
+        return list(await asyncio.gather(*[self._batch_call(index, method, data, transform, models, timeout)
+                                           for index, data in enumerate(items)]))
+
+    async def batch_as_completed(self, method, items, max_workers=None, transform=None, models=None, timeout=None):
+        """
+        See Client.batch_as_completed; an async generator.
+        """
+        calls = [self._batch_call(index, method, data, transform, models, timeout)
+                 for index, data in enumerate(items)]
+        for call in asyncio.as_completed(calls):
+            yield await call
+
+    async def sync_alerts(self, desired, delete_extra=True, max_workers=None):
+        """
+        See Client.sync_alerts.
+        """
+        plan = plan_alerts(await self.get_alerts(), desired, delete_extra)
+        sets, deletes = plan_calls(plan)
+        deleted = await self.batch("DeleteAlert", deletes)
+        return summarize(plan, await self.batch("SetAlert", sets), deleted)
@@ -0,0 +1,224 @@
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Returned by get() on a miss, since None is a legitimate cached result
+MISSING = object()
+
+DAY = 24 * 60 * 60
+
+# Seconds the results of the reference-data methods stay fresh
+REFERENCE_TTLS = {
+    "AircraftType": 7 * DAY,
+    "AirlineInfo": 7 * DAY,
+    "AirportInfo": 7 * DAY,
+    "AllAirlines": DAY,
+    "AllAirports": DAY,
+    "TailOwner": DAY,
+    "ZipcodeInfo": 30 * DAY,
+}
+
+# Seconds each FlightXML method's results stay fresh in memory. Methods not listed are not cached.
+DEFAULT_TTLS = dict(REFERENCE_TTLS, **{
+    "RoutesBetweenAirports": 60 * 60,
+    "Metar": 5 * 60,
+    "MetarEx": 5 * 60,
+    "NTaf": 15 * 60,
+    "InFlightInfo": 10,
+})
+
+# Listings that every write changes, left out of default_ttl so that a reconcile never plans from a stale copy.
+# Listing one in ttls still caches it.
+VOLATILE_METHODS = frozenset(["GetAlerts"])
+
+
+def cache_key(method, data=None):
+    """
+    Key for a call: the method name plus its data with None values dropped (they are never sent) and keys sorted.
+    """
+    data = dict((key, value) for key, value in (data or {}).items() if value is not None)
+    return json.dumps([method, data], sort_keys=True, default=str, separators=(",", ":"))
+
+
+class BaseCache(object):
+    """
+    Per-method TTL policy and hit/miss counters shared by the cache backends. A backend implements
+    get(key) -> value or MISSING, set(key, value, ttl), delete(key) and clear().
+    """
+    def __init__(self, ttls, default_ttl=None, clock=time.time):
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, method):
+        if method in self.ttls:
+            return self.ttls[method]
+        return None if method in VOLATILE_METHODS else self.default_ttl
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class TTLCache(BaseCache):
+    """
+    In-memory, thread-safe response cache with a per-method time to live and least recently used eviction.
+
+        client = Client(username, api_key, cache=TTLCache(maxsize=10000))
+    """
+    def __init__(self, maxsize=1024, ttls=None, default_ttl=None, clock=time.time):
+        """
+        maxsize         maximum number of results held; the least recently used is dropped beyond it
+        ttls            {method: seconds} overriding DEFAULT_TTLS; a value of None disables caching for that method
+        default_ttl     seconds for methods missing from ttls (other than VOLATILE_METHODS), or None to leave them
+                        uncached
+        clock           time source, for tests
+        """
+        super(TTLCache, self).__init__(dict(DEFAULT_TTLS, **(ttls or {})), default_ttl, clock)
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        stats = super(TTLCache, self).stats()
+        stats.update(size=len(self._entries), maxsize=self.maxsize)
+        return stats
+
+
+class SQLiteCache(BaseCache):
+    """
+    Response cache kept in a SQLite file so that it survives restarts and is shared by every worker process
+    pointing at the same path. The database runs in WAL mode, so any number of processes can read while one writes.
+    By default only the reference methods in REFERENCE_TTLS are stored.
+
+        client = Client(username, api_key, cache=SQLiteCache("/var/cache/flightaware.db"))
+
+    Entries past their TTL are ignored on read and can be dropped with purge(); invalidate(method) forces the
+    next call of a method to refresh from FlightXML.
+    """
+    def __init__(self, path, ttls=None, default_ttl=None, clock=time.time, timeout=30):
+        """
+        path            database file, created if missing
+        ttls            {method: seconds} overriding REFERENCE_TTLS; a value of None disables caching for that method
+        default_ttl     seconds for methods missing from ttls (other than VOLATILE_METHODS), or None to leave them
+                        uncached
+        clock           time source, for tests
+        timeout         seconds to wait on another process's write lock
+        """
+        super(SQLiteCache, self).__init__(dict(REFERENCE_TTLS, **(ttls or {})), default_ttl, clock)
+        self.path = path
+        self.timeout = timeout
+        # sqlite3 connections may not be shared between threads, so each thread gets its own
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, method TEXT NOT NULL, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_method ON responses (method)")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM responses WHERE key = ? AND expires > ?", (key, self.clock())
+        ).fetchone()
+        self._count(row is not None)
+        if row is None:
+            return MISSING
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        method = json.loads(key)[0]
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, method, value, expires) VALUES (?, ?, ?, ?)",
+                (key, method, json.dumps(value), self.clock() + ttl)
+            )
+
+    def delete(self, key):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def invalidate(self, method=None):
+        """
+        Drop every entry of a method, or everything when method is None.
+        """
+        with self._connection() as connection:
+            if method is None:
+                connection.execute("DELETE FROM responses")
+            else:
+                connection.execute("DELETE FROM responses WHERE method = ?", (method,))
+
+    def purge(self):
+        """
+        Delete expired entries and return how many were removed.
+        """
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM responses WHERE expires <= ?", (self.clock(),)).rowcount
+
+    def clear(self):
+        self.invalidate()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def stats(self):
+        stats = super(SQLiteCache, self).stats()
+        stats["size"] = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return stats
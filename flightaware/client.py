@@ -1,30 +1,84 @@
 import os
-import datetime
+import time
 import logging
+from collections import namedtuple
+from functools import partial
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+from flightaware import geo
+from flightaware.alerts import alert_data, plan_alerts, plan_calls, summarize
+from flightaware.cache import MISSING, cache_key
+from flightaware.coalesce import SingleFlight
+from flightaware.exceptions import FlightAwareError
+from flightaware.models import METHOD_MODELS, to_models
+from flightaware.streaming import ArrayStreamParser
+from flightaware.timestamps import EPOCH, add_datetimes, from_unix_timestamp, to_unix_timestamp
+from flightaware.track import Track
+from flightaware.transport import HTTPTransport
+
 logger = logging.getLogger("flightaware.client")
 
 BASE_URL = "http://flightxml.flightaware.com/json/FlightXML2/"
 MAX_RECORD_LENGTH = 15
-EPOCH = datetime.datetime(1970, 1, 1)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (5, 30)                       # (connect, read) seconds
+DEFAULT_BATCH_WORKERS = 8
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Key under <Method>Result holding the records of each paged listing method
+RECORD_KEYS = {
+    "AirlineFlightSchedules": "data",
+    "Arrived": "arrivals",
+    "Departed": "departures",
+    "Enroute": "enroute",
+    "Scheduled": "scheduled",
+    "Search": "aircraft",
+    "SearchBirdseyeInFlight": "aircraft",
+    "SearchBirdseyePositions": "data",
+}
+
+# Methods that change state on the FlightXML side; their calls are never coalesced
+WRITE_METHODS = frozenset([
+    "DeleteAlert",
+    "RegisterAlertEndpoint",
+    "SetAlert",
+    "SetMaximumResultSize",
+])
+
+# Errors from requests worth retrying by default
+TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+# One call of a batch: its position in the input, the data sent, and either the result or the exception raised
+BatchResult = namedtuple("BatchResult", ["index", "data", "result", "error"])
+
+
+def search_query(parameters):
+    """
+    Build a Search query string of "-key value" pairs from a dict.
+    """
+    query = ""
+    for key, value in parameters.items():
+        query += "-%s %s " % (key, value)
+    return query
 
 
-def to_unix_timestamp(val):
-    if val:
-        if not isinstance(val, datetime.datetime):
-            raise ValueError("input must be of type datetime")
-        output = int((val - EPOCH).total_seconds())
-    else:
-        # Just bypass
-        output = None
-    return output
+def _as_track(results):
+    if isinstance(results, dict) and "error" in results:
+        return results
+    return Track.from_records(results)
 
 
-def from_unix_timestamp(val):
-    return datetime.datetime.fromtimestamp(val)
+def _add_schedule_times(results, copy=False):
+    return add_datetimes(results, copy=copy)
+
+
+def _add_lazy_schedule_times(results, copy=False):
+    return add_datetimes(results, lazy=True, copy=copy)
 
 
 class TrafficFilter(object):
@@ -45,19 +99,196 @@ class AirlineInsightReportType(object):
     CARRIERS_BY_CARGO_WEIGHT = 4                # Carriers by most cargo weight
 
 
+def create_session(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE, pool_block=False):
+    """
+    Build a requests session whose connection pool keeps sockets to FlightXML alive between calls.
+
+    pool_connections    number of host pools to cache
+    pool_maxsize        maximum number of sockets kept open per host
+    pool_block          wait for a free socket instead of opening an extra, unpooled one
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 class Client(object):
-    def __init__(self, username, api_key):
+    def __init__(self, username, api_key, session=None, timeout=DEFAULT_TIMEOUT, base_url=BASE_URL,
+                 pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE, pool_block=False,
+                 max_result_size=MAX_RECORD_LENGTH, cache=None, coalesce=False, rate_limiter=None, concurrency=None,
+                 retry=None, hedge=None, instrumentation=None, transport=None, models=False):
+        """
+        username            FlightXML user name
+        api_key             FlightXML API key
+        session             optional requests.Session to send calls through; a pooled keep-alive session
+                            is created (and closed by close()) when omitted
+        timeout             default (connect, read) timeout in seconds, or a single number for both; batch,
+                            batch_as_completed, stream and the iter_* helpers take a timeout overriding it per call
+        base_url            FlightXML2 JSON endpoint
+        pool_connections    see create_session; ignored when a session is supplied
+        pool_maxsize        see create_session; ignored when a session is supplied
+        pool_block          see create_session; ignored when a session is supplied
+        max_result_size     largest howMany the account accepts, if SetMaximumResultSize was already called for it
+        cache               optional response cache such as flightaware.cache.TTLCache
+        coalesce            share one upstream call between threads making the same read call at the same time
+        rate_limiter        optional flightaware.ratelimit.RateLimiter throttling calls per query class
+        concurrency         optional flightaware.ratelimit.AdaptiveConcurrency bounding the calls in flight
+        retry               optional flightaware.retry.RetryPolicy; without one every call is tried exactly once
+        hedge               optional flightaware.retry.HedgePolicy sending duplicate requests for slow idempotent reads
+        instrumentation     optional flightaware.metrics.Instrumentation notified of requests, responses, errors,
+                            retries, hedges and cache lookups
+        transport           optional object sending the HTTP requests, such as flightaware.transport.ReplayTransport;
+                            defaults to an HTTPTransport over session
+        models              return flights, schedules, airports, airlines and METARs as the slotted classes of
+                            flightaware.models instead of dicts; helpers that index records by key, such as
+                            BoardWatcher and PositionSnapshot, ask for dicts per call
+        """
+        self._configure(username, api_key, timeout, base_url, max_result_size, cache, rate_limiter, concurrency,
+                        retry, hedge, instrumentation, models)
+        self.single_flight = SingleFlight() if coalesce else None
+        self._hedge_executor = None
+        self._lock = threading.Lock()
+        self._owns_session = session is None
+        if session is None:
+            session = create_session(pool_connections, pool_maxsize, pool_block)
+        self.session = session
+        self.transport = transport or HTTPTransport(session, self.auth, self.headers)
+
+    def _configure(self, username, api_key, timeout, base_url, max_result_size, cache, rate_limiter, concurrency,
+                   retry, hedge, instrumentation, models):
+        # Settings shared with AsyncClient, which sets up its own session, transport and coalescing
         self.auth = HTTPBasicAuth(username, api_key)
         self.headers = {
             "Content-Type": "application/x-www-form-urlencoded",
         }
+        self.timeout = timeout
+        self.base_url = base_url
+        self.max_result_size = max_result_size
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.retry = retry
+        self.hedge = hedge
+        self.instrumentation = instrumentation
+        self.models = models
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Release the pooled connections. A session passed in by the caller is left open.
+        """
+        if self._owns_session:
+            self.session.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+
+    def _send(self, url, method, data, timeout):
+        # One HTTP attempt, throttled by the rate limiter and concurrency controller when configured. Returns the
+        # response and its latency, timed around the wire call only so that waiting for a turn is not reported as
+        # upstream latency
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(method)
+        if self.concurrency is not None:
+            self.concurrency.acquire()
+        start = time.time()
+        latency = None
+        try:
+            r = self.transport.post(method, url, data, timeout)
+            latency = time.time() - start
+        except Exception as e:
+            if self.instrumentation is not None:
+                self.instrumentation.on_error(method, e, time.time() - start)
+            raise
+        finally:
+            if self.concurrency is not None:
+                failed = latency is None or r.status_code == 429 or r.status_code >= 500
+                self.concurrency.release(time.time() - start if latency is None else latency, failed)
+        return r, latency
+
+    def _hedged_send(self, url, method, data, timeout):
+        # Send a duplicate request if the first has not answered within the hedge delay; first answer wins
+        hedge = self.hedge
+        if hedge is None or not hedge.applies(method):
+            return self._send(url, method, data, timeout)
+
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=hedge.max_workers)
+        start = time.time()
+        first = self._hedge_executor.submit(self._send, url, method, data, timeout)
+        # The first request's latency is recorded whether or not a hedge beats it; recording only the calls that
+        # finished within the delay would censor the samples and drag the delay (and so the hedge rate) down
+        first.add_done_callback(lambda future: future.exception() is None and hedge.record(method, time.time() - start))
+        done, pending = wait([first], timeout=hedge.delay_for(method))
+        if done:
+            return first.result()
+
+        logger.debug("hedging %s after %.3fs", method, time.time() - start)
+        if self.instrumentation is not None:
+            self.instrumentation.on_hedge(method)
+        pending.add(self._hedge_executor.submit(self._send, url, method, data, timeout))
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _decode(self, method, r, latency):
+        if self.instrumentation is None:
+            return r.json()
+        start = time.time()
+        result = r.json()
+        self.instrumentation.on_response(method, latency, r.status_code, len(r.content), time.time() - start)
+        return result
 
-    def _request(self, method, data=None):
-        url = os.path.join(BASE_URL, method)
+    def _post(self, method, data=None, timeout=None):
+        url = os.path.join(self.base_url, method)
         logger.debug("POST\n%s\n%s\n", url, data)
 
-        r = requests.post(url=url, data=data, auth=self.auth, headers=self.headers)
-        result = r.json()
+        if timeout is None:
+            timeout = self.timeout
+        policy = self.retry
+        deadline = policy.start() if policy is not None else None
+        instrumentation = self.instrumentation
+        attempt = 0
+        while True:
+            if instrumentation is not None:
+                instrumentation.on_request(method)
+            try:
+                r, latency = self._hedged_send(url, method, data,
+                                               timeout if policy is None else policy.clip_timeout(timeout, deadline))
+            except Exception as e:
+                if policy is None or not isinstance(e, policy.retry_exceptions or TRANSPORT_ERRORS):
+                    raise
+                error = e
+            else:
+                if policy is None or not policy.retryable_status(r.status_code):
+                    return self._decode(method, r, latency)
+                error = FlightAwareError("HTTP {} from {}".format(r.status_code, method))
+                if instrumentation is not None:
+                    instrumentation.on_response(method, latency, r.status_code, len(r.content), 0.0)
+                    instrumentation.on_error(method, error, latency)
+
+            attempt += 1
+            delay = policy.next_delay(attempt, deadline, method in WRITE_METHODS)
+            if delay is None:
+                raise error
+            logger.info("%s failed (%r), retrying in %.2fs", method, error, delay)
+            if instrumentation is not None:
+                instrumentation.on_retry(method, attempt, error, delay)
+            time.sleep(delay)
+
+    def _unwrap(self, method, result):
         final = result
         key = "{}Result".format(method)
         if key in result:
@@ -67,6 +298,226 @@ class Client(object):
                 final = final["data"]
         return final
 
+    def _cache_lookup(self, method, data):
+        """
+        Return (key, cached result) for a call. key is None when the method is not cached, and the result is
+        MISSING when there is nothing fresh in the cache. Writes are never cached, whatever the cache's TTLs.
+        """
+        if self.cache is None or method in WRITE_METHODS or self.cache.ttl_for(method) is None:
+            return None, MISSING
+        key = cache_key(method, data)
+        result = self.cache.get(key)
+        if self.instrumentation is not None:
+            self.instrumentation.on_cache(method, result is not MISSING)
+        return key, result
+
+    def _cache_store(self, key, method, result):
+        # Error records are never cached
+        if key is not None and not (isinstance(result, dict) and "error" in result):
+            self.cache.set(key, result, self.cache.ttl_for(method))
+
+    def _transform_for(self, method, transform, models=None):
+        # With models on, a method's result class replaces its usual post-processing; models overrides the
+        # client's setting for one call, so helpers that index records as dicts can ask for them
+        if (self.models if models is None else models) and method in METHOD_MODELS:
+            return partial(to_models, method)
+        return transform
+
+    def _request(self, method, data=None, transform=None, timeout=None, models=None):
+        """
+        Call a FlightXML method and return its unwrapped result, passed through transform when one is given.
+
+        Methods must do any post-processing of the result through transform rather than after this call returns,
+        so that AsyncClient, whose _request is a coroutine, can share them unchanged. A result may be shared with
+        other callers through the cache or coalescing, so transforms must be safe to apply to it more than once.
+        """
+        transform = self._transform_for(method, transform, models)
+        key, result = self._cache_lookup(method, data)
+        if result is MISSING:
+            def call():
+                result = self._unwrap(method, self._post(method, data, timeout))
+                self._cache_store(key, method, result)
+                return result
+
+            if self.single_flight is None or method in WRITE_METHODS:
+                result = call()
+            else:
+                result = self.single_flight.do(key or cache_key(method, data), call)
+        if transform is not None:
+            result = transform(result)
+        return result
+
+    def stream(self, method, data=None, records_key=None, timeout=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Call a FlightXML method and yield the records of its result one at a time while the response body is still
+        downloading, instead of decoding the whole body first. Meant for large results such as AllAirports,
+        Search, SearchBirdseyePositions or GetHistoricalTrack:
+
+            for airport in client.stream("AllAirports"):
+                ...
+
+        records_key names the array to stream and defaults to the method's entry in RECORD_KEYS, or "data".
+        Streamed calls bypass the cache and coalescing. Error statuses raise FlightAwareError before any record is
+        yielded, after retrying the retryable ones under the retry policy.
+        """
+        url = os.path.join(self.base_url, method)
+        logger.debug("POST (stream)\n%s\n%s\n", url, data)
+
+        if timeout is None:
+            timeout = self.timeout
+        key = records_key or RECORD_KEYS.get(method, "data")
+        instrumentation = self.instrumentation
+        r, latency = self._open_stream(method, url, data, timeout)
+        start = time.time() - latency
+
+        parser = ArrayStreamParser(key)
+        size = 0
+        decode_time = 0.0
+        try:
+            for chunk in r.iter_content(chunk_size):
+                size += len(chunk)
+                decode_start = time.time()
+                records = parser.feed(chunk)
+                decode_time += time.time() - decode_start
+                for record in records:
+                    yield record
+            decode_start = time.time()
+            records = parser.close()
+            decode_time += time.time() - decode_start
+        except Exception as e:
+            if instrumentation is not None:
+                instrumentation.on_error(method, e, time.time() - start)
+            raise
+        finally:
+            r.close()
+        if instrumentation is not None:
+            instrumentation.on_response(method, latency, r.status_code, size, decode_time)
+        for record in records:
+            yield record
+
+    def _open_stream(self, method, url, data, timeout):
+        """
+        Send a streamed request and return the open response with its latency once the status is a success.
+        Transport errors and retryable statuses are retried under the retry policy like _post does; any other
+        error status closes the response and raises FlightAwareError.
+        """
+        policy = self.retry
+        deadline = policy.start() if policy is not None else None
+        instrumentation = self.instrumentation
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(method)
+            if instrumentation is not None:
+                instrumentation.on_request(method)
+            start = time.time()
+            try:
+                r = self.transport.post(method, url, data,
+                                        timeout if policy is None else policy.clip_timeout(timeout, deadline),
+                                        stream=True)
+            except Exception as e:
+                if instrumentation is not None:
+                    instrumentation.on_error(method, e, time.time() - start)
+                if policy is None or not isinstance(e, policy.retry_exceptions or TRANSPORT_ERRORS):
+                    raise
+                error = e
+            else:
+                latency = time.time() - start
+                if r.status_code < 400:
+                    return r, latency
+                r.close()
+                error = FlightAwareError("HTTP {} from {}".format(r.status_code, method))
+                if instrumentation is not None:
+                    instrumentation.on_response(method, latency, r.status_code, 0, 0.0)
+                    instrumentation.on_error(method, error, latency)
+                if policy is None or not policy.retryable_status(r.status_code):
+                    raise error
+
+            attempt += 1
+            delay = policy.next_delay(attempt, deadline, method in WRITE_METHODS)
+            if delay is None:
+                raise error
+            logger.info("%s failed (%r), retrying in %.2fs", method, error, delay)
+            if instrumentation is not None:
+                instrumentation.on_retry(method, attempt, error, delay)
+            time.sleep(delay)
+
+    def _batch_call(self, index, method, data, transform, models=None, timeout=None):
+        try:
+            return BatchResult(index, data, self._request(method, data, transform, timeout, models), None)
+        except Exception as e:
+            logger.warning("%s call %d of batch failed: %r", method, index, e)
+            return BatchResult(index, data, None, e)
+
+    def batch(self, method, items, max_workers=DEFAULT_BATCH_WORKERS, transform=None, models=None, timeout=None):
+        """
+        Call a FlightXML method once per entry of items on a pool of max_workers threads and return a list of
+        BatchResult in input order. A failed call is reported through its BatchResult.error and does not stop
+        the others.
+
+            results = client.batch("Metar", [{"airport": a} for a in airports])
+
+        Keep max_workers at or below the session's pool_maxsize so every worker gets a kept-alive socket. models
+        and timeout override the client's models setting and timeout for these calls.
+        """
+        results = list(self.batch_as_completed(method, items, max_workers, transform, models, timeout))
+        results.sort(key=lambda item: item.index)
+        return results
+
+    def batch_as_completed(self, method, items, max_workers=DEFAULT_BATCH_WORKERS, transform=None, models=None,
+                           timeout=None):
+        """
+        Same as batch, but yields each BatchResult as soon as its call finishes.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._batch_call, index, method, data, transform, models, timeout)
+                       for index, data in enumerate(items)]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _page_records(self, method, result):
+        """
+        Split a raw listing response into (records, next_offset). next_offset is -1 once the listing is exhausted.
+        """
+        key = "{}Result".format(method)
+        if key not in result:
+            raise FlightAwareError(result.get("error", result))
+        result = result[key]
+        return result.get(RECORD_KEYS[method]) or [], result.get("next_offset", -1)
+
+    def _paginate(self, method, data, page_size=None, prefetch=False, transform=None, models=None, timeout=None):
+        """
+        Lazily yield every record of a listing method, fetching page_size records per call and following
+        next_offset until the API reports the end. page_size defaults to the largest size the account accepts
+        (see set_maximum_result_sizes). With prefetch the next page is requested on a background thread while the
+        caller works through the current one.
+        """
+        transform = self._transform_for(method, transform, models)
+        page_size = page_size or self.max_result_size
+        offset = data.get("offset") or 0
+
+        def fetch(offset):
+            page = dict(data, howMany=page_size, offset=offset)
+            return self._page_records(method, self._post(method, page, timeout))
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            pending = None
+            while True:
+                records, next_offset = pending.result() if pending is not None else fetch(offset)
+                more = records and next_offset is not None and next_offset > offset
+                pending = executor.submit(fetch, next_offset) if executor is not None and more else None
+                if transform is not None:
+                    records = transform(records)
+                for record in records:
+                    yield record
+                if not more:
+                    break
+                offset = next_offset
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
     def aircraft_type(self, aircraft_type):
         """
         Given an aircraft type string such as GALX, AircraftType returns information about that type,  comprising the
@@ -89,7 +540,7 @@ class Client(object):
         data = {"faFlightID": fa_flight_id}
         return self._request("AirlineFlightInfo", data)
 
-    def airline_flight_schedules(self, start_date, end_date, origin=None, destination=None, airline=None, flight_number=None, how_many=MAX_RECORD_LENGTH, offset=0):
+    def airline_flight_schedules(self, start_date, end_date, origin=None, destination=None, airline=None, flight_number=None, how_many=MAX_RECORD_LENGTH, offset=0, lazy_times=False):
         """
         AirlineFlightSchedules returns flight schedules that have been published by airlines. These schedules are available
         for the recent past as well as up to one year into the future.
@@ -104,6 +555,9 @@ class Client(object):
         flightno	string	optional flight number. If blank or unspecified, then any flight number will be returned.
         howMany	int	maximum number of past records to obtain. Must be a positive integer value less than or equal to 15, unless SetMaximumResultSize has been called.
         offset	int	must be an integer value of the offset row count you want the search to start at. Most requests should be 0 (most recent report).
+
+        Each record gains UTC datetimes departure_time and arrival_time; with lazy_times they are only converted when
+        looked up, and the records stay dicts even when the client has models on.
         """
         data = {
             "startDate": to_unix_timestamp(start_date),
@@ -115,11 +569,33 @@ class Client(object):
             "howMany": how_many,
             "offset": offset,
         }
-        results = self._request("AirlineFlightSchedules", data)
-        for item in results:
-            item["departure_time"] = from_unix_timestamp(item["departuretime"])
-            item["arrival_time"] = from_unix_timestamp(item["arrivaltime"])
-        return results
+        # With a cache or coalescing the result may be shared with other callers, so convert a copy of it
+        shared = self.cache is not None or self.single_flight is not None
+        if lazy_times:
+            return self._request("AirlineFlightSchedules", data, partial(_add_lazy_schedule_times, copy=shared),
+                                 models=False)
+        return self._request("AirlineFlightSchedules", data, partial(_add_schedule_times, copy=shared))
+
+    def iter_airline_flight_schedules(self, start_date, end_date, origin=None, destination=None, airline=None, flight_number=None, page_size=None, prefetch=False, lazy_times=False, models=None, timeout=None):
+        """
+        Iterate over every AirlineFlightSchedules record, paging through the results as they are consumed.
+        With prefetch the next page is fetched while the current one is being consumed.
+        lazy_times is as for airline_flight_schedules; models overrides the client's models setting for this call.
+        timeout overrides the client's timeout for each page.
+        """
+        data = {
+            "startDate": to_unix_timestamp(start_date),
+            "endDate": to_unix_timestamp(end_date),
+            "origin": origin,
+            "destination": destination,
+            "airline": airline,
+            "flightno": flight_number,
+        }
+        if lazy_times:
+            return self._paginate("AirlineFlightSchedules", data, page_size, prefetch, _add_lazy_schedule_times,
+                                  models=False, timeout=timeout)
+        return self._paginate("AirlineFlightSchedules", data, page_size, prefetch, _add_schedule_times, models,
+                              timeout)
 
     def airline_info(self, airline):
         """
@@ -247,6 +723,16 @@ class Client(object):
         data = {"airport": airport, "howMany": how_many, "filter": filter, "offset": offset}
         return self._request("Arrived", data)
 
+    def iter_arrived(self, airport, filter=TrafficFilter.ALL, page_size=None, prefetch=False, models=None, timeout=None):
+        """
+        Iterate over every Arrived record for the airport, paging through the results as they are consumed.
+        With prefetch the next page is fetched while the current one is being consumed. models overrides the
+        client's models setting for this call.
+        timeout overrides the client's timeout for each page.
+        """
+        data = {"airport": airport, "filter": filter}
+        return self._paginate("Arrived", data, page_size, prefetch, models=models, timeout=timeout)
+
     def departed(self, airport, how_many=MAX_RECORD_LENGTH, filter=TrafficFilter.ALL, offset=0):
         """
         Departed returns information about already departed flights for a specified airport and maximum number of
@@ -265,6 +751,16 @@ class Client(object):
         data = {"airport": airport, "howMany": how_many, "filter": filter, "offset": offset}
         return self._request("Departed", data)
 
+    def iter_departed(self, airport, filter=TrafficFilter.ALL, page_size=None, prefetch=False, models=None, timeout=None):
+        """
+        Iterate over every Departed record for the airport, paging through the results as they are consumed.
+        With prefetch the next page is fetched while the current one is being consumed. models overrides the
+        client's models setting for this call.
+        timeout overrides the client's timeout for each page.
+        """
+        data = {"airport": airport, "filter": filter}
+        return self._paginate("Departed", data, page_size, prefetch, models=models, timeout=timeout)
+
     def enroute(self, airport, how_many=MAX_RECORD_LENGTH, filter=TrafficFilter.ALL, offset=0):
         """
         Enroute returns information about flights already in the air for the
@@ -287,6 +783,16 @@ class Client(object):
         data = {"airport": airport, "howMany": how_many, "filter": filter, "offset": offset}
         return self._request("Enroute", data)
 
+    def iter_enroute(self, airport, filter=TrafficFilter.ALL, page_size=None, prefetch=False, models=None, timeout=None):
+        """
+        Iterate over every Enroute record for the airport, paging through the results as they are consumed.
+        With prefetch the next page is fetched while the current one is being consumed. models overrides the
+        client's models setting for this call.
+        timeout overrides the client's timeout for each page.
+        """
+        data = {"airport": airport, "filter": filter}
+        return self._paginate("Enroute", data, page_size, prefetch, models=models, timeout=timeout)
+
     def fleet_arrived(self):
         raise NotImplementedError
 
@@ -346,17 +852,31 @@ class Client(object):
         return self._request("GetFlightID", data)
 
 
-    def get_historical_track(self):
-        raise NotImplementedError
+    def get_historical_track(self, fa_flight_id, compact=False):
+        """
+        GetHistoricalTrack looks up a past flight's track log by its unique identifier. To obtain the faFlightID, you
+        can use a function such as GetFlightID, FlightInfoEx, or InFlightInfo. It returns an array of positions, with
+        each including the timestamp, longitude, latitude, groundspeed, altitude, altitudestatus, updatetype, and
+        altitudechange. Altitude is in hundreds of feet or Flight Level where appropriate. Timestamp is integer seconds
+        since 1970 (UNIX epoch time).
+
+        With compact the positions are returned as a columnar flightaware.track.Track instead of a list of dicts.
 
-    def get_last_track(self, ident):
+        faFlightID	string	unique identifier assigned by FlightAware for the desired flight (or use "ident@departureTime")
+        """
+        data = {"faFlightID": fa_flight_id}
+        return self._request("GetHistoricalTrack", data, _as_track if compact else None)
+
+    def get_last_track(self, ident, compact=False):
         """
         GetLastTrack looks up a flight's track log by specific tail number (e.g., N12345) or ICAO airline and flight number (e.g., SWA2558). It returns the track log from the current IFR flight or, if the aircraft is not airborne, the most recent IFR flight. It returns an array of positions, with each including the timestamp, longitude, latitude, groundspeed, altitude, altitudestatus, updatetype, and altitudechange. Altitude is in hundreds of feet or Flight Level where appropriate, see our FAQ about flight levels. Also included altitude status, update type, and altitude change.
         Altitude status is 'C' when the flight is more than 200 feet away from its ATC-assigned altitude. (For example, the aircraft is transitioning to its assigned altitude.) Altitude change is 'C' if the aircraft is climbing (compared to the previous position reported), 'D' for descending, and empty if it is level. This happens for VFR flights with flight following, among other things. Timestamp is integer seconds since 1970 (UNIX epoch time).
         This function only returns tracks for recent flights within approximately the last 24 hours. Use the GetHistoricalTrack function to look up a specific past flight rather than just the most recent one. Codeshares and alternate idents are automatically searched.
+
+        With compact the positions are returned as a columnar flightaware.track.Track instead of a list of dicts.
         """
         data = {"ident": ident}
-        return self._request("GetLastTrack", data)
+        return self._request("GetLastTrack", data, _as_track if compact else None)
 
     def inbound_flight_info(self):
         raise NotImplementedError
@@ -368,11 +888,45 @@ class Client(object):
         data = {"ident": ident}
         return self._request("InFlightInfo", data)
 
-    def lat_lng_to_distance(self):
-        raise NotImplementedError
+    def lat_lng_to_distance(self, lat1, lon1, lat2, lon2, remote=False):
+        """
+        LatLongsToDistance returns the shortest distance, in integer statute miles, between two points given by their
+        latitudes and longitudes in decimal degrees.
 
-    def lat_lng_to_heading(self):
-        raise NotImplementedError
+        The distance is computed locally unless remote is set, in which case the billed FlightXML call is made (useful
+        to verify the local result). Locally, any of the arguments may be a sequence or NumPy array, and a list (or
+        array) of distances is returned, one per pair of points.
+
+        lat1	float	latitude of first point
+        lon1	float	longitude of first point
+        lat2	float	latitude of second point
+        lon2	float	longitude of second point
+        """
+        if remote:
+            data = {"lat1": lat1, "lon1": lon1, "lat2": lat2, "lon2": lon2}
+            return self._request("LatLongsToDistance", data)
+        if geo.is_vector(lat1, lon1, lat2, lon2):
+            return geo.rounded(geo.distances(lat1, lon1, lat2, lon2))
+        return geo.rounded(geo.distance(lat1, lon1, lat2, lon2))
+
+    def lat_lng_to_heading(self, lat1, lon1, lat2, lon2, remote=False):
+        """
+        LatLongsToHeading returns the initial heading, in integer degrees clockwise from true north, for the shortest
+        route from the first point to the second, given by their latitudes and longitudes in decimal degrees.
+
+        Computed locally unless remote is set; see lat_lng_to_distance.
+
+        lat1	float	latitude of first point
+        lon1	float	longitude of first point
+        lat2	float	latitude of second point
+        lon2	float	longitude of second point
+        """
+        if remote:
+            data = {"lat1": lat1, "lon1": lon1, "lat2": lat2, "lon2": lon2}
+            return self._request("LatLongsToHeading", data)
+        if geo.is_vector(lat1, lon1, lat2, lon2):
+            return geo.rounded(geo.headings(lat1, lon1, lat2, lon2), 360)
+        return geo.rounded(geo.heading(lat1, lon1, lat2, lon2), 360)
 
     def map_flight(self):
         raise NotImplementedError
@@ -458,6 +1012,16 @@ class Client(object):
         data = {"airport": airport, "howMany": how_many, "filter": filter, "offset": offset}
         return self._request("Scheduled", data)
 
+    def iter_scheduled(self, airport, filter=TrafficFilter.ALL, page_size=None, prefetch=False, models=None, timeout=None):
+        """
+        Iterate over every Scheduled record for the airport, paging through the results as they are consumed.
+        With prefetch the next page is fetched while the current one is being consumed. models overrides the
+        client's models setting for this call.
+        timeout overrides the client's timeout for each page.
+        """
+        data = {"airport": airport, "filter": filter}
+        return self._paginate("Scheduled", data, page_size, prefetch, models=models, timeout=timeout)
+
     def search(self, parameters={}, how_many=MAX_RECORD_LENGTH, offset=0):
         """
         Search performs a query for data on all airborne aircraft to find ones
@@ -500,7 +1064,8 @@ class Client(object):
         To search for all United Airlines flights in Boeing 737s
 
         -idents UAL* -type B73*
-        See the SearchBirdseyeInFlight function for additional functionality.
+        See the SearchBirdseyeInFlight function for additional functionality, and
+        flightaware.snapshot.PositionSnapshot to evaluate many queries locally against one fetch.
 
 
         query   string  search expression
@@ -512,23 +1077,98 @@ class Client(object):
         offset  int must be an integer value of the offset row count you want
         the search to start at. Most requests should be 0.
         """
-        query = ""
-        for key, value in parameters.items():
-            query += "-%s %s " % (key, value)
-        data = {"query": query, "howMany": how_many, "offset": offset}
+        data = {"query": search_query(parameters), "howMany": how_many, "offset": offset}
         return self._request("Search", data)
 
-    def search_birdseye_in_flight(self):
-        raise NotImplementedError
+    def iter_search(self, parameters={}, page_size=None, prefetch=False, models=None, timeout=None):
+        """
+        Iterate over every aircraft matching a Search query, paging through the results as they are consumed.
+        With prefetch the next page is fetched while the current one is being consumed. models overrides the
+        client's models setting for this call.
+        timeout overrides the client's timeout for each page.
+        """
+        data = {"query": search_query(parameters)}
+        return self._paginate("Search", data, page_size, prefetch, models=models, timeout=timeout)
 
-    def search_birdseye_positions(self):
-        raise NotImplementedError
+    def search_birdseye_in_flight(self, query, how_many=MAX_RECORD_LENGTH, offset=0):
+        """
+        SearchBirdseyeInFlight performs a query for aircraft currently airborne using a more advanced syntax than
+        Search. The query is a Tcl-style list of {operator key value} clauses that must all match, for example:
 
-    def search_count(self):
-        raise NotImplementedError
+        {< alt 8000} {> gs 350}
+        {match aircraftType B77*}
+        {range lat 36.8 38.4} {range lon -123.0 -121.0}
 
-    def set_maximum_result_sizes(self):
-        raise NotImplementedError
+        Operators include = != < > <= >= range in orig_or_dest airline aircraftType match notmatch; see the
+        FlightXML documentation for the full list. To evaluate many overlapping queries against one fetch, see
+        flightaware.snapshot.PositionSnapshot.
+
+        query	string	search expression
+        howMany	int	maximum number of flights to obtain. Must be a positive integer value less than or equal to 15, unless SetMaximumResultSize has been called.
+        offset	int	must be an integer value of the offset row count you want the search to start at. Most requests should be 0.
+        """
+        data = {"query": query, "howMany": how_many, "offset": offset}
+        return self._request("SearchBirdseyeInFlight", data)
+
+    def iter_search_birdseye_in_flight(self, query, page_size=None, prefetch=False, models=None, timeout=None):
+        """
+        Iterate over every aircraft matching a SearchBirdseyeInFlight query, paging through the results as they are
+        consumed. With prefetch the next page is fetched while the current one is being consumed. models overrides
+        the client's models setting for this call.
+        timeout overrides the client's timeout for each page.
+        """
+        data = {"query": query}
+        return self._paginate("SearchBirdseyeInFlight", data, page_size, prefetch, models=models, timeout=timeout)
+
+    def search_birdseye_positions(self, query, unique_flights=False, how_many=MAX_RECORD_LENGTH, offset=0):
+        """
+        SearchBirdseyePositions performs a query for flight positions, with the same query syntax as
+        SearchBirdseyeInFlight but matched against individual positions reported within the last 24 hours.
+
+        query	string	search expression
+        uniqueFlights	boolean	if true, only return the most recent position for each of the matching flights
+        howMany	int	maximum number of positions to obtain. Must be a positive integer value less than or equal to 15, unless SetMaximumResultSize has been called.
+        offset	int	must be an integer value of the offset row count you want the search to start at. Most requests should be 0.
+        """
+        data = {"query": query, "uniqueFlights": unique_flights, "howMany": how_many, "offset": offset}
+        return self._request("SearchBirdseyePositions", data)
+
+    def iter_search_birdseye_positions(self, query, unique_flights=False, page_size=None, prefetch=False, timeout=None):
+        """
+        Iterate over every position matching a SearchBirdseyePositions query, paging through the results as they are
+        consumed. With prefetch the next page is fetched while the current one is being consumed.
+        timeout overrides the client's timeout for each page.
+        """
+        data = {"query": query, "uniqueFlights": unique_flights}
+        return self._paginate("SearchBirdseyePositions", data, page_size, prefetch, timeout=timeout)
+
+    def search_count(self, parameters={}):
+        """
+        SearchCount works like Search but returns only the number of aircraft matching the query. It takes the same
+        -key value parameters as search.
+
+        query	string	search expression
+        """
+        data = {"query": search_query(parameters)}
+        return self._request("SearchCount", data)
+
+    def set_maximum_result_sizes(self, max_size):
+        """
+        SetMaximumResultSize is used to change the maximum number of records that the howMany argument of other
+        functions accepts. Setting a larger maximum lets more records be returned per call, although each call is
+        still billed per 15 records returned.
+
+        On success the client remembers max_size and the iter_* methods page with it unless told otherwise.
+
+        max_size	int	maximum size of results to return
+        """
+        def remember(result):
+            if not (isinstance(result, dict) and "error" in result):
+                self.max_result_size = max_size
+            return result
+
+        data = {"max_size": max_size}
+        return self._request("SetMaximumResultSize", data, remember)
 
     def tail_owner(self, ident):
         """
@@ -593,7 +1233,7 @@ class Client(object):
             return self._request("DeleteAlert", data)
 
     def set_alert(self, alert_id=0, ident=None, origin=None, destination=None,
-        aircrafttype=None, date_start=None, date_end=None, channels=[],
+        aircrafttype=None, date_start=None, date_end=None, channels=None,
         enabled=True, max_weekly=1000):
         """
         SetAlert creates or updates a FlightXML flight alert. When the alert is
@@ -664,30 +1304,28 @@ class Client(object):
         Type    Description
         int returns non-zero on success
         """
-        data = {
-            "alert_id": alert_id,
-            "enabled": enabled,
-            "max_weekly": max_weekly
-        }
-        if ident is not None:
-            data["ident"] = ident
-        if origin is not None:
-            data["origin"] = origin
-        if destination is not None:
-            data["destination"] = destination
-        if aircrafttype is not None:
-            data["aircrafttype"] = aircrafttype
-        if date_start is not None:
-            data["date_start"] = date_start
-        if date_end is not None:
-            data["date_end"] = date_end
-        if len(channels) > 0:
-            data["channels"] = channels
-        if enabled is not None:
-            data["enabled"] = enabled
-
+        data = alert_data(alert_id, ident, origin, destination, aircrafttype, date_start, date_end, channels, enabled,
+                          max_weekly)
         return self._request("SetAlert", data)
 
+    def sync_alerts(self, desired, delete_extra=True, max_workers=DEFAULT_BATCH_WORKERS):
+        """
+        Make the account's alerts match desired, a list of dicts of set_alert arguments (without alert_id):
+
+            client.sync_alerts([{"ident": "SWA1", "channels": "{16 e_departure e_arrival}"}, ...])
+
+        The current alerts are fetched with a single GetAlerts call and compared with desired (see
+        alerts.plan_alerts); only the alerts to create, change or delete are then sent, max_workers at a time and
+        subject to the client's rate limiter, deletes first. Alerts not in desired are deleted unless delete_extra is False.
+        Returns an AlertSync; calls that failed are reported in its failed list rather than raised. When GetAlerts
+        fails, FlightAwareError is raised before anything is changed.
+        """
+        plan = plan_alerts(self.get_alerts(), desired, delete_extra)
+        sets, deletes = plan_calls(plan)
+        # Deletes go first so that they free up the account's alert quota for the creates
+        deleted = self.batch("DeleteAlert", deletes, max_workers)
+        return summarize(plan, self.batch("SetAlert", sets, max_workers), deleted)
+
     def register_alert_endpoint(self, address, format_type="json/post"):
         """
         RegisterAlertEndpoint specifies where pushed FlightXML flight alerts.
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Collapses identical concurrent calls from several threads into one: the first caller for a key runs the
+    function, and callers arriving while it is running wait and receive the same result (or exception).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+class AsyncSingleFlight(object):
+    """
+    asyncio counterpart of SingleFlight. Cancelling one waiter does not cancel the shared call for the others.
+    """
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, coroutine_function):
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(coroutine_function())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._calls.pop(key, None))
+        return await asyncio.shield(future)
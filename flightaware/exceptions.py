@@ -0,0 +1,4 @@
+class FlightAwareError(Exception):
+    """
+    Raised when FlightXML answers with an error record where records were expected.
+    """
@@ -0,0 +1,275 @@
+import csv
+import datetime
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from flightaware.timestamps import from_unix_timestamp, to_unix_timestamp
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Column types; timestamps are UNIX times in the records and UTC timestamps in the output
+STRING, INT, FLOAT, TIMESTAMP = "string", "int64", "float64", "timestamp"
+
+BOARD_SCHEMA = (
+    ("faFlightID", STRING),
+    ("ident", STRING),
+    ("aircrafttype", STRING),
+    ("origin", STRING),
+    ("destination", STRING),
+    ("originName", STRING),
+    ("originCity", STRING),
+    ("destinationName", STRING),
+    ("destinationCity", STRING),
+    ("filed_departuretime", TIMESTAMP),
+    ("actualdeparturetime", TIMESTAMP),
+    ("estimatedarrivaltime", TIMESTAMP),
+    ("actualarrivaltime", TIMESTAMP),
+)
+
+SEARCH_SCHEMA = (
+    ("faFlightID", STRING),
+    ("ident", STRING),
+    ("prefix", STRING),
+    ("type", STRING),
+    ("suffix", STRING),
+    ("origin", STRING),
+    ("destination", STRING),
+    ("timeout", STRING),
+    ("timestamp", TIMESTAMP),
+    ("departureTime", TIMESTAMP),
+    ("firstPositionTime", TIMESTAMP),
+    ("arrivalTime", TIMESTAMP),
+    ("latitude", FLOAT),
+    ("longitude", FLOAT),
+    ("groundspeed", INT),
+    ("altitude", INT),
+    ("heading", INT),
+    ("altitudeStatus", STRING),
+    ("updateType", STRING),
+    ("altitudeChange", STRING),
+    ("waypoints", STRING),
+)
+
+POSITION_SCHEMA = (
+    ("faFlightID", STRING),
+    ("timestamp", TIMESTAMP),
+    ("latitude", FLOAT),
+    ("longitude", FLOAT),
+    ("groundspeed", INT),
+    ("altitude", INT),
+    ("altitudeStatus", STRING),
+    ("updateType", STRING),
+    ("altitudeChange", STRING),
+)
+
+SCHEDULE_SCHEMA = (
+    ("ident", STRING),
+    ("actual_ident", STRING),
+    ("departuretime", TIMESTAMP),
+    ("arrivaltime", TIMESTAMP),
+    ("origin", STRING),
+    ("destination", STRING),
+    ("aircrafttype", STRING),
+    ("meal_service", STRING),
+    ("seats_cabin_first", INT),
+    ("seats_cabin_business", INT),
+    ("seats_cabin_coach", INT),
+)
+
+# Fixed output schema of each listing method: (column, type) pairs named after the record fields
+SCHEMAS = {
+    "AirlineFlightSchedules": SCHEDULE_SCHEMA,
+    "Arrived": BOARD_SCHEMA,
+    "Departed": BOARD_SCHEMA,
+    "Enroute": BOARD_SCHEMA,
+    "Scheduled": BOARD_SCHEMA,
+    "Search": SEARCH_SCHEMA,
+    "SearchBirdseyeInFlight": SEARCH_SCHEMA,
+    "SearchBirdseyePositions": POSITION_SCHEMA,
+}
+
+
+def _string(value):
+    return None if value is None else str(value)
+
+
+def _int(value):
+    return None if value is None or value == "" else int(value)
+
+
+def _float(value):
+    return None if value is None or value == "" else float(value)
+
+
+def _timestamp(value):
+    # FlightXML uses 0 for times that are not known (yet); models hold datetimes
+    if isinstance(value, datetime.datetime):
+        return to_unix_timestamp(value)
+    return (int(value) or None) if value not in (None, "") else None
+
+
+CONVERTERS = {STRING: _string, INT: _int, FLOAT: _float, TIMESTAMP: _timestamp}
+
+
+def column_batches(records, schema, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield the records (dicts, e.g. from Client.iter_enroute, or flightaware.models instances, which are read by
+    FlightXML key) batch_size at a time as {column: list of values}, converted to the schema's types. Only one
+    batch is held in memory.
+    """
+    columns = [(name, CONVERTERS[kind]) for name, kind in schema]
+    batch = dict((name, []) for name, _ in columns)
+    size = 0
+    for record in records:
+        for name, convert in columns:
+            batch[name].append(convert(record.get(name)))
+        size += 1
+        if size == batch_size:
+            yield batch
+            batch = dict((name, []) for name, _ in columns)
+            size = 0
+    if size:
+        yield batch
+
+
+def arrow_schema(schema):
+    """
+    pyarrow.Schema for a schema of SCHEMAS. Requires pyarrow.
+    """
+    if pyarrow is None:
+        raise ImportError("arrow_schema requires pyarrow")
+    types = {
+        STRING: pyarrow.string(),
+        INT: pyarrow.int64(),
+        FLOAT: pyarrow.float64(),
+        TIMESTAMP: pyarrow.timestamp("s", tz="UTC"),
+    }
+    return pyarrow.schema([pyarrow.field(name, types[kind]) for name, kind in schema])
+
+
+def _arrow_batch(batch, target):
+    arrays = [pyarrow.array(batch[field.name], type=field.type) for field in target]
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=target)
+
+
+def record_batches(records, method, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield pyarrow.RecordBatch objects of the records of a listing method, in that method's fixed schema. Requires
+    pyarrow.
+    """
+    schema = SCHEMAS[method]
+    target = arrow_schema(schema)
+    for batch in column_batches(records, schema, batch_size):
+        yield _arrow_batch(batch, target)
+
+
+class CSVWriter(object):
+    """
+    Writes column batches as CSV with a header row; timestamps as ISO 8601 UTC and missing values as empty fields.
+    """
+    def __init__(self, path, schema):
+        self.schema = schema
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in schema])
+
+    def write(self, batch):
+        columns = []
+        for name, kind in self.schema:
+            column = batch[name]
+            if kind == TIMESTAMP:
+                column = [from_unix_timestamp(value).strftime("%Y-%m-%dT%H:%M:%SZ") if value else None
+                          for value in column]
+            columns.append(column)
+        self._writer.writerows(zip(*columns))
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter(object):
+    """
+    Writes column batches to a Parquet file, one row group per batch. Requires pyarrow.
+    """
+    def __init__(self, path, schema, compression="snappy"):
+        if pyarrow is None:
+            raise ImportError("ParquetWriter requires pyarrow")
+        self.arrow_schema = arrow_schema(schema)
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.arrow_schema, compression=compression)
+
+    def write(self, batch):
+        self._writer.write_table(pyarrow.Table.from_batches([_arrow_batch(batch, self.arrow_schema)]))
+
+    def close(self):
+        self._writer.close()
+
+
+class ArrowWriter(object):
+    """
+    Writes column batches to an Arrow IPC (Feather v2) file. Requires pyarrow.
+    """
+    def __init__(self, path, schema):
+        if pyarrow is None:
+            raise ImportError("ArrowWriter requires pyarrow")
+        self.arrow_schema = arrow_schema(schema)
+        self._sink = pyarrow.OSFile(path, "wb")
+        self._writer = pyarrow.ipc.new_file(self._sink, self.arrow_schema)
+
+    def write(self, batch):
+        self._writer.write_batch(_arrow_batch(batch, self.arrow_schema))
+
+    def close(self):
+        self._writer.close()
+        self._sink.close()
+
+
+WRITERS = {
+    "csv": CSVWriter,
+    "parquet": ParquetWriter,
+    "arrow": ArrowWriter,
+}
+
+EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+
+def export(records, path, method, format=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream the records of a listing method into a file in that method's fixed schema, batch_size records at a time,
+    and return the number of rows written:
+
+        export(client.iter_arrived("KBNA", page_size=100), "arrivals.parquet", "Arrived")
+
+    format is "parquet", "arrow" or "csv", and is otherwise taken from the file extension. Parquet and Arrow output
+    require pyarrow; without it they raise ImportError before anything is written.
+    """
+    if method not in SCHEMAS:
+        raise ValueError("no export schema for {}".format(method))
+    if format is None:
+        extension = path[path.rfind("."):].lower() if "." in path else ""
+        format = EXTENSIONS.get(extension, "csv")
+    if format not in WRITERS:
+        raise ValueError("unknown export format {!r}".format(format))
+    if format != "csv" and pyarrow is None:
+        raise ImportError("{} export requires pyarrow".format(format))
+
+    schema = SCHEMAS[method]
+    writer = WRITERS[format](path, schema)
+    rows = 0
+    try:
+        for batch in column_batches(records, schema, batch_size):
+            writer.write(batch)
+            rows += len(batch[schema[0][0]])
+    finally:
+        writer.close()
+    return rows
@@ -0,0 +1,89 @@
+import math
+import numbers
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EARTH_RADIUS_MILES = 3958.7613                  # mean radius, statute miles as used by FlightXML
+
+
+# distance and heading work on one pair of points. distances and headings take sequences (or NumPy arrays) of
+# coordinates, with scalars broadcast against them, and use NumPy when it is installed.
+
+def distance(lat1, lon1, lat2, lon2):
+    """
+    Haversine distance in statute miles between two points given in decimal degrees.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def heading(lat1, lon1, lat2, lon2):
+    """
+    Initial great-circle bearing from the first point to the second, in degrees clockwise from true north [0, 360).
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta = math.radians(lon2 - lon1)
+    x = math.sin(delta) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(delta)
+    return math.degrees(math.atan2(x, y)) % 360
+
+
+def _is_scalar(value):
+    # numbers.Real takes in NumPy's scalar types (numpy.int64, numpy.float32, ...); a 0-d array is a scalar too
+    return isinstance(value, numbers.Real) or getattr(value, "ndim", None) == 0
+
+
+def is_vector(*values):
+    return any(not _is_scalar(value) for value in values)
+
+
+def _broadcast(values):
+    length = max(len(value) for value in values if not _is_scalar(value))
+    return [[value] * length if _is_scalar(value) else value for value in values]
+
+
+def distances(lat1, lon1, lat2, lon2):
+    """
+    distance over sequences of coordinates. Returns a NumPy array when NumPy is installed, otherwise a list.
+    """
+    if numpy is not None:
+        phi1 = numpy.radians(numpy.asarray(lat1, dtype=float))
+        phi2 = numpy.radians(numpy.asarray(lat2, dtype=float))
+        half_lon = numpy.radians(numpy.asarray(lon2, dtype=float) - numpy.asarray(lon1, dtype=float)) / 2
+        a = numpy.sin((phi2 - phi1) / 2) ** 2 + numpy.cos(phi1) * numpy.cos(phi2) * numpy.sin(half_lon) ** 2
+        return 2 * EARTH_RADIUS_MILES * numpy.arcsin(numpy.sqrt(numpy.clip(a, 0.0, 1.0)))
+    return list(map(distance, *_broadcast([lat1, lon1, lat2, lon2])))
+
+
+def headings(lat1, lon1, lat2, lon2):
+    """
+    heading over sequences of coordinates. Returns a NumPy array when NumPy is installed, otherwise a list.
+    """
+    if numpy is not None:
+        phi1 = numpy.radians(numpy.asarray(lat1, dtype=float))
+        phi2 = numpy.radians(numpy.asarray(lat2, dtype=float))
+        delta = numpy.radians(numpy.asarray(lon2, dtype=float) - numpy.asarray(lon1, dtype=float))
+        x = numpy.sin(delta) * numpy.cos(phi2)
+        y = numpy.cos(phi1) * numpy.sin(phi2) - numpy.sin(phi1) * numpy.cos(phi2) * numpy.cos(delta)
+        return numpy.degrees(numpy.arctan2(x, y)) % 360
+    return list(map(heading, *_broadcast([lat1, lon1, lat2, lon2])))
+
+
+def rounded(values, modulo=None):
+    """
+    Round a scalar or a vector of results to whole numbers, as FlightXML reports them, optionally wrapping them
+    at modulo (360 for headings).
+    """
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        values = numpy.rint(values).astype(int)
+        return values % modulo if modulo else values
+    if isinstance(values, list):
+        return [rounded(value, modulo) for value in values]
+    value = int(round(values))
+    return value % modulo if modulo else value
@@ -0,0 +1,208 @@
+import threading
+from collections import deque
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Instrumentation(object):
+    """
+    Hooks Client and AsyncClient call as they work. Subclass and override the on_* methods, or pass callables for
+    them to the constructor:
+
+        client = Client(username, api_key, instrumentation=Instrumentation(on_error=report_error))
+
+    on_request(method)                                          an attempt is about to be sent
+    on_response(method, latency, status, size, decode_time)     an attempt answered; size in bytes, times in seconds
+    on_error(method, error, latency)                            an attempt failed or got a retryable status
+    on_retry(method, attempt, error, delay)                     a retry will be sent after delay seconds
+    on_hedge(method)                                            a duplicate request was sent for a slow call
+    on_cache(method, hit)                                       a cacheable call was looked up in the cache
+    """
+    HOOKS = ("on_request", "on_response", "on_error", "on_retry", "on_hedge", "on_cache")
+
+    def __init__(self, **callbacks):
+        for name in callbacks:
+            if name not in self.HOOKS:
+                raise TypeError("unknown hook {!r}".format(name))
+        self.callbacks = callbacks
+
+    def _call(self, name, *args):
+        callback = self.callbacks.get(name)
+        if callback is not None:
+            callback(*args)
+
+    def on_request(self, method):
+        self._call("on_request", method)
+
+    def on_response(self, method, latency, status, size, decode_time):
+        self._call("on_response", method, latency, status, size, decode_time)
+
+    def on_error(self, method, error, latency):
+        self._call("on_error", method, error, latency)
+
+    def on_retry(self, method, attempt, error, delay):
+        self._call("on_retry", method, attempt, error, delay)
+
+    def on_hedge(self, method):
+        self._call("on_hedge", method)
+
+    def on_cache(self, method, hit):
+        self._call("on_cache", method, hit)
+
+
+def _percentiles(samples, percentiles):
+    # {percentile: value} over sorted samples, or {} when there are none
+    if not samples:
+        return {}
+    return dict((p, samples[min(len(samples) - 1, int(len(samples) * p / 100.0))]) for p in percentiles)
+
+
+class MethodStats(object):
+    def __init__(self, window):
+        self.requests = 0
+        self.responses = 0
+        self.errors = 0
+        self.retries = 0
+        self.hedges = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bytes_received = 0
+        self.decode_seconds = 0.0
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.recent = deque(maxlen=window)
+
+
+class MetricsCollector(Instrumentation):
+    """
+    Instrumentation keeping per-method counters and latency distributions in memory:
+
+        metrics = MetricsCollector()
+        client = Client(username, api_key, instrumentation=metrics)
+        ...
+        metrics.percentiles("Enroute")          # {50: 0.21, 95: 0.48, 99: 1.3}
+        metrics.to_prometheus()                 # text exposition format
+
+    Percentiles are exact over the last window responses of each method; the exported histogram covers all of them.
+    """
+    def __init__(self, window=1000, prefix="flightaware", **callbacks):
+        super(MetricsCollector, self).__init__(**callbacks)
+        self.window = window
+        self.prefix = prefix
+        self.methods = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, method):
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = MethodStats(self.window)
+        return stats
+
+    def on_request(self, method):
+        with self._lock:
+            self._stats(method).requests += 1
+        super(MetricsCollector, self).on_request(method)
+
+    def on_response(self, method, latency, status, size, decode_time):
+        with self._lock:
+            stats = self._stats(method)
+            stats.responses += 1
+            stats.bytes_received += size
+            stats.decode_seconds += decode_time
+            stats.latency_sum += latency
+            stats.recent.append(latency)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    stats.buckets[index] += 1
+        super(MetricsCollector, self).on_response(method, latency, status, size, decode_time)
+
+    def on_error(self, method, error, latency):
+        with self._lock:
+            self._stats(method).errors += 1
+        super(MetricsCollector, self).on_error(method, error, latency)
+
+    def on_retry(self, method, attempt, error, delay):
+        with self._lock:
+            self._stats(method).retries += 1
+        super(MetricsCollector, self).on_retry(method, attempt, error, delay)
+
+    def on_hedge(self, method):
+        with self._lock:
+            self._stats(method).hedges += 1
+        super(MetricsCollector, self).on_hedge(method)
+
+    def on_cache(self, method, hit):
+        with self._lock:
+            stats = self._stats(method)
+            if hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+        super(MetricsCollector, self).on_cache(method, hit)
+
+    def percentiles(self, method, percentiles=(50, 95, 99)):
+        """
+        {percentile: latency in seconds} over the method's recent responses, or {} when there are none.
+        """
+        with self._lock:
+            stats = self.methods.get(method)
+            samples = sorted(stats.recent) if stats is not None else []
+        return _percentiles(samples, percentiles)
+
+    def snapshot(self):
+        """
+        Plain dict of every method's counters and latency percentiles.
+        """
+        # Copy everything under the lock so that each method's counters are consistent with each other
+        with self._lock:
+            copies = [(method, {
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "retries": stats.retries,
+                "hedges": stats.hedges,
+                "cache_hits": stats.cache_hits,
+                "cache_misses": stats.cache_misses,
+                "bytes_received": stats.bytes_received,
+                "decode_seconds": stats.decode_seconds,
+            }, sorted(stats.recent)) for method, stats in self.methods.items()]
+        result = {}
+        for method, counters, samples in copies:
+            counters["latency"] = _percentiles(samples, (50, 95, 99))
+            result[method] = counters
+        return result
+
+    def to_prometheus(self):
+        """
+        All metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        counters = (
+            ("requests_total", "FlightXML requests sent", "requests"),
+            ("errors_total", "FlightXML requests that failed", "errors"),
+            ("retries_total", "FlightXML requests retried", "retries"),
+            ("hedges_total", "Duplicate FlightXML requests sent for slow calls", "hedges"),
+            ("cache_hits_total", "Calls answered from the response cache", "cache_hits"),
+            ("cache_misses_total", "Cacheable calls not found in the response cache", "cache_misses"),
+            ("response_bytes_total", "Bytes of FlightXML responses received", "bytes_received"),
+            ("decode_seconds_total", "Seconds spent decoding FlightXML responses", "decode_seconds"),
+        )
+        with self._lock:
+            methods = sorted(self.methods.items())
+            lines = []
+            for name, description, attribute in counters:
+                metric = "{}_{}".format(self.prefix, name)
+                lines.append("# HELP {} {}".format(metric, description))
+                lines.append("# TYPE {} counter".format(metric))
+                for method, stats in methods:
+                    lines.append('{}{{method="{}"}} {}'.format(metric, method, getattr(stats, attribute)))
+
+            metric = "{}_request_duration_seconds".format(self.prefix)
+            lines.append("# HELP {} Latency of FlightXML requests".format(metric))
+            lines.append("# TYPE {} histogram".format(metric))
+            for method, stats in methods:
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    lines.append('{}_bucket{{method="{}",le="{}"}} {}'.format(metric, method, bound, count))
+                lines.append('{}_bucket{{method="{}",le="+Inf"}} {}'.format(metric, method, stats.responses))
+                lines.append('{}_sum{{method="{}"}} {}'.format(metric, method, stats.latency_sum))
+                lines.append('{}_count{{method="{}"}} {}'.format(metric, method, stats.responses))
+        return "\n".join(lines) + "\n"
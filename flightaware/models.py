@@ -0,0 +1,233 @@
+from flightaware.timestamps import from_unix_timestamp
+from flightaware.track import TrackPoint
+
+# TrackPoint is the namedtuple Track yields; it is listed here so that every result class can be imported from one
+# place. Track logs themselves are best fetched with compact=True.
+__all__ = ["Model", "Flight", "Airport", "Airline", "Metar", "Schedule", "TrackPoint", "METHOD_MODELS", "to_models"]
+
+
+def _time(value):
+    # FlightXML uses 0 for times that are not known (yet)
+    value = int(value)
+    return from_unix_timestamp(value) if value else None
+
+
+class _Field(object):
+    """
+    Attribute of a Model: holds the raw value taken from the record until first read, then the converted one.
+    """
+    __slots__ = ("name", "keys", "convert", "bit", "slot")
+
+    def __init__(self, name, keys, convert=None):
+        self.name = name
+        self.keys = keys
+        self.convert = convert
+        self.bit = 0
+        self.slot = None
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self.slot.__get__(instance, owner)
+        if self.convert is None or instance._converted & self.bit:
+            return value
+        if value is not None:
+            try:
+                value = self.convert(value)
+            except (TypeError, ValueError):
+                value = None
+            self.slot.__set__(instance, value)
+        instance._converted |= self.bit
+        return value
+
+
+class Model(object):
+    """
+    Base of the result classes. Instances have one slot per field and no __dict__, which makes them several times
+    smaller than the decoded dicts they are built from; numbers and timestamps are converted when first read.
+    Fields missing from the record read as None. to_dict() gives the converted fields as a plain dict, and get()
+    looks a field up by attribute name or FlightXML key, so code written for the dicts can read models too.
+    """
+    __slots__ = ("_converted",)
+    FIELDS = ()
+    KEYS = {}
+
+    @classmethod
+    def from_record(cls, record):
+        instance = cls.__new__(cls)
+        for field in cls.FIELDS:
+            value = None
+            for key in field.keys:
+                value = record.get(key)
+                if value is not None:
+                    break
+            field.slot.__set__(instance, value)
+        instance._converted = 0
+        return instance
+
+    @classmethod
+    def from_records(cls, records):
+        return [cls.from_record(record) for record in records]
+
+    def to_dict(self):
+        return dict((field.name, getattr(self, field.name)) for field in self.FIELDS)
+
+    def get(self, key, default=None):
+        field = self.KEYS.get(key)
+        value = None if field is None else field.__get__(self, type(self))
+        return default if value is None else value
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join("{}={!r}".format(field.name, getattr(self, field.name)) for field in self.FIELDS[:3])
+        return "{}({}, ...)".format(type(self).__name__, fields)
+
+
+def _model(name, doc, fields):
+    # fields: (attribute, FlightXML key or tuple of alternative keys, converter or None)
+    fields = [_Field(attribute, keys if isinstance(keys, tuple) else (keys,), convert)
+              for attribute, keys, convert in fields]
+    cls = type(name, (Model,), {
+        "__slots__": tuple("_" + field.name for field in fields),
+        "__doc__": doc,
+        "__module__": __name__,
+    })
+    for bit, field in enumerate(fields):
+        field.bit = 1 << bit
+        field.slot = cls.__dict__["_" + field.name]
+        setattr(cls, field.name, field)
+    cls.FIELDS = tuple(fields)
+    cls.KEYS = dict((key, field) for field in fields for key in field.keys + (field.name,))
+    return cls
+
+
+Flight = _model("Flight", """
+    A flight from Arrived, Departed, Enroute, Scheduled, Search, SearchBirdseyeInFlight or InFlightInfo. Each
+    method fills in a different subset of the fields; times are UTC datetimes.
+    """, [
+    ("fa_flight_id", "faFlightID", None),
+    ("ident", "ident", None),
+    ("aircraft_type", ("aircrafttype", "type"), None),
+    ("origin", "origin", None),
+    ("destination", "destination", None),
+    ("origin_name", "originName", None),
+    ("origin_city", "originCity", None),
+    ("destination_name", "destinationName", None),
+    ("destination_city", "destinationCity", None),
+    ("filed_departure_time", "filed_departuretime", _time),
+    ("departure_time", ("actualdeparturetime", "departureTime"), _time),
+    ("estimated_arrival_time", "estimatedarrivaltime", _time),
+    ("arrival_time", ("actualarrivaltime", "arrivalTime"), _time),
+    ("timestamp", "timestamp", _time),
+    ("latitude", "latitude", float),
+    ("longitude", "longitude", float),
+    ("altitude", "altitude", int),
+    ("groundspeed", "groundspeed", int),
+    ("heading", "heading", int),
+    ("prefix", "prefix", None),
+    ("suffix", "suffix", None),
+    ("route", "route", None),
+    ("waypoints", "waypoints", None),
+])
+
+Airport = _model("Airport", """
+    An AirportInfo result. timezone is the IANA zone with FlightXML's leading colon.
+    """, [
+    ("name", "name", None),
+    ("location", "location", None),
+    ("latitude", "latitude", float),
+    ("longitude", "longitude", float),
+    ("timezone", "timezone", None),
+])
+
+Airline = _model("Airline", """
+    An AirlineInfo result.
+    """, [
+    ("name", "name", None),
+    ("shortname", "shortname", None),
+    ("callsign", "callsign", None),
+    ("location", "location", None),
+    ("country", "country", None),
+    ("url", "url", None),
+    ("phone", "phone", None),
+])
+
+Metar = _model("Metar", """
+    One parsed report from MetarEx.
+    """, [
+    ("airport", "airport", None),
+    ("time", "time", _time),
+    ("raw_data", "raw_data", None),
+    ("conditions", "conditions", None),
+    ("cloud_friendly", "cloud_friendly", None),
+    ("cloud_altitude", "cloud_altitude", int),
+    ("cloud_type", "cloud_type", None),
+    ("pressure", "pressure", float),
+    ("temp_air", "temp_air", int),
+    ("temp_dewpoint", "temp_dewpoint", int),
+    ("temp_relhum", "temp_relhum", int),
+    ("visibility", "visibility", float),
+    ("wind_friendly", "wind_friendly", None),
+    ("wind_direction", "wind_direction", int),
+    ("wind_speed", "wind_speed", int),
+    ("wind_speed_gust", "wind_speed_gust", int),
+])
+
+Schedule = _model("Schedule", """
+    One AirlineFlightSchedules row. actual_ident is the operating flight when the row is a codeshare.
+    """, [
+    ("ident", "ident", None),
+    ("actual_ident", "actual_ident", None),
+    ("departure_time", "departuretime", _time),
+    ("arrival_time", "arrivaltime", _time),
+    ("origin", "origin", None),
+    ("destination", "destination", None),
+    ("aircraft_type", "aircrafttype", None),
+    ("meal_service", "meal_service", None),
+    ("seats_cabin_first", "seats_cabin_first", int),
+    ("seats_cabin_business", "seats_cabin_business", int),
+    ("seats_cabin_coach", "seats_cabin_coach", int),
+])
+
+# Result class of each method a Client built with models=True converts
+METHOD_MODELS = {
+    "AirlineFlightSchedules": Schedule,
+    "AirlineInfo": Airline,
+    "AirportInfo": Airport,
+    "Arrived": Flight,
+    "Departed": Flight,
+    "Enroute": Flight,
+    "InFlightInfo": Flight,
+    "MetarEx": Metar,
+    "Scheduled": Flight,
+    "Search": Flight,
+    "SearchBirdseyeInFlight": Flight,
+}
+
+# Keys holding the records of the listing results
+_LIST_KEYS = ("arrivals", "departures", "enroute", "scheduled", "aircraft", "metar", "data")
+
+
+def to_models(method, result):
+    """
+    Convert an unwrapped result of method, or a list of its records, into instances of its METHOD_MODELS class.
+    Listing results keep their shape, with the records list replaced; error records are returned unchanged.
+    """
+    model = METHOD_MODELS[method]
+    if isinstance(result, list):
+        return model.from_records(result)
+    if not isinstance(result, dict) or "error" in result:
+        return result
+    for key in _LIST_KEYS:
+        if isinstance(result.get(key), list):
+            converted = dict(result)
+            converted[key] = model.from_records(result[key])
+            return converted
+    return model.from_record(result)
@@ -0,0 +1,175 @@
+import os
+import time
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger("flightaware.ratelimit")
+
+# FlightXML bills methods by query class, 1 being the most expensive. Methods not listed are class 2.
+METHOD_CLASSES = {
+    "AirlineInsight": 1,
+    "GetHistoricalTrack": 1,
+    "MapFlight": 1,
+    "MapFlightEx": 1,
+    "Search": 1,
+    "SearchBirdseyeInFlight": 1,
+    "SearchBirdseyePositions": 1,
+    "SearchCount": 1,
+    "AircraftType": 3,
+    "AirlineInfo": 3,
+    "AirportInfo": 3,
+    "AllAirlines": 3,
+    "AllAirports": 3,
+    "CountAirportOperations": 3,
+    "LatLongsToDistance": 3,
+    "LatLongsToHeading": 3,
+    "Metar": 3,
+    "NTaf": 3,
+    "Taf": 3,
+    "TailOwner": 3,
+    "ZipcodeInfo": 3,
+}
+DEFAULT_CLASS = 2
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket: refills at rate tokens per second up to capacity.
+
+    reserve() takes tokens immediately, possibly going into debt, and returns how long the caller must wait before
+    using them; acquire() does the waiting. Reserving rather than polling keeps waiters in arrival order and lets
+    asyncio callers wait with asyncio.sleep.
+    """
+    def __init__(self, rate, capacity=None, clock=time.time):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens, updated, now):
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            now = self.clock()
+            self._tokens = self._refill(self._tokens, self._updated, now) - tokens
+            self._updated = now
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens=1):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    TokenBucket whose state lives in a small file locked with flock, so every process using the same path shares
+    one budget. POSIX only.
+    """
+    def __init__(self, path, rate, capacity=None, clock=time.time):
+        if fcntl is None:
+            raise RuntimeError("FileTokenBucket requires fcntl")
+        super(FileTokenBucket, self).__init__(rate, capacity, clock)
+        self.path = path
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+                now = self.clock()
+                state = os.read(descriptor, 64).decode("ascii").split()
+                if len(state) == 2:
+                    available = self._refill(float(state[0]), float(state[1]), now)
+                else:
+                    available = self.capacity
+                available -= tokens
+                os.lseek(descriptor, 0, os.SEEK_SET)
+                os.ftruncate(descriptor, 0)
+                os.write(descriptor, "{!r} {!r}".format(available, now).encode("ascii"))
+            finally:
+                os.close(descriptor)
+            return max(0.0, -available / self.rate)
+
+
+class RateLimiter(object):
+    """
+    One token bucket per FlightXML query class, shared by every thread using the client:
+
+        limiter = RateLimiter({1: (1, 5), 2: (10, 20), 3: (50, 100)})
+        client = Client(username, api_key, rate_limiter=limiter)
+
+    limits maps a query class to (calls per second, burst size). Classes without a limit are not throttled.
+    bucket_factory(rate, capacity, query_class) builds the buckets; pass one returning FileTokenBucket to share the
+    limits between processes.
+    """
+    def __init__(self, limits, classes=None, default_class=DEFAULT_CLASS, bucket_factory=None):
+        self.classes = dict(METHOD_CLASSES, **(classes or {}))
+        self.default_class = default_class
+        if bucket_factory is None:
+            bucket_factory = lambda rate, capacity, query_class: TokenBucket(rate, capacity)
+        self.buckets = dict((query_class, bucket_factory(rate, capacity, query_class))
+                            for query_class, (rate, capacity) in limits.items())
+
+    def query_class(self, method):
+        return self.classes.get(method, self.default_class)
+
+    def reserve(self, method):
+        bucket = self.buckets.get(self.query_class(method))
+        return bucket.reserve() if bucket is not None else 0.0
+
+    def acquire(self, method):
+        delay = self.reserve(method)
+        if delay > 0:
+            logger.debug("throttling %s for %.3fs", method, delay)
+            time.sleep(delay)
+        return delay
+
+
+class AdaptiveConcurrency(object):
+    """
+    Additive-increase/multiplicative-decrease limit on the number of calls in flight. Every healthy call (no error
+    and latency under target_latency) raises the limit by about one per limit's worth of calls; an error or a slow
+    call multiplies it by backoff. Callers block in acquire() while the limit is reached; try_acquire() is the
+    non-blocking form, for callers such as AsyncClient that wait on their own.
+    """
+    def __init__(self, initial=8, minimum=1, maximum=64, target_latency=2.0, backoff=0.7):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def try_acquire(self):
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency, error=False):
+        with self._condition:
+            self.in_flight -= 1
+            if error or latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                logger.debug("concurrency limit down to %.1f", self.limit)
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
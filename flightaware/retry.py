@@ -0,0 +1,121 @@
+import time
+import random
+import threading
+from collections import deque
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Cheap, idempotent reads worth a duplicate request to cut tail latency
+HEDGE_METHODS = frozenset(["InFlightInfo", "Metar", "MetarEx"])
+
+
+class RetryPolicy(object):
+    """
+    When and how often a failed FlightXML call is tried again.
+
+    A call is retried after a transport error (connection failure or timeout) or a response with one of
+    retry_statuses, up to max_attempts attempts in all, sleeping a random time between 0 and
+    min(max_backoff, backoff * 2 ** attempt) in between ("full jitter"). With deadline set, no attempt starts and no
+    socket waits past deadline seconds from the start of the call. Methods that change state (see
+    client.WRITE_METHODS) are only retried when retry_writes is set, since a retried write may be applied twice.
+
+        client = Client(username, api_key, retry=RetryPolicy(max_attempts=4, deadline=10))
+    """
+    def __init__(self, max_attempts=3, backoff=0.5, max_backoff=30.0, deadline=None, retry_statuses=RETRY_STATUSES,
+                 retry_exceptions=None, retry_writes=False, random=random.random):
+        """
+        max_attempts        attempts per call, including the first
+        backoff             base of the exponential backoff, in seconds
+        max_backoff         cap on a single backoff, in seconds
+        deadline            seconds a call may take in all, or None
+        retry_statuses      HTTP status codes worth retrying
+        retry_exceptions    exception classes worth retrying; defaults to the transport errors of the client's HTTP
+                            library
+        retry_writes        also retry methods that change state
+        random              source of uniform [0, 1) numbers for the jitter, for tests
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = retry_exceptions
+        self.retry_writes = retry_writes
+        self.random = random
+
+    def start(self):
+        """
+        Absolute time by which a call starting now must finish, or None.
+        """
+        return time.time() + self.deadline if self.deadline is not None else None
+
+    def retryable_status(self, status):
+        return status in self.retry_statuses
+
+    def backoff_delay(self, attempt):
+        return self.random() * min(self.max_backoff, self.backoff * 2 ** attempt)
+
+    def next_delay(self, attempt, deadline, write=False):
+        """
+        Seconds to sleep before attempt number attempt (counting from 1 for the first retry), or None when the call
+        should give up instead.
+        """
+        if attempt >= self.max_attempts or (write and not self.retry_writes):
+            return None
+        delay = self.backoff_delay(attempt)
+        if deadline is not None and time.time() + delay >= deadline:
+            return None
+        return delay
+
+    def clip_timeout(self, timeout, deadline):
+        """
+        Shorten a (connect, read) or single timeout so that the attempt cannot outlive the deadline.
+        """
+        if deadline is None:
+            return timeout
+        remaining = max(0.001, deadline - time.time())
+        if isinstance(timeout, (tuple, list)):
+            return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+class HedgePolicy(object):
+    """
+    Hedged requests for idempotent reads: if a call to one of methods has not answered after a delay, an identical
+    second request is sent and whichever answers first wins.
+
+    The delay is fixed when delay is given; otherwise it tracks the 95th percentile latency of each method over the
+    last window calls, using default_delay until min_samples calls have been seen.
+    """
+    def __init__(self, methods=HEDGE_METHODS, delay=None, default_delay=1.0, min_delay=0.05, percentile=95,
+                 window=200, min_samples=20, max_workers=16):
+        self.methods = frozenset(methods)
+        self.delay = delay
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def applies(self, method):
+        return method in self.methods
+
+    def record(self, method, latency):
+        with self._lock:
+            samples = self._latencies.get(method)
+            if samples is None:
+                samples = self._latencies[method] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def delay_for(self, method):
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            samples = sorted(self._latencies.get(method, ()))
+        if len(samples) < self.min_samples:
+            return self.default_delay
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100.0))
+        return max(self.min_delay, samples[index])
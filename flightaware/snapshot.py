@@ -0,0 +1,216 @@
+import re
+import time
+import shlex
+import bisect
+from fnmatch import fnmatchcase
+
+from flightaware.spatial import in_longitude_range
+
+# Airline flights are identified by an ICAO airline code followed by the flight number
+AIRLINE_IDENT = re.compile(r"^[A-Z]{3}[0-9]")
+
+# ICAO codes of airports in the contiguous US are their three-letter codes with a K in front (KLAX for LAX)
+US_ICAO_CODE = re.compile(r"^K[A-Z0-9]{3}$")
+
+
+def parse_query(query):
+    """
+    Turn a Search query into a {key: value} dict. query may already be such a dict (as passed to Client.search) or a
+    string of "-key value" pairs, where values containing spaces are quoted:
+
+        -type B77* -aboveAltitude 300 -latlong "36.8 -123.0 38.4 -121.0"
+    """
+    if isinstance(query, dict):
+        return dict((key.lstrip("-"), value) for key, value in query.items())
+    parameters = {}
+    words = shlex.split(query)
+    for index in range(0, len(words) - 1, 2):
+        if not words[index].startswith("-"):
+            raise ValueError("expected -key at {!r}".format(words[index]))
+        parameters[words[index][1:]] = words[index + 1]
+    if len(words) % 2:
+        raise ValueError("no value for {!r}".format(words[-1]))
+    return parameters
+
+
+def _patterns(value):
+    return [pattern.upper() for pattern in re.split(r"[\s,]+", str(value)) if pattern]
+
+
+def _number(record, key):
+    try:
+        return float(record.get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _KeyIndex(object):
+    # Sorted keys with the record numbers carrying each; answers exact, prefix ("UAL*") and glob lookups. With
+    # airports, US airports are also filed under their three-letter code, so LAX finds KLAX as Search does
+
+    def __init__(self, records, field, airports=False):
+        self.rows = {}
+        for row, record in enumerate(records):
+            key = str(record.get(field) or "").upper()
+            self.rows.setdefault(key, []).append(row)
+            if airports and US_ICAO_CODE.match(key):
+                self.rows.setdefault(key[1:], []).append(row)
+        self.keys = sorted(self.rows)
+
+    def lookup(self, patterns):
+        rows = set()
+        for pattern in patterns:
+            if not any(character in pattern for character in "*?["):
+                rows.update(self.rows.get(pattern, ()))
+            elif pattern.endswith("*") and not any(character in pattern[:-1] for character in "*?["):
+                prefix = pattern[:-1]
+                start = bisect.bisect_left(self.keys, prefix)
+                for key in self.keys[start:]:
+                    if not key.startswith(prefix):
+                        break
+                    rows.update(self.rows[key])
+            else:
+                for key in self.keys:
+                    if fnmatchcase(key, pattern):
+                        rows.update(self.rows[key])
+        return rows
+
+
+class _RangeIndex(object):
+    # Record numbers sorted by a numeric field, answering open and closed interval lookups
+
+    def __init__(self, records, field):
+        pairs = sorted((_number(record, field), row) for row, record in enumerate(records))
+        self.values = [value for value, _ in pairs]
+        self.rows = [row for _, row in pairs]
+
+    def lookup(self, low=None, high=None, strict=True):
+        start = 0 if low is None else (bisect.bisect_right if strict else bisect.bisect_left)(self.values, low)
+        end = len(self.values) if high is None else (bisect.bisect_left if strict else bisect.bisect_right)(self.values, high)
+        return set(self.rows[start:end])
+
+
+class PositionSnapshot(object):
+    """
+    Local copy of the airborne flights returned by one broad Search (or SearchBirdseyeInFlight) fetch, indexed on
+    ident, type, origin, destination, altitude, groundspeed and position so that any number of Search expressions
+    can be evaluated against it without further FlightXML calls:
+
+        snapshot = PositionSnapshot.from_client(client, {"latlong": "24 -125 50 -66"})
+        heavies = snapshot.search("-type B77* -aboveAltitude 300")
+        low_and_fast = snapshot.search({"belowAltitude": 100, "aboveGroundspeed": 200})
+
+    Supported keys are those of Client.search: prefix, type, suffix, idents, origin, destination,
+    originOrDestination, aboveAltitude, belowAltitude, aboveGroundspeed, belowGroundspeed, latlong, filter and
+    inAir. Wildcards (* and ?) are allowed in idents and type, and several space-separated patterns may be given.
+    Airport codes match in either ICAO or three-letter form for US airports (LAX finds KLAX), and a latlong box
+    whose minimum longitude is greater than its maximum crosses the antimeridian. The above/below bounds are
+    exclusive. filter tells airline flights from general aviation by the shape of the
+    ident, since FlightXML does not report it per flight.
+    """
+    def __init__(self, records, fetched_at=None):
+        self.records = list(records)
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self._idents = _KeyIndex(self.records, "ident")
+        self._types = _KeyIndex(self.records, "type")
+        self._origins = _KeyIndex(self.records, "origin", airports=True)
+        self._destinations = _KeyIndex(self.records, "destination", airports=True)
+        self._altitudes = _RangeIndex(self.records, "altitude")
+        self._groundspeeds = _RangeIndex(self.records, "groundspeed")
+        self._latitudes = _RangeIndex(self.records, "latitude")
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_client(cls, client, parameters={}, page_size=None):
+        """
+        Fill a snapshot with every aircraft matching a broad Search, paging with the largest page size allowed.
+        """
+        return cls(client.iter_search(parameters, page_size=page_size, prefetch=True, models=False))
+
+    @classmethod
+    def from_birdseye(cls, client, query, page_size=None):
+        """
+        Fill a snapshot from a SearchBirdseyeInFlight query.
+        """
+        return cls(client.iter_search_birdseye_in_flight(query, page_size=page_size, prefetch=True, models=False))
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def _rows(self, parameters):
+        # Narrow down with the indexes first, then check the remaining clauses record by record
+        candidates = []
+        remaining = {}
+        for key, value in parameters.items():
+            if key == "idents":
+                candidates.append(self._idents.lookup(_patterns(value)))
+            elif key == "type":
+                candidates.append(self._types.lookup(_patterns(value)))
+            elif key == "origin":
+                candidates.append(self._origins.lookup(_patterns(value)))
+            elif key == "destination":
+                candidates.append(self._destinations.lookup(_patterns(value)))
+            elif key == "originOrDestination":
+                patterns = _patterns(value)
+                candidates.append(self._origins.lookup(patterns) | self._destinations.lookup(patterns))
+            elif key == "aboveAltitude":
+                candidates.append(self._altitudes.lookup(low=float(value)))
+            elif key == "belowAltitude":
+                candidates.append(self._altitudes.lookup(high=float(value)))
+            elif key == "aboveGroundspeed":
+                candidates.append(self._groundspeeds.lookup(low=float(value)))
+            elif key == "belowGroundspeed":
+                candidates.append(self._groundspeeds.lookup(high=float(value)))
+            elif key == "latlong":
+                min_lat, min_lon, max_lat, max_lon = [float(part) for part in str(value).split()]
+                candidates.append(self._latitudes.lookup(min_lat, max_lat, strict=False))
+                remaining[key] = (min_lon, max_lon)
+            elif key in ("prefix", "suffix", "filter", "inAir"):
+                remaining[key] = value
+            else:
+                raise ValueError("unsupported search key {!r}".format(key))
+
+        if candidates:
+            candidates.sort(key=len)
+            rows = candidates[0].intersection(*candidates[1:])
+        else:
+            rows = set(range(len(self.records)))
+        if remaining:
+            rows = [row for row in rows if self._matches(self.records[row], remaining)]
+        return sorted(rows)
+
+    def _matches(self, record, clauses):
+        for key, value in clauses.items():
+            if key == "latlong":
+                min_lon, max_lon = value
+                if not in_longitude_range(_number(record, "longitude"), min_lon, max_lon):
+                    return False
+            elif key == "prefix":
+                if str(record.get("prefix") or "").upper() != str(value).upper():
+                    return False
+            elif key == "suffix":
+                if str(record.get("suffix") or "").upper() != str(value).upper():
+                    return False
+            elif key == "filter":
+                airline = bool(AIRLINE_IDENT.match(str(record.get("ident") or "")))
+                if value == "airline" and not airline or value == "ga" and airline:
+                    return False
+            elif key == "inAir":
+                airborne = _number(record, "altitude") > 0 or _number(record, "groundspeed") > 0
+                if airborne != bool(int(value)):
+                    return False
+        return True
+
+    def search(self, query):
+        """
+        Records matching a Search query, given as a dict or a "-key value" string, in snapshot order.
+        """
+        return [self.records[row] for row in self._rows(parse_query(query))]
+
+    def count(self, query):
+        """
+        Number of records matching a Search query, the local counterpart of SearchCount.
+        """
+        return len(self._rows(parse_query(query)))
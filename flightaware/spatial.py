@@ -0,0 +1,172 @@
+import json
+import math
+
+from flightaware import geo
+
+MILES_PER_DEGREE_LATITUDE = math.pi * geo.EARTH_RADIUS_MILES / 180
+
+
+def in_longitude_range(longitude, min_longitude, max_longitude):
+    """
+    Whether longitude lies between min_longitude and max_longitude; a range whose min_longitude is greater than its
+    max_longitude crosses the antimeridian.
+    """
+    if min_longitude <= max_longitude:
+        return min_longitude <= longitude <= max_longitude
+    return longitude >= min_longitude or longitude <= max_longitude
+
+
+class AirportIndex(object):
+    """
+    In-memory grid index of airport positions answering nearest-airport, radius and bounding box queries without
+    calling AirportInfo. Build it once from FlightXML with from_client, then save it and load it on start up:
+
+        index = AirportIndex.from_client(client)
+        index.save("airports.json")
+        ...
+        index = AirportIndex.load("airports.json")
+        distance, code = index.nearest(36.12, -86.67)[0]
+
+    Distances are in statute miles.
+    """
+    def __init__(self, cell_size=1.0):
+        """
+        cell_size   edge of a grid cell in degrees
+        """
+        self.cell_size = cell_size
+        self.airports = {}
+        self._cells = {}
+        self._lon_cells = int(math.ceil(360.0 / cell_size))
+
+    def __len__(self):
+        return len(self.airports)
+
+    def __contains__(self, code):
+        return code in self.airports
+
+    @classmethod
+    def from_client(cls, client, airports=None, cell_size=1.0, max_workers=None):
+        """
+        Build an index from AllAirports (or the given airport codes) and one AirportInfo call per airport, made
+        through client.batch, asking for dicts whatever the client's models setting. Airports whose lookup fails or
+        has no position are left out.
+        """
+        if airports is None:
+            airports = client.all_airports()
+        kwargs = {"models": False} if max_workers is None else {"max_workers": max_workers, "models": False}
+        index = cls(cell_size)
+        for item in client.batch("AirportInfo", [{"airportCode": code} for code in airports], **kwargs):
+            info = item.result
+            if item.error is None and isinstance(info, dict) and "latitude" in info and "longitude" in info:
+                index.add(item.data["airportCode"], info["latitude"], info["longitude"], info)
+        return index
+
+    def _cell(self, latitude, longitude):
+        return (int(math.floor((latitude + 90) / self.cell_size)),
+                int(math.floor((longitude + 180) / self.cell_size)) % self._lon_cells)
+
+    def add(self, code, latitude, longitude, info=None):
+        """
+        Add or move an airport. info is kept alongside it, typically the AirportInfo record.
+        """
+        if code in self.airports:
+            self.remove(code)
+        latitude = float(latitude)
+        longitude = float(longitude)
+        self.airports[code] = (latitude, longitude, info)
+        self._cells.setdefault(self._cell(latitude, longitude), []).append(code)
+
+    def remove(self, code):
+        latitude, longitude, _ = self.airports.pop(code)
+        cell = self._cell(latitude, longitude)
+        self._cells[cell].remove(code)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def info(self, code):
+        return self.airports[code][2]
+
+    def _codes_in_cells(self, lat_range, lon_range):
+        for lat_cell in lat_range:
+            for lon_cell in lon_range:
+                for code in self._cells.get((lat_cell, lon_cell % self._lon_cells), ()):
+                    yield code
+
+    def within(self, latitude, longitude, radius):
+        """
+        Airports within radius miles of a position, as (distance, code) pairs sorted nearest first.
+        """
+        lat_delta = radius / MILES_PER_DEGREE_LATITUDE
+        south = max(-90.0, latitude - lat_delta)
+        north = min(90.0, latitude + lat_delta)
+        widest = math.cos(math.radians(max(abs(south), abs(north))))
+        lat_range = range(self._cell(south, 0)[0], self._cell(north, 0)[0] + 1)
+        if widest <= 0 or radius / (MILES_PER_DEGREE_LATITUDE * widest) >= 180:
+            lon_range = range(self._lon_cells)
+        else:
+            lon_delta = radius / (MILES_PER_DEGREE_LATITUDE * widest)
+            first = int(math.floor((longitude - lon_delta + 180) / self.cell_size))
+            last = int(math.floor((longitude + lon_delta + 180) / self.cell_size))
+            lon_range = range(first, min(last, first + self._lon_cells - 1) + 1)
+
+        found = []
+        for code in self._codes_in_cells(lat_range, lon_range):
+            airport_latitude, airport_longitude, _ = self.airports[code]
+            miles = geo.distance(latitude, longitude, airport_latitude, airport_longitude)
+            if miles <= radius:
+                found.append((miles, code))
+        found.sort()
+        return found
+
+    def nearest(self, latitude, longitude, count=1, max_distance=None):
+        """
+        The count airports nearest to a position, as (distance, code) pairs sorted nearest first, optionally
+        limited to max_distance miles.
+        """
+        if not self.airports:
+            return []
+        # Widen a square of cells around the position until it holds enough candidates, then settle the answer
+        # with a radius query out to the furthest of them, which also catches closer airports in other cells. The
+        # square stops growing once it holds every airport, when count is more than the index has.
+        center_lat, center_lon = self._cell(latitude, longitude)
+        wanted = min(count, len(self.airports))
+        ring = 0
+        candidates = []
+        while len(candidates) < wanted and ring <= max(self._lon_cells, int(180 / self.cell_size)):
+            candidates = set(self._codes_in_cells(range(center_lat - ring, center_lat + ring + 1),
+                                                   range(center_lon - ring, center_lon + ring + 1)))
+            ring += 1
+        radius = max(sorted(geo.distance(latitude, longitude, *self.airports[code][:2]) for code in candidates)[:count])
+        if max_distance is not None:
+            radius = min(radius, max_distance)
+        return self.within(latitude, longitude, radius)[:count]
+
+    def bbox(self, min_latitude, min_longitude, max_latitude, max_longitude):
+        """
+        Codes of the airports inside a latitude/longitude box. A box whose min_longitude is greater than its
+        max_longitude crosses the antimeridian.
+        """
+        lat_range = range(self._cell(min_latitude, 0)[0], self._cell(max_latitude, 0)[0] + 1)
+        first = self._cell(0, min_longitude)[1]
+        last = self._cell(0, max_longitude)[1]
+        if last < first:
+            last += self._lon_cells
+        found = []
+        for code in self._codes_in_cells(lat_range, range(first, last + 1)):
+            latitude, longitude, _ = self.airports[code]
+            if min_latitude <= latitude <= max_latitude and in_longitude_range(longitude, min_longitude, max_longitude):
+                found.append(code)
+        return found
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"cell_size": self.cell_size, "airports": self.airports}, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            saved = json.load(f)
+        index = cls(saved["cell_size"])
+        for code, (latitude, longitude, info) in saved["airports"].items():
+            index.add(code, latitude, longitude, info)
+        return index
@@ -0,0 +1,107 @@
+import re
+import json
+import codecs
+
+from flightaware.exceptions import FlightAwareError
+
+WHITESPACE = " \t\r\n"
+
+
+class ArrayStreamParser(object):
+    """
+    Incremental parser that picks the elements out of the JSON array stored under key (the first one found) in a
+    document arriving in chunks. Each element is decoded as soon as its closing bytes arrive and the text before
+    it is discarded, so memory use is bounded by the largest single element rather than the whole response.
+
+        parser = ArrayStreamParser("data")
+        for chunk in chunks:
+            for record in parser.feed(chunk):
+                ...
+        parser.close()
+    """
+    def __init__(self, key):
+        self.key = key
+        self._start = re.compile(r'"{}"\s*:\s*\['.format(re.escape(key)))
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._position = 0
+        self._in_array = False
+        self._done = False
+
+    def feed(self, chunk):
+        """
+        Add a chunk of bytes (or text) and return the list of elements completed by it.
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._text.decode(chunk)
+        self._buffer += chunk
+        return self._drain(final=False)
+
+    def close(self):
+        """
+        Signal the end of the document and return any remaining elements. Raises FlightAwareError when the
+        document turns out to be an error record, and ValueError when it is truncated or has no array under key.
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        records = self._drain(final=True)
+        if not self._in_array and not self._done:
+            try:
+                document = json.loads(self._buffer)
+            except ValueError:
+                document = None
+            if isinstance(document, dict) and "error" in document:
+                raise FlightAwareError(document["error"])
+            raise ValueError("no {!r} array in the response".format(self.key))
+        elif not self._done:
+            raise ValueError("response ended inside the {!r} array".format(self.key))
+        return records
+
+    def _drain(self, final):
+        records = []
+        if self._done:
+            return records
+        if not self._in_array:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return records
+            self._in_array = True
+            self._position = match.end()
+
+        buffer = self._buffer
+        position = self._position
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE + ",":
+                position += 1
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                self._done = True
+                break
+            try:
+                record, end = self._decoder.raw_decode(buffer, position)
+            except ValueError:
+                if final:
+                    raise
+                break
+            # A number at the very end of the buffer may still be missing digits
+            if end >= len(buffer) and not final and not isinstance(record, (dict, list, str)):
+                break
+            records.append(record)
+            position = end
+
+        self._buffer = buffer[position:]
+        self._position = 0
+        return records
+
+
+def iter_array(chunks, key):
+    """
+    Yield the elements of the array stored under key from an iterable of byte chunks.
+    """
+    parser = ArrayStreamParser(key)
+    for chunk in chunks:
+        for record in parser.feed(chunk):
+            yield record
+    for record in parser.close():
+        yield record
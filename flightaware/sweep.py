@@ -0,0 +1,198 @@
+import os
+import json
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from flightaware.client import DEFAULT_BATCH_WORKERS
+from flightaware.timestamps import from_unix_timestamp, to_unix_timestamp
+
+logger = logging.getLogger("flightaware.sweep")
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+def schedule_key(row, merge_codeshares=True):
+    """
+    Key identifying a departure. Codeshare rows name the operating flight in actual_ident, so with merge_codeshares
+    all the flight numbers of one departure share a key.
+    """
+    ident = (row.get("actual_ident") or row.get("ident")) if merge_codeshares else row.get("ident")
+    return (ident, row.get("departuretime"), row.get("origin"), row.get("destination"))
+
+
+def dedupe_schedules(rows, merge_codeshares=True):
+    """
+    Drop repeated AirlineFlightSchedules rows. With merge_codeshares the rows of one departure sold under several
+    flight numbers collapse into the operating carrier's row (or the first row, when that is not among them), whose
+    "codeshares" field then lists the other idents. Otherwise only identical departures of the same ident are
+    dropped.
+    """
+    kept = {}
+    order = []
+    for row in rows:
+        key = schedule_key(row, merge_codeshares)
+        first = kept.get(key)
+        if first is None:
+            kept[key] = row
+            order.append(key)
+            continue
+        if not merge_codeshares:
+            continue
+        if not row.get("actual_ident") and first.get("actual_ident"):
+            # The operating flight's row takes over from the codeshare seen first
+            row["codeshares"] = first.pop("codeshares", [])
+            kept[key], row = row, first
+        representative = kept[key]
+        codeshares = representative.setdefault("codeshares", [])
+        if row.get("ident") != representative.get("ident") and row.get("ident") not in codeshares:
+            codeshares.append(row.get("ident"))
+    return [kept[key] for key in order]
+
+
+def _subtract(start, end, done):
+    # Parts of [start, end) not covered by the done intervals
+    remaining = []
+    for done_start, done_end in sorted(done):
+        if done_end <= start or done_start >= end:
+            continue
+        if done_start > start:
+            remaining.append((start, done_start))
+        start = max(start, done_end)
+    if start < end:
+        remaining.append((start, end))
+    return remaining
+
+
+class ScheduleSweeper(object):
+    """
+    Pulls AirlineFlightSchedules for a long date range by splitting it into windows fetched in parallel:
+
+        sweeper = ScheduleSweeper(client, checkpoint="bna-2015.json")
+        for row in sweeper.sweep(datetime(2015, 1, 1), datetime(2016, 1, 1), origin="KBNA"):
+            store(row)
+
+    The range is cut into windows of window seconds. A window that turns out to hold more than max_rows rows is
+    cut short and the rest of it split in two, down to min_window seconds, so dense periods are paged through in
+    parallel instead of one long offset chain. The rows already fetched from it are kept rather than fetched again.
+    Rows are de-duplicated (see dedupe_schedules) and yielded as each window completes.
+
+    With checkpoint, the completed windows are recorded in that JSON file, and a later sweep of the same query skips
+    them. A window is recorded as done once all of its rows have been yielded, so after an interruption the rows of
+    the window being consumed at the time may be yielded again.
+    """
+    def __init__(self, client, window=DAY, min_window=HOUR, max_rows=1000, max_workers=DEFAULT_BATCH_WORKERS,
+                 page_size=None, checkpoint=None, merge_codeshares=True):
+        """
+        client              a Client; rows are requested as dicts whatever its models setting
+        window              initial window length in seconds
+        min_window          windows are not split below this length
+        max_rows            rows a window may hold before it is split
+        max_workers         windows fetched at once
+        page_size           records per call; defaults to the client's maximum result size
+        checkpoint          path of a JSON file recording completed windows, or None
+        merge_codeshares    collapse codeshare rows into the operating flight's row
+        """
+        self.client = client
+        self.window = window
+        self.min_window = min_window
+        self.max_rows = max_rows
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.checkpoint = checkpoint
+        self.merge_codeshares = merge_codeshares
+        self.windows_fetched = 0
+        self.windows_split = 0
+
+    def _load(self, query):
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return []
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        if state.get("query") != query:
+            raise ValueError("checkpoint {} belongs to a different sweep".format(self.checkpoint))
+        return [tuple(window) for window in state.get("done", [])]
+
+    def _save(self, query, done):
+        if self.checkpoint is None:
+            return
+        temporary = self.checkpoint + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({"query": query, "done": sorted(done)}, f)
+        os.replace(temporary, self.checkpoint)
+
+    def _fetch(self, start, end, filters):
+        """
+        Rows departing in [start, end), as (rows, resume). resume is None once the window is complete. When it holds
+        more than max_rows rows and can still be split, fetching stops and resume is the time from which the rest of
+        the window is still to be fetched; the rows fetched so far are kept, since every page is billed. With the
+        rows in departure order those before the last departure time seen are complete and resume is that time;
+        otherwise all of them are returned, resume is start, and de-duplication drops the rows fetched twice.
+        """
+        splittable = end - start >= 2 * self.min_window
+        rows = []
+        records = self.client.iter_airline_flight_schedules(from_unix_timestamp(start), from_unix_timestamp(end - 1),
+                                                            page_size=self.page_size, models=False, **filters)
+        try:
+            for row in records:
+                rows.append(row)
+                if splittable and len(rows) > self.max_rows:
+                    break
+            else:
+                return rows, None
+        finally:
+            records.close()
+        times = [row.get("departuretime") or 0 for row in rows]
+        last = times[-1]
+        if start < last < end and times == sorted(times):
+            return [row for row, departure in zip(rows, times) if departure < last], last
+        return rows, start
+
+    def sweep(self, start_date, end_date, origin=None, destination=None, airline=None, flight_number=None):
+        """
+        Yield every schedule row departing from start_date up to (not including) end_date matching the filters.
+        """
+        start, end = to_unix_timestamp(start_date), to_unix_timestamp(end_date)
+        filters = {"origin": origin, "destination": destination, "airline": airline, "flight_number": flight_number}
+        query = dict(filters, start=start, end=end)
+        done = self._load(query)
+        windows = []
+        for part_start, part_end in _subtract(start, end, done):
+            windows.extend((s, min(s + self.window, part_end)) for s in range(part_start, part_end, self.window))
+        logger.info("sweeping %d windows (%d already done)", len(windows), len(done))
+
+        seen = set()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = dict((executor.submit(self._fetch, s, e, filters), (s, e)) for s, e in windows)
+        try:
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    window_start, window_end = pending.pop(future)
+                    rows, resume = future.result()
+                    self.windows_fetched += 1
+                    if resume is not None:
+                        # Dense window: the rest of it is fetched in two halves (or whole, when too short to halve)
+                        logger.debug("splitting dense window %d-%d at %d", window_start, window_end, resume)
+                        self.windows_split += 1
+                        if window_end - resume >= 2 * self.min_window:
+                            middle = (resume + window_end) // 2
+                            parts = ((resume, middle), (middle, window_end))
+                        else:
+                            parts = ((resume, window_end),)
+                        for s, e in parts:
+                            pending[executor.submit(self._fetch, s, e, filters)] = (s, e)
+                    for row in dedupe_schedules(rows, self.merge_codeshares):
+                        key = schedule_key(row, self.merge_codeshares)
+                        if key not in seen:
+                            seen.add(key)
+                            yield row
+                    complete_end = window_end if resume is None else resume
+                    if complete_end > window_start:
+                        done.append((window_start, complete_end))
+                        self._save(query, done)
+        finally:
+            # Closing the generator cancels the windows not yet started and waits for those being fetched
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
@@ -0,0 +1,126 @@
+import calendar
+import datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+UTC = datetime.timezone.utc
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=UTC)
+
+# Integer UNIX time fields of AirlineFlightSchedules records, and the datetime fields added for them
+SCHEDULE_TIMES = {
+    "departuretime": "departure_time",
+    "arrivaltime": "arrival_time",
+}
+
+
+def to_unix_timestamp(val):
+    """
+    Integer seconds since the epoch for a datetime. Naive datetimes are taken to be in UTC. Empty values pass
+    through as None.
+    """
+    if not val:
+        return None
+    if not isinstance(val, datetime.datetime):
+        raise ValueError("input must be of type datetime")
+    if val.tzinfo is not None:
+        return calendar.timegm(val.utctimetuple())
+    return calendar.timegm(val.timetuple())
+
+
+def from_unix_timestamp(val):
+    """
+    Timezone-aware UTC datetime for integer seconds since the epoch, whatever the host's timezone.
+    """
+    return EPOCH + datetime.timedelta(seconds=val)
+
+
+class _Converter(object):
+    # Memoizes conversions within one result set, where scheduled times repeat heavily
+
+    def __init__(self):
+        self.seen = {}
+
+    def __call__(self, val):
+        if val is None:
+            return None
+        result = self.seen.get(val)
+        if result is None:
+            result = self.seen[val] = EPOCH + datetime.timedelta(seconds=val)
+        return result
+
+
+class LazyTimes(dict):
+    """
+    Record whose datetime fields are only converted from their UNIX time fields when first looked up. They do not
+    show up when iterating over the record until then.
+    """
+    __slots__ = ("_fields", "_convert")
+
+    def __init__(self, record, fields, convert=from_unix_timestamp):
+        super(LazyTimes, self).__init__(record)
+        self._fields = dict((target, source) for source, target in fields.items())
+        self._convert = convert
+
+    def __missing__(self, key):
+        source = self._fields.get(key)
+        if source is None or source not in self:
+            raise KeyError(key)
+        value = self[key] = self._convert(dict.__getitem__(self, source))
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or dict.__contains__(self, self._fields.get(key, key))
+
+
+def add_datetimes(records, fields=SCHEDULE_TIMES, lazy=False, copy=False):
+    """
+    Add a UTC datetime field next to each UNIX time field of every record, in place, and return the records:
+
+        add_datetimes(schedules)            # record["departure_time"] from record["departuretime"], ...
+
+    fields maps each source field to the field to add. Equal timestamps share one datetime object, which makes
+    large result sets much cheaper to convert. With lazy the records are replaced by LazyTimes, converting each
+    field on first access instead. With copy, neither the list nor its records are changed and a new list of
+    converted copies is returned, for results that are shared with other callers. An error record is returned
+    unchanged.
+    """
+    if isinstance(records, dict):
+        return records
+    convert = _Converter()
+    if lazy:
+        converted = [LazyTimes(record, fields, convert) for record in records]
+        if copy:
+            return converted
+        records[:] = converted
+        return records
+    if copy:
+        records = [dict(record) for record in records]
+    items = list(fields.items())
+    for record in records:
+        for source, target in items:
+            if source in record:
+                record[target] = convert(record[source])
+    return records
+
+
+def datetime64_column(records, field):
+    """
+    NumPy datetime64[s] array of a UNIX time field over all records, with NaT where it is missing. Requires numpy.
+    """
+    if numpy is None:
+        raise ImportError("datetime64_column requires numpy")
+    values = [record.get(field) for record in records]
+    column = numpy.array([value if value is not None else 0 for value in values], dtype="int64").astype("datetime64[s]")
+    missing = [index for index, value in enumerate(values) if value is None]
+    if missing:
+        column[missing] = numpy.datetime64("NaT")
+    return column
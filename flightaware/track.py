@@ -0,0 +1,187 @@
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# One position of a track log, with the field names of the decoded FlightXML records
+TrackPoint = namedtuple("TrackPoint", [
+    "timestamp", "latitude", "longitude", "groundspeed", "altitude", "altitudestatus", "updatetype", "altitudechange",
+])
+
+# Numeric columns and the array typecode each is stored with
+NUMERIC_FIELDS = (
+    ("timestamp", "q"),
+    ("latitude", "d"),
+    ("longitude", "d"),
+    ("groundspeed", "i"),
+    ("altitude", "i"),
+)
+
+# Status columns, stored as one byte per point indexing into a per-track table of the distinct strings seen
+CODE_FIELDS = ("altitudestatus", "updatetype", "altitudechange")
+
+# Record keys as FlightXML spells them, for fields whose key differs from the TrackPoint name
+RECORD_KEYS = {
+    "altitudestatus": "altitudeStatus",
+    "updatetype": "updateType",
+    "altitudechange": "altitudeChange",
+}
+
+
+def _field(record, name):
+    # (key, value) of a field. FlightXML spells the status fields altitudeStatus, updateType and altitudeChange;
+    # the docs spell them in lower case
+    if name in record:
+        return name, record[name]
+    for key in record:
+        if key.lower() == name:
+            return key, record[key]
+    return None, None
+
+
+class Track(object):
+    """
+    Columnar track log. Numeric fields live in typed arrays and the status fields in one-byte code arrays, which
+    takes roughly a tenth of the memory of the list of dicts returned by GetLastTrack / GetHistoricalTrack.
+
+    A Track supports len(), iteration and indexing (yielding TrackPoint) and slicing (yielding a Track).
+    column(name) exposes a zero-copy memoryview of a column and to_numpy(name) a NumPy view of it.
+
+    A numeric field missing from a record reads as None in its TrackPoint. In the columns it is NaN for latitude
+    and longitude and 0 for the integer fields, so missing(name) tells those points apart from real zeros.
+    """
+    __slots__ = ("_columns", "_codes", "_code_tables", "_missing", "_keys")
+
+    def __init__(self):
+        self._columns = dict((name, array(typecode)) for name, typecode in NUMERIC_FIELDS)
+        self._codes = dict((name, array("B")) for name in CODE_FIELDS)
+        self._code_tables = dict((name, []) for name in CODE_FIELDS)
+        # One byte per point with bit i set when the i-th numeric field was missing
+        self._missing = array("B")
+        # Record key of each field as first seen, so to_records gives back the records' own spelling
+        self._keys = {}
+
+    @classmethod
+    def from_records(cls, records):
+        track = cls()
+        for record in records:
+            track.append(record)
+        return track
+
+    def append(self, record):
+        """
+        Add one position, given as a decoded FlightXML track record (a dict) or a TrackPoint.
+        """
+        if isinstance(record, TrackPoint):
+            record = dict((RECORD_KEYS.get(name, name), value) for name, value in zip(record._fields, record)
+                          if value is not None)
+        missing = 0
+        for bit, (name, typecode) in enumerate(NUMERIC_FIELDS):
+            key, value = _field(record, name)
+            if value is None or value == "":
+                missing |= 1 << bit
+                value = float("nan") if typecode == "d" else 0
+            else:
+                self._keys.setdefault(name, key)
+            self._columns[name].append(float(value) if typecode == "d" else int(value))
+        self._missing.append(missing)
+        for name in CODE_FIELDS:
+            key, value = _field(record, name)
+            if key is not None:
+                self._keys.setdefault(name, key)
+            self._codes[name].append(self._code(name, value or ""))
+
+    def _code(self, name, value):
+        table = self._code_tables[name]
+        try:
+            return table.index(value)
+        except ValueError:
+            if len(table) == 256:
+                raise ValueError("too many distinct {} values".format(name))
+            table.append(value)
+            return len(table) - 1
+
+    def __len__(self):
+        return len(self._columns["timestamp"])
+
+    def _numbers(self, index, columns):
+        missing = self._missing[index]
+        if not missing:
+            return [column[index] for column in columns]
+        return [None if missing & (1 << bit) else column[index] for bit, column in enumerate(columns)]
+
+    def __iter__(self):
+        columns = [self._columns[name] for name, _ in NUMERIC_FIELDS]
+        codes = [(self._codes[name], self._code_tables[name]) for name in CODE_FIELDS]
+        for index in range(len(self)):
+            values = self._numbers(index, columns)
+            values.extend(table[column[index]] for column, table in codes)
+            yield TrackPoint(*values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            track = Track()
+            for name, _ in NUMERIC_FIELDS:
+                track._columns[name] = self._columns[name][index]
+            for name in CODE_FIELDS:
+                track._codes[name] = self._codes[name][index]
+                track._code_tables[name] = list(self._code_tables[name])
+            track._missing = self._missing[index]
+            track._keys = dict(self._keys)
+            return track
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("track index out of range")
+        values = self._numbers(index, [self._columns[name] for name, _ in NUMERIC_FIELDS])
+        values.extend(self._code_tables[name][self._codes[name][index]] for name in CODE_FIELDS)
+        return TrackPoint(*values)
+
+    def __repr__(self):
+        return "<Track {} points>".format(len(self))
+
+    def column(self, name):
+        """
+        Zero-copy memoryview of a column. Status columns are returned as their one-byte codes; see codes(name).
+        The track cannot be appended to while a view is alive.
+        """
+        if name in self._columns:
+            return memoryview(self._columns[name])
+        return memoryview(self._codes[name])
+
+    def missing(self, name):
+        """
+        Indexes of the points whose record had no value for a numeric column.
+        """
+        bit = 1 << [field for field, _ in NUMERIC_FIELDS].index(name)
+        return [index for index, missing in enumerate(self._missing) if missing & bit]
+
+    def codes(self, name):
+        """
+        The strings a status column's codes stand for, indexed by code.
+        """
+        return list(self._code_tables[name])
+
+    def to_numpy(self, name):
+        """
+        NumPy view of a column, sharing memory with the track. Requires numpy.
+        """
+        if numpy is None:
+            raise ImportError("Track.to_numpy requires numpy")
+        column = self.column(name)
+        return numpy.frombuffer(column, dtype=column.format)
+
+    def to_records(self):
+        """
+        The track as the list of dicts FlightXML returned, keyed as in the records it was built from (FlightXML's
+        spelling for fields it never saw) and without the numeric fields they were missing.
+        """
+        keys = [self._keys.get(name) or RECORD_KEYS.get(name, name) for name in TrackPoint._fields]
+        return [dict((key, value) for key, value in zip(keys, point) if value is not None) for point in self]
+
+    def nbytes(self):
+        columns = list(self._columns.values()) + list(self._codes.values()) + [self._missing]
+        return sum(column.itemsize * len(column) for column in columns)
@@ -0,0 +1,204 @@
+import os
+import json
+import mmap
+import time
+import struct
+import logging
+import threading
+from collections import namedtuple
+
+from flightaware.cache import cache_key
+from flightaware.exceptions import FlightAwareError
+
+logger = logging.getLogger("flightaware.transport")
+
+# Recording files start with MAGIC, followed by records of a RECORD header (request time, latency, key length,
+# body length, HTTP status), the call's cache_key and the raw response body
+MAGIC = b"FXR1"
+RECORD = struct.Struct("<dfIIH")
+
+# One recorded call, as listed by ReplayTransport.entries()
+RecordedCall = namedtuple("RecordedCall", ["timestamp", "latency", "method", "data", "status"])
+
+
+class RecordedResponse(object):
+    """
+    The parts of a requests.Response the client uses, over a body already in memory.
+    """
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content.decode("utf-8"))
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class HTTPTransport(object):
+    """
+    Sends calls to FlightXML through a requests session. This is what Client uses unless given another transport.
+
+    Any object with the same post() can stand in for it: post returns an object with status_code, content, json(),
+    iter_content(chunk_size) and close(), like requests.Response.
+    """
+    def __init__(self, session, auth, headers):
+        self.session = session
+        self.auth = auth
+        self.headers = headers
+
+    def post(self, method, url, data, timeout, stream=False):
+        kwargs = {"stream": True} if stream else {}
+        return self.session.post(url=url, data=data, auth=self.auth, headers=self.headers, timeout=timeout, **kwargs)
+
+
+class RecordingTransport(object):
+    """
+    Passes calls on to another transport and appends every response to a recording file for ReplayTransport:
+
+        client = Client(username, api_key)
+        client.transport = RecordingTransport("traffic.fxr", client.transport)
+
+    The file is only ever appended to, so several runs can record into it. Streamed calls are read in full before
+    they are handed back.
+    """
+    def __init__(self, path, transport, clock=time.time):
+        self.path = path
+        self.transport = transport
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+        else:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    self._file.close()
+                    raise ValueError("{} is not a FlightXML recording".format(path))
+
+    def post(self, method, url, data, timeout, stream=False):
+        start = self.clock()
+        r = self.transport.post(method, url, data, timeout, stream)
+        try:
+            content = r.content
+        finally:
+            if stream:
+                r.close()
+        key = cache_key(method, data).encode("utf-8")
+        header = RECORD.pack(start, self.clock() - start, len(key), len(content), r.status_code)
+        with self._lock:
+            # One write per record, flushed, so an interrupted run loses at most its last call
+            self._file.write(header + key + content)
+            self._file.flush()
+        return RecordedResponse(r.status_code, content) if stream else r
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ReplayTransport(object):
+    """
+    Answers calls from a RecordingTransport file, without credentials or network:
+
+        client = Client("replay", "replay", transport=ReplayTransport("traffic.fxr"))
+
+    The file is memory-mapped and indexed by call when opened; bodies are only read when served. A call recorded
+    several times gets its responses in recorded order, the last one repeating. Calls that were never recorded raise
+    FlightAwareError.
+
+    Responses come back as fast as they can be copied out of the map. With latency_scale each one is delayed by its
+    recorded latency times latency_scale, e.g. 0.01 to replay at 100 times real speed; entries() lists the recorded
+    calls with their times, for driving a replay on the recorded schedule.
+    """
+    def __init__(self, path, latency_scale=0.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC):
+            self._file.close()
+            raise ValueError("{} is not a FlightXML recording".format(path))
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("{} is not a FlightXML recording".format(path))
+        self._lock = threading.Lock()
+        self._positions = {}
+        self.index = {}
+        self._build_index()
+
+    def _records(self):
+        # (offset of the record, its header fields) for every complete record; a torn final record is ignored
+        offset = len(MAGIC)
+        size = len(self._map)
+        while offset + RECORD.size <= size:
+            fields = RECORD.unpack_from(self._map, offset)
+            end = offset + RECORD.size + fields[2] + fields[3]
+            if end > size:
+                logger.warning("%s: ignoring truncated record at byte %d", self.path, offset)
+                break
+            yield offset, fields
+            offset = end
+
+    def _build_index(self):
+        for offset, (timestamp, latency, key_length, body_length, status) in self._records():
+            start = offset + RECORD.size
+            key = self._map[start:start + key_length].decode("utf-8")
+            self.index.setdefault(key, []).append((status, start + key_length, body_length, latency))
+
+    def __len__(self):
+        return sum(len(responses) for responses in self.index.values())
+
+    def entries(self):
+        """
+        Yield a RecordedCall for every recorded call, in recording order.
+        """
+        for offset, (timestamp, latency, key_length, body_length, status) in self._records():
+            start = offset + RECORD.size
+            method, data = json.loads(self._map[start:start + key_length].decode("utf-8"))
+            yield RecordedCall(timestamp, latency, method, data, status)
+
+    def post(self, method, url, data, timeout, stream=False):
+        key = cache_key(method, data)
+        responses = self.index.get(key)
+        if not responses:
+            raise FlightAwareError("no recorded response for {}".format(key))
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = min(position + 1, len(responses) - 1)
+        status, start, length, latency = responses[position]
+        if self.latency_scale:
+            time.sleep(latency * self.latency_scale)
+        return RecordedResponse(status, self._map[start:start + length])
+
+    def rewind(self):
+        """
+        Serve every call from its first recorded response again.
+        """
+        with self._lock:
+            self._positions.clear()
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
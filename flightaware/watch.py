@@ -0,0 +1,135 @@
+import time
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from flightaware.client import DEFAULT_BATCH_WORKERS, TrafficFilter
+
+logger = logging.getLogger("flightaware.watch")
+
+DAY = 24 * 60 * 60
+
+# Flights that appeared on, changed on, or left an airport board since the previous poll, as lists of records
+BoardDelta = namedtuple("BoardDelta", ["airport", "board", "added", "changed", "removed"])
+
+
+class Board(object):
+    """
+    How one airport board is polled: the Client paging method, and for boards listed newest first (Arrived and
+    Departed) the record field holding the time the flight joined the board.
+    """
+    def __init__(self, name, time_field=None):
+        self.name = name
+        self.time_field = time_field
+
+    @property
+    def newest_first(self):
+        return self.time_field is not None
+
+
+BOARDS = {
+    "arrived": Board("arrived", "actualarrivaltime"),
+    "departed": Board("departed", "actualdeparturetime"),
+    "enroute": Board("enroute"),
+    "scheduled": Board("scheduled"),
+}
+
+
+class BoardWatcher(object):
+    """
+    Polls one kind of airport board (arrived, departed, enroute or scheduled) and reports only what changed since
+    the previous poll of the same airport, keyed by faFlightID:
+
+        watcher = BoardWatcher(client, "arrived")
+        while True:
+            for delta in watcher.poll_many(airports):
+                handle(delta.added, delta.changed, delta.removed)
+            time.sleep(60)
+
+    Arrived and Departed list the newest flights first and do not change flights already on them, so once a poll
+    reaches a flight it has seen before it stops paging; flights leave those boards when they are older than
+    retention seconds. Enroute and Scheduled are fetched in full every poll.
+    """
+    def __init__(self, client, board, filter=TrafficFilter.ALL, page_size=None, retention=DAY, clock=time.time):
+        """
+        client      a Client
+        board       "arrived", "departed", "enroute" or "scheduled"
+        filter      TrafficFilter value passed through to FlightXML
+        page_size   records per call; defaults to the client's maximum result size
+        retention   seconds a flight stays on a newest-first board (FlightXML keeps 24 hours)
+        clock       time source, for tests
+        """
+        if board not in BOARDS:
+            raise ValueError("unknown board {!r}".format(board))
+        self.client = client
+        self.board = BOARDS[board]
+        self.filter = filter
+        self.page_size = page_size
+        self.retention = retention
+        self.clock = clock
+        self.snapshots = {}
+
+    def _records(self, airport):
+        iterate = getattr(self.client, "iter_{}".format(self.board.name))
+        return iterate(airport, filter=self.filter, page_size=self.page_size, models=False)
+
+    def poll(self, airport):
+        """
+        Fetch the airport's board and return a BoardDelta against the previous poll. The first poll of an airport
+        reports every flight as added.
+        """
+        previous = self.snapshots.get(airport)
+        current = {}
+        added = []
+        changed = []
+        stopped_early = False
+        records = self._records(airport)
+        try:
+            for record in records:
+                flight_id = record.get("faFlightID")
+                if previous is not None and self.board.newest_first and flight_id in previous:
+                    stopped_early = True
+                    break
+                if previous is None or flight_id not in previous:
+                    added.append(record)
+                elif previous[flight_id] != record:
+                    changed.append(record)
+                current[flight_id] = record
+        finally:
+            records.close()
+
+        removed = []
+        if previous is not None:
+            if self.board.newest_first:
+                # Only the newest flights were fetched; carry the rest over until they age off the board
+                cutoff = self.clock() - self.retention
+                for flight_id, record in previous.items():
+                    if flight_id in current:
+                        continue
+                    if (record.get(self.board.time_field) or 0) < cutoff:
+                        removed.append(record)
+                    else:
+                        current[flight_id] = record
+            else:
+                removed = [record for flight_id, record in previous.items() if flight_id not in current]
+        logger.debug("%s %s: %d added, %d changed, %d removed%s", airport, self.board.name, len(added), len(changed),
+                     len(removed), " (stopped at a seen flight)" if stopped_early else "")
+
+        self.snapshots[airport] = current
+        return BoardDelta(airport, self.board.name, added, changed, removed)
+
+    def poll_many(self, airports, max_workers=DEFAULT_BATCH_WORKERS):
+        """
+        Poll several airports on a thread pool and return their BoardDeltas in input order.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.poll, airports))
+
+    def forget(self, airport=None):
+        """
+        Drop the stored board of an airport (or of all airports), so the next poll reports it afresh.
+        """
+        if airport is None:
+            self.snapshots.clear()
+        else:
+            self.snapshots.pop(airport, None)
@@ -0,0 +1,253 @@
+import json
+import time
+import asyncio
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger("flightaware.webhook")
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_MAX_BODY = 1024 * 1024
+DEFAULT_HEADER_TIMEOUT = 10.0
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+# One pushed alert. eventcode is e.g. "departure", "arrival", "diverted", "cancelled" or "filed"; flight is the
+# FlightInfoEx-style record of the flight; received is the local time it arrived.
+AlertEvent = namedtuple("AlertEvent", ["eventcode", "alert_id", "summary", "long_desc", "flight", "received"])
+
+
+def parse_alert(body):
+    """
+    Validate and decode the JSON body of a pushed alert into an AlertEvent. Raises ValueError when it is not one.
+    """
+    try:
+        message = json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        raise ValueError("body is not JSON")
+    if not isinstance(message, dict):
+        raise ValueError("body is not a JSON object")
+    eventcode = message.get("eventcode")
+    if not isinstance(eventcode, str) or not eventcode:
+        raise ValueError("missing eventcode")
+    flight = message.get("flight")
+    if not isinstance(flight, dict):
+        raise ValueError("missing flight")
+    alert_id = message.get("alert_id")
+    try:
+        alert_id = int(alert_id) if alert_id not in (None, "") else None
+    except (TypeError, ValueError):
+        raise ValueError("bad alert_id {!r}".format(alert_id))
+    return AlertEvent(eventcode, alert_id, message.get("summary"), message.get("long_desc"), flight, time.time())
+
+
+class AlertReceiver(object):
+    """
+    asyncio HTTP endpoint for the alerts FlightXML pushes to the address given to RegisterAlertEndpoint:
+
+        receiver = AlertReceiver(port=8080, path="/flightaware/s3cret")
+        receiver.on("arrival", handle_arrival)          # or: async for event in receiver: ...
+        async with receiver:
+            await receiver.serve_forever()
+
+    Each valid POST is parsed into an AlertEvent and put on a queue of queue_size events, and answered at once.
+    When the queue is full the POST gets a 503, so that the sender backs off instead of the receiver buffering
+    without bound. With handlers registered, workers tasks take events off the queue and pass them to the handlers
+    for their eventcode (and to those registered for "*"); handlers may be plain functions or coroutine functions.
+    Without handlers, events are read with get() or by iterating over the receiver.
+
+    FlightXML does not sign its pushes, so only POSTs to path are accepted; registering an address with a hard to
+    guess path keeps others from injecting events.
+    """
+    def __init__(self, host="0.0.0.0", port=8080, path="/", queue_size=DEFAULT_QUEUE_SIZE, workers=4,
+                 max_body=DEFAULT_MAX_BODY, header_timeout=DEFAULT_HEADER_TIMEOUT):
+        """
+        host            address to listen on
+        port            port to listen on; 0 picks a free one (see the port attribute once started)
+        path            the only request path accepted
+        queue_size      events accepted but not yet handled before POSTs are refused with 503
+        workers         tasks running handlers
+        max_body        largest body accepted, in bytes
+        header_timeout  seconds a client has to send a request's headers, and again its body, so idle and
+                        stalled sockets do not pile up
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.queue_size = queue_size
+        self.workers = workers
+        self.max_body = max_body
+        self.header_timeout = header_timeout
+        self.handlers = {}
+        self.received = 0
+        self.rejected = 0
+        self.invalid = 0
+        self.queue = None
+        self._server = None
+        self._tasks = []
+
+    def on(self, eventcode, handler):
+        """
+        Call handler(event) for every event with this eventcode, or for every event when eventcode is "*".
+        Registering the first handler on a running receiver starts the workers.
+        """
+        self.handlers.setdefault(eventcode, []).append(handler)
+        if self._server is not None and not self._tasks:
+            self._start_workers()
+        return handler
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.handlers:
+            self._start_workers()
+        logger.info("receiving alerts on %s:%d%s", self.host, self.port, self.path)
+        return self
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stop accepting connections, then let the workers finish the events already queued.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._tasks:
+            await self.queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def get(self):
+        """
+        Next event, waiting for one if need be. Only meaningful when no handlers are registered.
+        """
+        event = await self.queue.get()
+        self.queue.task_done()
+        return event
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    def _start_workers(self):
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def _work(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                # A failing handler is logged and does not keep the event from the others
+                for handler in self.handlers.get(event.eventcode, []) + self.handlers.get("*", []):
+                    try:
+                        result = handler(event)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception:
+                        logger.exception("alert handler %r failed for %s", handler, event.eventcode)
+            finally:
+                self.queue.task_done()
+
+    def _accept(self, body):
+        # Status code for a POST body
+        try:
+            event = parse_alert(body)
+        except ValueError as e:
+            self.invalid += 1
+            logger.warning("rejected alert: %s", e)
+            return 400
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return 503
+        self.received += 1
+        return 200
+
+    async def _serve(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive: enough for FlightXML's JSON POSTs and for load tests
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.header_timeout)
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.TimeoutError:
+                    await self._respond(writer, 408, False)
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 413, False)
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    await self._respond(writer, 400, False)
+                    break
+                verb, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                length = headers.get("content-length")
+                if length is None or not length.isdigit():
+                    await self._respond(writer, 411 if verb == "POST" else 405, False)
+                    break
+                length = int(length)
+                if length > self.max_body:
+                    await self._respond(writer, 413, False)
+                    break
+                try:
+                    body = await asyncio.wait_for(reader.readexactly(length), self.header_timeout)
+                except asyncio.TimeoutError:
+                    await self._respond(writer, 408, False)
+                    break
+
+                if verb != "POST":
+                    status = 405
+                elif target.split("?", 1)[0] != self.path:
+                    status = 404
+                else:
+                    status = self._accept(body)
+                await self._respond(writer, status, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, keep_alive):
+        headers = "HTTP/1.1 {} {}\r\nContent-Length: 0\r\n".format(status, REASONS[status])
+        if status == 503:
+            headers += "Retry-After: 1\r\n"
+        if not keep_alive:
+            headers += "Connection: close\r\n"
+        writer.write((headers + "\r\n").encode("ascii"))
+        await writer.drain()
@@ -19,6 +19,11 @@ config = {
     "install_requires": [
         "requests>=2.0.0",
     ],
+    "extras_require": {
+        "async": ["aiohttp>=3.0"],
+        "numpy": ["numpy"],
+        "arrow": ["pyarrow"],
+    },
     "keywords": "travel flightaware airline flight flight-tracking flight-data",
     "classifiers": [
         "Development Status :: 3 - Alpha",
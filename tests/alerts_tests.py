@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+
+try:
+    from urllib.parse import parse_qsl
+except ImportError:
+    from urlparse import parse_qsl
+
+from flightaware.alerts import alert_data, channel_events, plan_alerts
+from flightaware.async_client import AsyncClient
+from flightaware.client import Client
+from flightaware.exceptions import FlightAwareError
+from tests.fakes import FakeAsyncSession, FakeSession
+
+
+def channel(*events):
+    record = {"channel_id": 16, "channel_name": "FlightXML Push"}
+    record.update((event, True) for event in events)
+    return [record]
+
+
+LISTING = {"num_alerts": 4, "alerts": [
+    {"alert_id": 1, "ident": "SWA1", "origin": "", "destination": "", "aircrafttype": "", "enabled": True,
+     "date_start": 0, "date_end": 0, "channels": channel("e_departure", "e_arrival")},
+    {"alert_id": 2, "ident": "SWA2", "enabled": True, "channels": channel("e_arrival")},
+    {"alert_id": 3, "ident": "DAL3", "enabled": True, "channels": channel("e_arrival")},
+    {"alert_id": 4, "ident": "swa1", "enabled": True, "channels": channel("e_arrival")},
+]}
+
+DESIRED = [
+    {"ident": "SWA1", "channels": "{16 e_arrival e_departure}"},
+    {"ident": "SWA2", "channels": "{16 e_arrival e_cancelled}"},
+    {"ident": "UAL4", "origin": "KBNA", "channels": "{16 e_departure}"},
+]
+
+
+class TestPlan(unittest.TestCase):
+    def test_channel_events(self):
+        self.assertEqual(channel_events("{16 e_filed e_departure}"), frozenset(["e_filed", "e_departure"]))
+        self.assertEqual(channel_events(channel("e_diverted")), frozenset(["e_diverted"]))
+        self.assertEqual(channel_events(None), frozenset())
+
+    def test_minimal_diff(self):
+        plan = plan_alerts(LISTING, DESIRED)
+        self.assertEqual(plan.create, [DESIRED[2]])
+        self.assertEqual(plan.update, [(2, DESIRED[1])])
+        self.assertEqual(plan.delete, [3, 4])
+        self.assertEqual(plan_alerts(LISTING, DESIRED, delete_extra=False).delete, [4])
+        self.assertRaises(ValueError, plan_alerts, LISTING, DESIRED + DESIRED[:1])
+
+    def test_bad_listing(self):
+        for listing in [{"error": "ERROR: timeout"}, None, {}]:
+            self.assertRaises(FlightAwareError, plan_alerts, listing, DESIRED)
+        self.assertEqual(len(plan_alerts({"num_alerts": 0, "alerts": []}, DESIRED).create), 3)
+
+    def test_alert_data(self):
+        self.assertEqual(alert_data(ident="SWA1"), {"alert_id": 0, "ident": "SWA1", "enabled": True, "max_weekly": 1000})
+
+
+class TestSyncAlerts(unittest.TestCase):
+    def responder(self, method, data):
+        if isinstance(data, str):
+            data = dict(parse_qsl(data))
+            data["alert_id"] = int(data.get("alert_id", 0))
+        if method == "GetAlerts":
+            return {"GetAlertsResult": LISTING}
+        if method == "SetAlert":
+            if data.get("ident") == "UAL4":
+                return {"error": "OVERLIMIT"}
+            return {"SetAlertResult": data["alert_id"] or 99}
+        return {"DeleteAlertResult": 1}
+
+    def test_sync(self):
+        session = FakeSession(self.responder)
+        result = Client("user", "key", session=session).sync_alerts(DESIRED)
+        self.assertEqual([call[0] for call in session.calls].count("GetAlerts"), 1)
+        self.assertEqual(len(session.calls), 1 + 2 + 2)
+        self.assertEqual((result.created, result.updated, sorted(result.deleted)), ([], [2], [3, 4]))
+        self.assertEqual([item.data["ident"] for item in result.failed], ["UAL4"])
+
+    def test_failed_listing_changes_nothing(self):
+        session = FakeSession(lambda method, data: {"error": "ERROR: service unavailable"})
+        self.assertRaises(FlightAwareError, Client("user", "key", session=session).sync_alerts, DESIRED)
+        self.assertEqual([call[0] for call in session.calls], ["GetAlerts"])
+
+        async def run():
+            session = FakeAsyncSession(lambda method, data: {"error": "ERROR: service unavailable"})
+            async with AsyncClient("user", "key", session=session) as client:
+                with self.assertRaises(FlightAwareError):
+                    await client.sync_alerts(DESIRED)
+            return [call[0] for call in session.calls]
+        self.assertEqual(asyncio.run(run()), ["GetAlerts"])
+
+    def test_set_alert_channels_default(self):
+        session = FakeSession(self.responder)
+        Client("user", "key", session=session).set_alert(ident="SWA9")
+        self.assertNotIn("channels", session.calls[0][1])
+
+    def test_async(self):
+        async def run():
+            async with AsyncClient("user", "key", session=FakeAsyncSession(self.responder)) as client:
+                return await client.sync_alerts(DESIRED[:2])
+        result = asyncio.run(run())
+        self.assertEqual((result.created, result.updated, sorted(result.deleted), result.failed), ([], [2], [3, 4], []))
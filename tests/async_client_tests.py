@@ -0,0 +1,90 @@
+import asyncio
+import datetime
+import unittest
+
+from flightaware.async_client import AsyncClient, encode_form
+from tests.fakes import FakeAsyncSession
+
+
+def schedules(method, data):
+    return {"AirlineFlightSchedulesResult": {"next_offset": -1, "data": [
+        {"ident": "SWA1", "departuretime": 1400000000, "arrivaltime": 1400003600},
+    ]}}
+
+
+class TestAsyncClient(unittest.TestCase):
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_shares_result_processing(self):
+        async def go():
+            async with AsyncClient("user", "key", session=FakeAsyncSession(schedules)) as client:
+                return await client.airline_flight_schedules(
+                    datetime.datetime(2014, 5, 1), datetime.datetime(2014, 5, 2), origin="KBNA")
+        results = self.run_async(go())
+        self.assertIsInstance(results[0]["departure_time"], datetime.datetime)
+        self.assertIn("arrival_time", results[0])
+
+    def test_authorization_header(self):
+        session = FakeAsyncSession(lambda method, data: {"MetarResult": "ok"})
+
+        async def go():
+            async with AsyncClient("user", "key", session=session) as client:
+                return await client.metar("KBNA")
+        self.assertEqual(self.run_async(go()), "ok")
+        self.assertEqual(session.calls[0][2]["headers"]["Authorization"], "Basic dXNlcjprZXk=")
+
+    def test_gathers_many_calls(self):
+        session = FakeAsyncSession(lambda method, data: {"MetarResult": data})
+
+        async def go():
+            client = AsyncClient("user", "key", session=session, max_concurrency=4)
+            return await asyncio.gather(*[client.metar("K{:03d}".format(i)) for i in range(50)])
+        results = self.run_async(go())
+        self.assertEqual(len(results), 50)
+        self.assertEqual(len(session.calls), 50)
+        self.assertIn("airport=K007", session.calls[7][1])
+
+    def test_batch(self):
+        def responder(method, data):
+            if "BAD" in data:
+                raise IOError("connection reset")
+            return {"MetarResult": data}
+        session = FakeAsyncSession(responder)
+
+        async def go():
+            client = AsyncClient("user", "key", session=session)
+            return await client.batch("Metar", [{"airport": a} for a in ["KBNA", "BAD", "KJFK"]], timeout=(2, 9))
+        results = self.run_async(go())
+        self.assertEqual([r.index for r in results], [0, 1, 2])
+        self.assertIsInstance(results[1].error, IOError)
+        self.assertEqual(results[2].result, "airport=KJFK")
+        self.assertEqual(session.calls[0][2]["timeout"].sock_read, 9)
+
+    def test_paginate_with_prefetch(self):
+        def responder(method, data):
+            offset = int(data.split("offset=")[1].split("&")[0])
+            end = min(offset + 15, 40)
+            return {"EnrouteResult": {"next_offset": end if end < 40 else -1,
+                                      "enroute": [{"ident": i} for i in range(offset, end)]}}
+
+        async def go():
+            client = AsyncClient("user", "key", session=FakeAsyncSession(responder))
+            return [flight["ident"] async for flight in client.iter_enroute("KBNA", prefetch=True)]
+        self.assertEqual(self.run_async(go()), list(range(40)))
+
+    def test_stream(self):
+        airports = ["K{:03d}".format(i) for i in range(100)]
+        session = FakeAsyncSession(lambda method, data: {"AllAirportsResult": {"data": airports}})
+
+        async def go():
+            client = AsyncClient("user", "key", session=session)
+            return [airport async for airport in client.stream("AllAirports", chunk_size=16)]
+        self.assertEqual(self.run_async(go()), airports)
+
+    def test_encode_form_drops_none(self):
+        self.assertEqual(encode_form({"airport": "KBNA", "filter": None, "howMany": 15}), "airport=KBNA&howMany=15")
+
+
+if __name__ == "__main__":
+    unittest.main()
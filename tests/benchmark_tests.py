@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.fake_server import FakeFlightXMLServer, Payloads, RecordedPayloads
+from benchmarks.run import SCENARIOS, main, regressions, run_scenario, parse_args
+from flightaware.client import Client
+
+
+class TestFakeServer(unittest.TestCase):
+    def test_serves_pages_over_http(self):
+        with FakeFlightXMLServer(records=35) as server:
+            with Client("user", "key", base_url=server.base_url) as client:
+                flights = list(client.iter_enroute("KBNA", page_size=15))
+                self.assertEqual(len(client.all_airports()), 35)
+                self.assertEqual(len(client.get_last_track("SWA1", compact=True)), 35)
+        self.assertEqual([flight["ident"] for flight in flights], ["SWA{}".format(i) for i in range(35)])
+        self.assertEqual(server.requests, 5)
+
+    def test_recorded_payloads(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, "Metar.json"), "w") as f:
+            json.dump({"MetarResult": "recorded"}, f)
+        payloads = RecordedPayloads(directory, Payloads(3))
+        self.assertEqual(payloads("Metar", {}), {"MetarResult": "recorded"})
+        self.assertEqual(len(payloads("AllAirports", {})["AllAirportsResult"]["data"]), 3)
+
+
+class TestRun(unittest.TestCase):
+    def test_scenarios(self):
+        options = parse_args(["--records", "40", "--calls", "4", "--page-size", "15"])
+        with FakeFlightXMLServer(records=40) as server:
+            for name, function in SCENARIOS:
+                result = run_scenario(function, server.base_url, options)
+                self.assertEqual(result["operations"], 4 if "metar" in name else 40, name)
+                self.assertGreater(result["peak_bytes"], 0)
+
+    def test_regressions(self):
+        baseline = {"track": {"throughput": 100.0, "peak_bytes": 1000}}
+        self.assertEqual(regressions({"track": {"throughput": 90.0, "peak_bytes": 1100}}, baseline, 0.2), [])
+        self.assertEqual(len(regressions({"track": {"throughput": 70.0, "peak_bytes": 1300}}, baseline, 0.2)), 2)
+
+    def test_main_writes_results(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = os.path.join(directory, "results.json")
+        self.assertEqual(main(["--records", "20", "--scenario", "track", "--output", output]), 0)
+        with open(output) as f:
+            self.assertEqual(list(json.load(f)), ["track"])
+        self.assertEqual(main(["--records", "20", "--scenario", "track", "--compare", output, "--tolerance", "100"]), 0)
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from flightaware.cache import MISSING, SQLiteCache, TTLCache, cache_key
+from flightaware.client import Client
+from tests.fakes import FakeSession
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_expiry(self):
+        clock = FakeClock()
+        cache = TTLCache(clock=clock)
+        cache.set("k", "v", 10)
+        self.assertEqual(cache.get("k"), "v")
+        clock.now += 11
+        self.assertIs(cache.get("k"), MISSING)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1, 60)
+        cache.set("b", 2, 60)
+        cache.get("a")
+        cache.set("c", 3, 60)
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_key_normalizes_data(self):
+        self.assertEqual(cache_key("Enroute", {"airport": "KBNA", "filter": None, "howMany": 15}),
+                         cache_key("Enroute", {"howMany": 15, "airport": "KBNA"}))
+        self.assertNotEqual(cache_key("Metar", {"airport": "KBNA"}), cache_key("MetarEx", {"airport": "KBNA"}))
+
+
+class TestSQLiteCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shared_between_instances(self):
+        writer = SQLiteCache(self.path)
+        key = cache_key("AllAirports")
+        writer.set(key, ["KBNA", "KJFK"], writer.ttl_for("AllAirports"))
+        reader = SQLiteCache(self.path)
+        self.assertEqual(reader.get(key), ["KBNA", "KJFK"])
+        self.assertEqual(reader.stats()["hits"], 1)
+        writer.close()
+        reader.close()
+
+    def test_expiry_purge_and_invalidate(self):
+        clock = FakeClock()
+        cache = SQLiteCache(self.path, clock=clock)
+        cache.set(cache_key("AirportInfo", {"airportCode": "KBNA"}), {"name": "Nashville"}, 60)
+        cache.set(cache_key("AllAirlines"), ["SWA"], 600)
+        clock.now += 61
+        self.assertIs(cache.get(cache_key("AirportInfo", {"airportCode": "KBNA"})), MISSING)
+        self.assertEqual(cache.purge(), 1)
+        cache.invalidate("AllAirlines")
+        self.assertEqual(cache.stats()["size"], 0)
+        cache.close()
+
+    def test_only_reference_methods_by_default(self):
+        cache = SQLiteCache(self.path)
+        self.assertIsNotNone(cache.ttl_for("AllAirports"))
+        self.assertIsNone(cache.ttl_for("InFlightInfo"))
+        cache.close()
+
+
+class TestClientCache(unittest.TestCase):
+    def test_reference_calls_are_served_from_cache(self):
+        session = FakeSession(lambda method, data: {"{}Result".format(method): {"name": data["airportCode"]}})
+        cache = TTLCache()
+        client = Client("user", "key", session=session, cache=cache)
+        self.assertEqual(client.airport_info("KBNA"), {"name": "KBNA"})
+        self.assertEqual(client.airport_info("KBNA"), {"name": "KBNA"})
+        client.airport_info("KJFK")
+        self.assertEqual(len(session.calls), 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_uncached_methods_and_errors_go_upstream(self):
+        session = FakeSession(lambda method, data: {"error": "no data"})
+        client = Client("user", "key", session=session, cache=TTLCache())
+        client.airport_info("XXXX")
+        client.airport_info("XXXX")
+        client.arrived("KBNA")
+        client.arrived("KBNA")
+        self.assertEqual(len(session.calls), 4)
+
+
+    def test_writes_and_alert_listings_bypass_default_ttl(self):
+        session = FakeSession(lambda method, data: {"{}Result".format(method): True})
+        client = Client("user", "key", session=session, cache=TTLCache(default_ttl=60))
+        client.set_alert(0, "SWA1")
+        client.set_alert(0, "SWA1")
+        client.delete_alert(5)
+        client.delete_alert(5)
+        client.get_alerts()
+        client.get_alerts()
+        self.assertEqual([call[0] for call in session.calls],
+                         ["SetAlert", "SetAlert", "DeleteAlert", "DeleteAlert", "GetAlerts", "GetAlerts"])
+        self.assertEqual(TTLCache(default_ttl=60, ttls={"GetAlerts": 5}).ttl_for("GetAlerts"), 5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+
+from flightaware.client import Client, FlightAwareError
+from tests.fakes import FakeSession
+
+
+def echo(method, data):
+    return {"{}Result".format(method): {"data": [method, data]}}
+
+
+class TestClientSession(unittest.TestCase):
+    def test_reuses_session_and_applies_timeout(self):
+        session = FakeSession(echo)
+        client = Client("user", "key", session=session, timeout=(1, 2))
+        self.assertEqual(client.metar("KBNA"), ["Metar", {"airport": "KBNA"}])
+        client.metar("KJFK")
+        self.assertEqual(len(session.calls), 2)
+        self.assertEqual(session.calls[0][2]["timeout"], (1, 2))
+
+    def test_per_call_timeout(self):
+        session = FakeSession(echo)
+        client = Client("user", "key", session=session)
+        client._request("Metar", {"airport": "KBNA"}, timeout=7)
+        self.assertEqual(session.calls[0][2]["timeout"], 7)
+        client.batch("Metar", [{"airport": "KBNA"}, {"airport": "KATL"}], timeout=5)
+        self.assertEqual([call[2]["timeout"] for call in session.calls[1:]], [5, 5])
+
+    def test_per_call_timeout_while_paging(self):
+        def responder(method, data):
+            return {"EnrouteResult": {"enroute": [{"ident": "SWA1"}], "next_offset": -1}}
+        session = FakeSession(responder)
+        client = Client("user", "key", session=session)
+        self.assertEqual(len(list(client.iter_enroute("KBNA", timeout=(2, 9)))), 1)
+        self.assertEqual(session.calls[0][2]["timeout"], (2, 9))
+
+    def test_close_leaves_caller_session_open(self):
+        session = FakeSession(echo)
+        with Client("user", "key", session=session):
+            pass
+        self.assertFalse(session.closed)
+
+    def test_owned_session_is_pooled(self):
+        client = Client("user", "key", pool_maxsize=32)
+        adapter = client.session.get_adapter("http://flightxml.flightaware.com/")
+        self.assertEqual(adapter._pool_maxsize, 32)
+        client.close()
+
+
+class TestClientBatch(unittest.TestCase):
+    def test_batch_keeps_order_and_isolates_failures(self):
+        def responder(method, data):
+            if data["airport"] == "BAD":
+                raise IOError("connection reset")
+            return {"MetarResult": data["airport"]}
+        client = Client("user", "key", session=FakeSession(responder))
+        airports = ["KBNA", "BAD", "KJFK", "KLAX"]
+        results = client.batch("Metar", [{"airport": a} for a in airports], max_workers=3)
+        self.assertEqual([r.result for r in results], ["KBNA", None, "KJFK", "KLAX"])
+        self.assertIsInstance(results[1].error, IOError)
+        self.assertEqual(results[2].data, {"airport": "KJFK"})
+
+    def test_batch_as_completed_yields_everything(self):
+        client = Client("user", "key", session=FakeSession(echo))
+        results = list(client.batch_as_completed("Metar", [{"airport": i} for i in range(20)]))
+        self.assertEqual(sorted(r.index for r in results), list(range(20)))
+
+
+def arrivals_board(total):
+    def responder(method, data):
+        offset, how_many = data["offset"], data["howMany"]
+        end = min(offset + how_many, total)
+        return {"ArrivedResult": {
+            "next_offset": end if end < total else -1,
+            "arrivals": [{"faFlightID": "F{}".format(i)} for i in range(offset, end)],
+        }}
+    return responder
+
+
+class TestClientPagination(unittest.TestCase):
+    def test_iter_arrived_follows_next_offset(self):
+        session = FakeSession(arrivals_board(40))
+        client = Client("user", "key", session=session)
+        flights = list(client.iter_arrived("KBNA"))
+        self.assertEqual([f["faFlightID"] for f in flights], ["F{}".format(i) for i in range(40)])
+        self.assertEqual([call[1]["offset"] for call in session.calls], [0, 15, 30])
+
+    def test_iter_is_lazy(self):
+        session = FakeSession(arrivals_board(40))
+        client = Client("user", "key", session=session)
+        iterator = client.iter_arrived("KBNA", page_size=10)
+        next(iterator)
+        self.assertEqual(len(session.calls), 1)
+
+    def test_prefetch(self):
+        session = FakeSession(arrivals_board(33))
+        client = Client("user", "key", session=session)
+        flights = list(client.iter_arrived("KBNA", page_size=10, prefetch=True))
+        self.assertEqual(len(flights), 33)
+        self.assertEqual(sorted(call[1]["offset"] for call in session.calls), [0, 10, 20, 30])
+
+    def test_pages_with_negotiated_maximum(self):
+        board = arrivals_board(250)
+
+        def responder(method, data):
+            if method == "SetMaximumResultSize":
+                return {"SetMaximumResultSizeResult": 1}
+            return board(method, data)
+        session = FakeSession(responder)
+        client = Client("user", "key", session=session)
+        client.set_maximum_result_sizes(100)
+        self.assertEqual(client.max_result_size, 100)
+        self.assertEqual(len(list(client.iter_arrived("KBNA"))), 250)
+        self.assertEqual([call[1]["howMany"] for call in session.calls[1:]], [100, 100, 100])
+
+    def test_rejected_maximum_is_not_remembered(self):
+        client = Client("user", "key", session=FakeSession(lambda method, data: {"error": "not allowed"}))
+        client.set_maximum_result_sizes(100)
+        self.assertEqual(client.max_result_size, 15)
+
+    def test_error_record_raises(self):
+        client = Client("user", "key", session=FakeSession(lambda method, data: {"error": "UNKNOWN_AIRPORT"}))
+        self.assertRaises(FlightAwareError, list, client.iter_departed("XXXX"))
+
+
+if __name__ == "__main__":
+    unittest.main()
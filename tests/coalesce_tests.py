@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from flightaware.async_client import AsyncClient
+from flightaware.client import Client
+from flightaware.coalesce import SingleFlight
+from tests.fakes import FakeAsyncResponse, FakeAsyncSession, FakeSession
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while not calls:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["result"] * 8)
+        self.assertEqual(len(flight), 0)
+
+    def test_errors_reach_caller(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise IOError("down")
+        self.assertRaises(IOError, flight.do, "key", fail)
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+
+
+class SlowAsyncResponse(FakeAsyncResponse):
+    async def read(self):
+        await asyncio.sleep(0.01)
+        return await super(SlowAsyncResponse, self).read()
+
+
+class SlowAsyncSession(FakeAsyncSession):
+    def post(self, url, data=None, **kwargs):
+        return SlowAsyncResponse(super(SlowAsyncSession, self).post(url, data, **kwargs).payload)
+
+
+class TestClientCoalescing(unittest.TestCase):
+    def test_async_identical_calls_coalesce(self):
+        session = SlowAsyncSession(lambda method, data: {"InFlightInfoResult": {"ident": "UAL123"}})
+
+        async def go():
+            client = AsyncClient("user", "key", session=session, coalesce=True)
+            return await asyncio.gather(*[client.in_flight_info("UAL123") for _ in range(20)]
+                                        + [client.in_flight_info("DAL1")])
+        results = asyncio.run(go())
+        self.assertEqual(len(results), 21)
+        self.assertEqual(len(session.calls), 2)
+
+    def test_write_methods_are_not_coalesced(self):
+        session = FakeSession(lambda method, data: {"DeleteAlertResult": 1})
+        client = Client("user", "key", session=session, coalesce=True)
+        client.batch("DeleteAlert", [{"alert_id": 1}] * 4)
+        self.assertEqual(len(session.calls), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
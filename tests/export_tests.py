@@ -0,0 +1,91 @@
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+
+from flightaware import export
+from flightaware.client import Client
+from flightaware.export import BOARD_SCHEMA, column_batches
+from tests.fakes import FakeSession
+
+
+def arrivals(count):
+    return [{"faFlightID": "SWA{}-1".format(i), "ident": "SWA{}".format(i), "origin": "KBNA", "destination": "KATL",
+             "actualdeparturetime": 1400000000 + i, "actualarrivaltime": 0, "extra": "ignored"} for i in range(count)]
+
+
+class TestColumnBatches(unittest.TestCase):
+    def test_batches(self):
+        batches = list(column_batches(iter(arrivals(5)), BOARD_SCHEMA, batch_size=2))
+        self.assertEqual([len(batch["ident"]) for batch in batches], [2, 2, 1])
+        self.assertEqual(batches[0]["actualdeparturetime"], [1400000000, 1400000001])
+        self.assertEqual(batches[0]["actualarrivaltime"], [None, None])
+        self.assertEqual(batches[0]["aircrafttype"], [None, None])
+        self.assertNotIn("extra", batches[0])
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_csv_from_paginator(self):
+        records = arrivals(7)
+
+        def responder(method, data):
+            start = data["offset"]
+            end = min(len(records), start + data["howMany"])
+            return {"ArrivedResult": {"arrivals": records[start:end], "next_offset": end if end < len(records) else -1}}
+
+        path = os.path.join(self.directory, "arrivals.csv")
+        client = Client("user", "key", session=FakeSession(responder))
+        self.assertEqual(export.export(client.iter_arrived("KBNA", page_size=3), path, "Arrived", batch_size=2), 7)
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1]["actualdeparturetime"], "2014-05-13T16:53:21Z")
+        self.assertEqual(rows[1]["actualarrivaltime"], "")
+
+    def test_csv_from_models(self):
+        def responder(method, data):
+            return {"ArrivedResult": {"arrivals": arrivals(2), "next_offset": -1}}
+
+        path = os.path.join(self.directory, "arrivals.csv")
+        client = Client("user", "key", session=FakeSession(responder), models=True)
+        self.assertEqual(export.export(client.iter_arrived("KBNA"), path, "Arrived"), 2)
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual((rows[1]["ident"], rows[1]["faFlightID"]), ("SWA1", "SWA1-1"))
+        self.assertEqual(rows[1]["actualdeparturetime"], "2014-05-13T16:53:21Z")
+        self.assertEqual(rows[1]["actualarrivaltime"], "")
+
+    def test_bad_arguments(self):
+        path = os.path.join(self.directory, "x.csv")
+        self.assertRaises(ValueError, export.export, [], path, "Metar")
+        self.assertRaises(ValueError, export.export, [], path, "Arrived", format="xls")
+
+    def test_columnar_needs_pyarrow(self):
+        original, export.pyarrow = export.pyarrow, None
+        self.addCleanup(setattr, export, "pyarrow", original)
+        for name in ("arrivals.parquet", "arrivals.arrow"):
+            path = os.path.join(self.directory, name)
+            self.assertRaises(ImportError, export.export, arrivals(5), path, "Arrived")
+            self.assertFalse(os.path.exists(path))
+
+    def test_columnar(self):
+        path = os.path.join(self.directory, "arrivals.parquet")
+        if export.pyarrow is None:
+            self.assertRaises(ImportError, export.export, arrivals(5), path, "Arrived")
+            self.assertFalse(os.path.exists(path))
+            return
+        self.assertEqual(export.export(arrivals(5), path, "Arrived", batch_size=2), 5)
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.column_names, [name for name, _ in BOARD_SCHEMA])
+
+        path = os.path.join(self.directory, "arrivals.arrow")
+        export.export(arrivals(5), path, "Arrived", batch_size=2)
+        with pyarrow.OSFile(path, "rb") as source:
+            self.assertEqual(pyarrow.ipc.open_file(source).read_all().num_rows, 5)
@@ -0,0 +1,84 @@
+import json
+
+
+class FakeResponse(object):
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode("utf-8")
+
+    def json(self):
+        return json.loads(self.content.decode("utf-8"))
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeSession(object):
+    """
+    Stands in for requests.Session. responder(method, data) returns the decoded JSON body for a call, or a
+    FakeResponse to control the status code.
+    """
+    def __init__(self, responder):
+        self.responder = responder
+        self.calls = []
+        self.closed = False
+
+    def post(self, url, data=None, **kwargs):
+        method = url.rsplit("/", 1)[-1]
+        self.calls.append((method, data, kwargs))
+        result = self.responder(method, data)
+        return result if isinstance(result, FakeResponse) else FakeResponse(result)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStreamReader(object):
+    def __init__(self, content):
+        self.content = content
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.content), size):
+            yield self.content[start:start + size]
+
+
+class FakeAsyncResponse(object):
+    def __init__(self, payload, status=200):
+        self.payload = payload
+        self.status = status
+        self.content = FakeStreamReader(json.dumps(payload).encode("utf-8"))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        pass
+
+    async def json(self, content_type="application/json"):
+        return json.loads(json.dumps(self.payload))
+
+    async def read(self):
+        return json.dumps(self.payload).encode("utf-8")
+
+
+class FakeAsyncSession(object):
+    """
+    Stands in for aiohttp.ClientSession; see FakeSession.
+    """
+    def __init__(self, responder):
+        self.responder = responder
+        self.calls = []
+        self.closed = False
+
+    def post(self, url, data=None, **kwargs):
+        method = url.rsplit("/", 1)[-1]
+        self.calls.append((method, data, kwargs))
+        return FakeAsyncResponse(self.responder(method, data))
+
+    async def close(self):
+        self.closed = True
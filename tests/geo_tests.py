@@ -0,0 +1,62 @@
+import unittest
+from fractions import Fraction
+
+from flightaware import geo
+from flightaware.client import Client
+from tests.fakes import FakeSession
+
+BNA = (36.1244722, -86.6781944)
+ATL = (33.6366996, -84.4278640)
+LHR = (51.4700223, -0.4542955)
+
+
+class TestGeo(unittest.TestCase):
+    def test_distance(self):
+        self.assertAlmostEqual(geo.distance(BNA[0], BNA[1], ATL[0], ATL[1]), 214, delta=1)
+        self.assertAlmostEqual(geo.distance(BNA[0], BNA[1], LHR[0], LHR[1]), 4171, delta=5)
+        self.assertEqual(geo.distance(BNA[0], BNA[1], BNA[0], BNA[1]), 0)
+
+    def test_heading(self):
+        self.assertAlmostEqual(geo.heading(0, 0, 10, 0), 0)
+        self.assertAlmostEqual(geo.heading(0, 0, 0, 10), 90)
+        self.assertAlmostEqual(geo.heading(0, 0, -10, 0), 180)
+        self.assertAlmostEqual(geo.heading(0, 0, 0, -10), 270)
+
+    def test_vectorized_matches_scalar(self):
+        lats = [BNA[0], ATL[0], LHR[0]]
+        lons = [BNA[1], ATL[1], LHR[1]]
+        distances = geo.distances(lats, lons, ATL[0], ATL[1])
+        headings = geo.headings(lats, lons, ATL[0], ATL[1])
+        for index in range(3):
+            self.assertAlmostEqual(distances[index], geo.distance(lats[index], lons[index], ATL[0], ATL[1]))
+            self.assertAlmostEqual(headings[index] % 360, geo.heading(lats[index], lons[index], ATL[0], ATL[1]) % 360)
+
+
+    def test_other_real_scalars(self):
+        self.assertFalse(geo.is_vector(Fraction(36), 1, 2.0, True))
+        self.assertEqual(geo.distances([BNA[0]], [BNA[1]], Fraction(BNA[0]), BNA[1])[0], 0)
+
+    @unittest.skipIf(geo.numpy is None, "numpy not installed")
+    def test_numpy_scalars(self):
+        numpy = geo.numpy
+        self.assertFalse(geo.is_vector(numpy.int64(36), numpy.float32(-86.5), numpy.float64(33.6), numpy.array(1.0)))
+        self.assertTrue(geo.is_vector(numpy.array([1.0]), 2))
+
+class TestClientGeo(unittest.TestCase):
+    def test_local_by_default(self):
+        session = FakeSession(lambda method, data: {"{}Result".format(method): 214})
+        client = Client("user", "key", session=session)
+        self.assertEqual(client.lat_lng_to_distance(BNA[0], BNA[1], ATL[0], ATL[1]), 214)
+        self.assertEqual(list(client.lat_lng_to_distance([BNA[0], ATL[0]], [BNA[1], ATL[1]], ATL[0], ATL[1])), [214, 0])
+        self.assertIn(client.lat_lng_to_heading(BNA[0], BNA[1], ATL[0], ATL[1]), range(135, 150))
+        self.assertEqual(session.calls, [])
+
+    def test_remote(self):
+        session = FakeSession(lambda method, data: {"{}Result".format(method): 214})
+        client = Client("user", "key", session=session)
+        self.assertEqual(client.lat_lng_to_distance(BNA[0], BNA[1], ATL[0], ATL[1], remote=True), 214)
+        self.assertEqual(session.calls[0][0], "LatLongsToDistance")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+
+from flightaware.async_client import AsyncClient
+from flightaware.cache import TTLCache
+from flightaware.client import Client
+from flightaware.metrics import Instrumentation, MetricsCollector
+from flightaware.ratelimit import RateLimiter
+from flightaware.retry import RetryPolicy
+from tests.fakes import FakeAsyncResponse, FakeAsyncSession, FakeResponse, FakeSession
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_callbacks(self):
+        seen = []
+        hooks = Instrumentation(on_request=lambda method: seen.append(("request", method)),
+                                on_response=lambda method, latency, status, size, decode: seen.append(("response", size)))
+        client = Client("user", "key", session=FakeSession(lambda method, data: {"MetarResult": "x"}),
+                        instrumentation=hooks)
+        client.metar("KBNA")
+        self.assertEqual(seen, [("request", "Metar"), ("response", len(b'{"MetarResult": "x"}'))])
+        self.assertRaises(TypeError, Instrumentation, on_whatever=print)
+
+
+class TestMetricsCollector(unittest.TestCase):
+    def test_counts_everything(self):
+        statuses = [503, 200, 200]
+
+        def responder(method, data):
+            return FakeResponse({"{}Result".format(method): {"name": "Nashville"}}, status_code=statuses.pop(0))
+        metrics = MetricsCollector()
+        client = Client("user", "key", session=FakeSession(responder), instrumentation=metrics, cache=TTLCache(),
+                        retry=RetryPolicy(backoff=0.001))
+        client.airport_info("KBNA")
+        client.airport_info("KBNA")
+        client.enroute("KBNA")
+
+        stats = metrics.snapshot()
+        self.assertEqual(stats["AirportInfo"]["requests"], 2)
+        self.assertEqual(stats["AirportInfo"]["errors"], 1)
+        self.assertEqual(stats["AirportInfo"]["retries"], 1)
+        self.assertEqual((stats["AirportInfo"]["cache_hits"], stats["AirportInfo"]["cache_misses"]), (1, 1))
+        self.assertGreater(stats["Enroute"]["bytes_received"], 0)
+        self.assertEqual(set(stats["Enroute"]["latency"]), set([50, 95, 99]))
+
+    def test_percentiles(self):
+        metrics = MetricsCollector()
+        for latency in range(1, 101):
+            metrics.on_response("Metar", latency / 100.0, 200, 10, 0.0)
+        self.assertEqual(metrics.percentiles("Metar"), {50: 0.51, 95: 0.96, 99: 1.0})
+        self.assertEqual(metrics.percentiles("Enroute"), {})
+
+    def test_prometheus_export(self):
+        metrics = MetricsCollector()
+        metrics.on_request("Metar")
+        metrics.on_response("Metar", 0.2, 200, 123, 0.001)
+        text = metrics.to_prometheus()
+        self.assertIn('flightaware_requests_total{method="Metar"} 1', text)
+        self.assertIn('flightaware_response_bytes_total{method="Metar"} 123', text)
+        self.assertIn('flightaware_request_duration_seconds_bucket{method="Metar",le="0.1"} 0', text)
+        self.assertIn('flightaware_request_duration_seconds_bucket{method="Metar",le="0.25"} 1', text)
+        self.assertIn('flightaware_request_duration_seconds_count{method="Metar"} 1', text)
+
+    def test_async_client(self):
+        metrics = MetricsCollector()
+
+        async def go():
+            client = AsyncClient("user", "key", session=FakeAsyncSession(lambda method, data: {"MetarResult": "x"}),
+                                 instrumentation=metrics)
+            await client.metar("KBNA")
+        asyncio.run(go())
+        self.assertEqual(metrics.snapshot()["Metar"]["requests"], 1)
+        self.assertGreater(metrics.snapshot()["Metar"]["bytes_received"], 0)
+
+    def test_throttling_is_not_latency(self):
+        metrics = MetricsCollector()
+        limiter = RateLimiter({3: (10, 1)})
+        client = Client("user", "key", session=FakeSession(lambda method, data: {"MetarResult": "x"}),
+                        instrumentation=metrics, rate_limiter=limiter)
+        for _ in range(3):
+            client.metar("KBNA")
+
+        async def go():
+            async with AsyncClient("user", "key", session=FakeAsyncSession(lambda method, data: {"MetarExResult": {}}),
+                                   instrumentation=metrics, rate_limiter=limiter) as client:
+                for _ in range(3):
+                    await client.metar_ex("KBNA")
+        asyncio.run(go())
+        for method in ("Metar", "MetarEx"):
+            self.assertLess(max(metrics.methods[method].recent), 0.05)
+
+    def test_stream_events(self):
+        seen = []
+        hooks = Instrumentation(on_request=lambda method: seen.append("request"),
+                                on_response=lambda method, latency, status, size, decode: seen.append(size),
+                                on_error=lambda method, error, latency: seen.append("error"))
+        payload = {"AllAirportsResult": {"data": ["KBNA", "KATL"]}}
+        client = Client("user", "key", session=FakeSession(lambda method, data: payload), instrumentation=hooks)
+        self.assertEqual(list(client.stream("AllAirports")), ["KBNA", "KATL"])
+        self.assertEqual(seen, ["request", len(FakeResponse(payload).content)])
+
+        del seen[:]
+        client = Client("user", "key", session=FakeSession(lambda method, data: {"error": "no"}), instrumentation=hooks)
+        self.assertRaises(Exception, list, client.stream("AllAirports"))
+        self.assertEqual(seen, ["request", "error"])
+
+        del seen[:]
+
+        async def go():
+            async with AsyncClient("user", "key", session=FakeAsyncSession(lambda method, data: payload),
+                                   instrumentation=hooks) as client:
+                return [record async for record in client.stream("AllAirports")]
+        self.assertEqual(asyncio.run(go()), ["KBNA", "KATL"])
+        self.assertEqual(seen, ["request", len(FakeResponse(payload).content)])
+
+    def test_async_retryable_status_is_a_response(self):
+        statuses = [503, 200]
+
+        class Session(FakeAsyncSession):
+            def post(self, url, data=None, **kwargs):
+                return FakeAsyncResponse({"MetarResult": "ok"}, status=statuses.pop(0))
+
+        metrics = MetricsCollector()
+
+        async def go():
+            async with AsyncClient("user", "key", session=Session(None), instrumentation=metrics,
+                                   retry=RetryPolicy(backoff=0.001)) as client:
+                return await client.metar("KBNA")
+        self.assertEqual(asyncio.run(go()), "ok")
+        stats = metrics.snapshot()["Metar"]
+        self.assertEqual((stats["requests"], stats["errors"], stats["retries"]), (2, 1, 1))
+        self.assertEqual(metrics.methods["Metar"].responses, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+import asyncio
+import datetime
+import unittest
+
+from flightaware.async_client import AsyncClient
+from flightaware.client import Client
+from flightaware.models import Airport, Flight, Metar, Schedule, to_models
+from flightaware.timestamps import UTC
+from tests.fakes import FakeAsyncSession, FakeSession
+
+ENROUTE = {
+    "ident": "SWA1", "aircrafttype": "B737", "filed_departuretime": 1400000000, "actualdeparturetime": 1400000300,
+    "estimatedarrivaltime": 1400003600, "origin": "KBNA", "destination": "KATL", "originName": "Nashville Intl",
+    "originCity": "Nashville, TN", "destinationName": "Hartsfield-Jackson Intl", "destinationCity": "Atlanta, GA",
+    "faFlightID": "SWA1-1400000000-airline-0001",
+}
+
+
+class TestModels(unittest.TestCase):
+    def test_lazy_conversion(self):
+        flight = Flight.from_record(dict(ENROUTE, altitude="350", actualarrivaltime=0))
+        self.assertEqual(flight._converted, 0)
+        self.assertEqual(flight.departure_time, datetime.datetime(2014, 5, 13, 16, 58, 20, tzinfo=UTC))
+        self.assertIs(flight.departure_time, flight.departure_time)
+        self.assertEqual(flight.altitude, 350)
+        self.assertIsNone(flight.arrival_time)
+        self.assertIsNone(flight.heading)
+        self.assertEqual(flight.aircraft_type, "B737")
+        self.assertRaises(AttributeError, setattr, flight, "ident", "DAL2")
+        self.assertRaises(AttributeError, setattr, flight, "anything", 1)
+
+    def test_alternative_keys(self):
+        flight = Flight.from_record({"ident": "SWA1", "type": "B738", "departureTime": 1400000000})
+        self.assertEqual((flight.aircraft_type, flight.departure_time.year), ("B738", 2014))
+
+    def test_smaller_than_dicts(self):
+        flight = Flight.from_record(ENROUTE)
+        self.assertFalse(hasattr(flight, "__dict__"))
+        self.assertLess(sys.getsizeof(flight), sys.getsizeof(dict(ENROUTE)))
+
+    def test_to_dict_and_equality(self):
+        airport = Airport.from_record({"name": "Nashville Intl", "latitude": "36.1244722", "longitude": -86.6781944})
+        self.assertEqual(airport.to_dict()["latitude"], 36.1244722)
+        self.assertEqual(airport, Airport.from_record(airport.to_dict()))
+        self.assertIn("Nashville Intl", repr(airport))
+
+    def test_get(self):
+        flight = Flight.from_record(ENROUTE)
+        self.assertEqual(flight.get("aircrafttype"), "B737")
+        self.assertEqual(flight.get("aircraft_type"), "B737")
+        self.assertEqual(flight.get("actualdeparturetime").year, 2014)
+        self.assertEqual(flight.get("heading", 0), 0)
+        self.assertIsNone(flight.get("colour"))
+
+    def test_to_models(self):
+        result = to_models("MetarEx", {"next_offset": -1, "metar": [{"airport": "KBNA", "time": 1400000000}]})
+        self.assertIsInstance(result["metar"][0], Metar)
+        self.assertEqual(to_models("Enroute", {"error": "no"}), {"error": "no"})
+
+
+class TestClientModels(unittest.TestCase):
+    def responder(self, method, data):
+        if method == "Enroute":
+            return {"EnrouteResult": {"next_offset": -1, "enroute": [ENROUTE]}}
+        if method == "AirlineFlightSchedules":
+            return {"AirlineFlightSchedulesResult": {"next_offset": -1, "data": [
+                {"ident": "SWA1", "actual_ident": "", "departuretime": 1400000000, "seats_cabin_coach": 143}]}}
+        return {"AirportInfoResult": {"name": "Nashville Intl"}}
+
+    def test_client(self):
+        client = Client("user", "key", session=FakeSession(self.responder), models=True)
+        self.assertEqual(client.enroute("KBNA")["enroute"][0].ident, "SWA1")
+        self.assertEqual([flight.origin for flight in client.iter_enroute("KBNA")], ["KBNA"])
+        self.assertIsInstance(client.airport_info("KBNA"), Airport)
+        schedules = list(client.iter_airline_flight_schedules(datetime.datetime(2014, 5, 13),
+                                                              datetime.datetime(2014, 5, 14)))
+        self.assertIsInstance(schedules[0], Schedule)
+        self.assertEqual(schedules[0].seats_cabin_coach, 143)
+        self.assertIsInstance(Client("user", "key", session=FakeSession(self.responder)).airport_info("KBNA"), dict)
+        self.assertIsInstance(list(client.iter_enroute("KBNA", models=False))[0], dict)
+
+    def test_lazy_times_are_dicts(self):
+        client = Client("user", "key", session=FakeSession(self.responder), models=True)
+        start, end = datetime.datetime(2014, 5, 13), datetime.datetime(2014, 5, 14)
+        rows = list(client.iter_airline_flight_schedules(start, end, lazy_times=True))
+        self.assertEqual(rows[0]["departure_time"].year, 2014)
+        rows = client.airline_flight_schedules(start, end, lazy_times=True)
+        self.assertEqual(rows[0]["seats_cabin_coach"], 143)
+
+    def test_async_client(self):
+        async def run():
+            async with AsyncClient("user", "key", session=FakeAsyncSession(self.responder), models=True) as client:
+                return await client.enroute("KBNA"), [flight async for flight in client.iter_enroute("KBNA")]
+        result, flights = asyncio.run(run())
+        self.assertIsInstance(result["enroute"][0], Flight)
+        self.assertEqual(flights[0].destination, "KATL")
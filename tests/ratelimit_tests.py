@@ -0,0 +1,124 @@
+import os
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from flightaware.async_client import AsyncClient
+from flightaware.client import Client
+from flightaware.ratelimit import AdaptiveConcurrency, FileTokenBucket, RateLimiter, TokenBucket, fcntl
+from tests.fakes import FakeAsyncResponse, FakeAsyncSession, FakeSession
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=3, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.reserve(), 0.1)
+        self.assertAlmostEqual(bucket.reserve(), 0.2)
+        clock.now += 1
+        self.assertEqual(bucket.reserve(), 0)
+
+    @unittest.skipIf(fcntl is None, "fcntl not available")
+    def test_file_bucket_is_shared(self):
+        directory = tempfile.mkdtemp()
+        try:
+            clock = FakeClock()
+            path = os.path.join(directory, "bucket")
+            first = FileTokenBucket(path, rate=1, capacity=2, clock=clock)
+            second = FileTokenBucket(path, rate=1, capacity=2, clock=clock)
+            self.assertEqual(first.reserve(), 0)
+            self.assertEqual(second.reserve(), 0)
+            self.assertAlmostEqual(first.reserve(), 1.0)
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_limits_per_query_class(self):
+        limiter = RateLimiter({1: (1, 1)})
+        self.assertEqual(limiter.query_class("Search"), 1)
+        self.assertEqual(limiter.query_class("Enroute"), 2)
+        self.assertEqual(limiter.reserve("Search"), 0)
+        self.assertGreater(limiter.reserve("Search"), 0)
+        self.assertEqual(limiter.reserve("Enroute"), 0)
+
+    def test_client_is_throttled(self):
+        session = FakeSession(lambda method, data: {"MetarResult": "ok"})
+        client = Client("user", "key", session=session, rate_limiter=RateLimiter({3: (50, 1)}))
+        start = time.time()
+        for _ in range(6):
+            client.metar("KBNA")
+        self.assertGreaterEqual(time.time() - start, 0.09)
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def test_aimd(self):
+        controller = AdaptiveConcurrency(initial=4, minimum=1, maximum=5, target_latency=1.0)
+        for _ in range(20):
+            controller.acquire()
+            controller.release(0.1)
+        self.assertEqual(controller.limit, 5)
+        controller.acquire()
+        controller.release(0.1, error=True)
+        self.assertAlmostEqual(controller.limit, 3.5)
+        controller.acquire()
+        controller.release(5.0)
+        self.assertAlmostEqual(controller.limit, 2.45)
+
+    def test_blocks_at_limit(self):
+        controller = AdaptiveConcurrency(initial=1)
+        controller.acquire()
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (controller.acquire(), acquired.set()))
+        thread.start()
+        self.assertFalse(acquired.wait(0.05))
+        controller.release(0.01)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+    def test_client_reports_failures(self):
+        controller = AdaptiveConcurrency(initial=8)
+        client = Client("user", "key", session=FakeSession(lambda method, data: {"MetarResult": "ok"}),
+                        concurrency=controller)
+        client.metar("KBNA")
+        self.assertEqual(controller.in_flight, 0)
+        self.assertGreater(controller.limit, 8)
+
+
+    def test_async_client_follows_limit(self):
+        controller = AdaptiveConcurrency(initial=2, maximum=2)
+        in_flight = [0, 0]
+
+        class Response(FakeAsyncResponse):
+            async def read(self):
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+                await asyncio.sleep(0.01)
+                in_flight[0] -= 1
+                return await FakeAsyncResponse.read(self)
+
+        class Session(FakeAsyncSession):
+            def post(self, url, data=None, **kwargs):
+                return Response({"MetarResult": "ok"})
+
+        async def go():
+            async with AsyncClient("user", "key", session=Session(None), concurrency=controller) as client:
+                return await asyncio.gather(*[client.metar("KBNA") for _ in range(10)])
+        self.assertEqual(asyncio.run(go()), ["ok"] * 10)
+        self.assertEqual(in_flight[1], 2)
+        self.assertEqual(controller.in_flight, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import random
+import asyncio
+import threading
+import time
+import unittest
+
+import requests
+
+from flightaware.async_client import AsyncClient
+from flightaware.client import Client
+from flightaware.exceptions import FlightAwareError
+from flightaware.metrics import Instrumentation
+from flightaware.retry import HedgePolicy, RetryPolicy
+from tests.fakes import FakeAsyncResponse, FakeAsyncSession, FakeResponse, FakeSession
+
+
+def flaky(failures, failure):
+    remaining = [failures]
+    lock = threading.Lock()
+
+    def responder(method, data):
+        with lock:
+            remaining[0] -= 1
+            failing = remaining[0] >= 0
+        if failing:
+            if isinstance(failure, Exception):
+                raise failure
+            return FakeResponse(None, status_code=failure)
+        return {"{}Result".format(method): "ok"}
+    return responder
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_backoff_grows_with_jitter(self):
+        policy = RetryPolicy(backoff=1, max_backoff=5, random=lambda: 0.5)
+        self.assertEqual([policy.backoff_delay(attempt) for attempt in range(1, 5)], [1, 2, 2.5, 2.5])
+
+    def test_gives_up(self):
+        policy = RetryPolicy(max_attempts=2, random=lambda: 0)
+        self.assertEqual(policy.next_delay(1, None), 0)
+        self.assertIsNone(policy.next_delay(2, None))
+        self.assertIsNone(policy.next_delay(1, None, write=True))
+        self.assertIsNone(RetryPolicy(backoff=10, random=lambda: 0.9).next_delay(1, time.time() + 1))
+
+    def test_clip_timeout(self):
+        policy = RetryPolicy()
+        self.assertEqual(policy.clip_timeout((5, 30), None), (5, 30))
+        connect, read = policy.clip_timeout((5, 30), time.time() + 2)
+        self.assertEqual(connect, read)
+        self.assertLessEqual(read, 2)
+
+
+class TestClientRetry(unittest.TestCase):
+    def client(self, responder, **kwargs):
+        self.session = FakeSession(responder)
+        return Client("user", "key", session=self.session, retry=RetryPolicy(backoff=0.001, **kwargs))
+
+    def test_retries_statuses_and_connection_errors(self):
+        self.assertEqual(self.client(flaky(2, 503)).metar("KBNA"), "ok")
+        self.assertEqual(len(self.session.calls), 3)
+        self.assertEqual(self.client(flaky(1, requests.ConnectionError())).metar("KBNA"), "ok")
+
+    def test_raises_after_last_attempt(self):
+        client = self.client(flaky(5, 502))
+        self.assertRaises(FlightAwareError, client.metar, "KBNA")
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_writes_are_not_retried(self):
+        client = self.client(flaky(1, requests.ConnectionError()))
+        self.assertRaises(requests.ConnectionError, client.delete_alert, 7)
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_other_errors_are_not_retried(self):
+        client = self.client(flaky(1, ValueError("bad")))
+        self.assertRaises(ValueError, client.metar, "KBNA")
+
+
+class TestHedging(unittest.TestCase):
+    def test_slow_first_request_is_hedged(self):
+        calls = []
+
+        def responder(method, data):
+            calls.append(time.time())
+            if len(calls) == 1:
+                time.sleep(0.3)
+                return {"MetarResult": "slow"}
+            return {"MetarResult": "fast"}
+        client = Client("user", "key", session=FakeSession(responder), hedge=HedgePolicy(delay=0.02))
+        start = time.time()
+        self.assertEqual(client.metar("KBNA"), "fast")
+        self.assertLess(time.time() - start, 0.25)
+        self.assertEqual(len(calls), 2)
+        client.close()
+
+    def test_delay_follows_p95(self):
+        hedge = HedgePolicy(min_samples=10, min_delay=0)
+        self.assertEqual(hedge.delay_for("Metar"), 1.0)
+        for latency in range(100):
+            hedge.record("Metar", latency / 1000.0)
+        self.assertAlmostEqual(hedge.delay_for("Metar"), 0.095)
+
+    def test_steady_latency_keeps_hedge_rate_near_five_percent(self):
+        # Lognormal latencies around 2ms; with every first request's latency recorded, the delay settles at the p95
+        # and about one call in twenty is hedged
+        rng = random.Random(7)
+        lock = threading.Lock()
+
+        def responder(method, data):
+            with lock:
+                latency = rng.lognormvariate(-6.2, 0.5)
+            time.sleep(latency)
+            return {"MetarResult": "ok"}
+
+        hedges = []
+        hedge = HedgePolicy(min_delay=0, min_samples=20, window=200)
+        client = Client("user", "key", session=FakeSession(responder), hedge=hedge,
+                        instrumentation=Instrumentation(on_hedge=hedges.append))
+        for _ in range(100):
+            client.metar("KBNA")
+        warmed_up = len(hedges)
+        for _ in range(400):
+            client.metar("KBNA")
+        client.close()
+        self.assertLess((len(hedges) - warmed_up) / 400.0, 0.1)
+        self.assertGreater(hedge.delay_for("Metar"), 0.004)
+
+    def test_hedged_calls_record_first_latency(self):
+        hedge = HedgePolicy(delay=0.01)
+        responses = iter([0.1, 0])
+
+        def responder(method, data):
+            time.sleep(next(responses))
+            return {"MetarResult": "ok"}
+        client = Client("user", "key", session=FakeSession(responder), hedge=hedge)
+        client.metar("KBNA")
+        client.close()
+        time.sleep(0.15)
+        self.assertGreaterEqual(max(hedge._latencies["Metar"]), 0.1)
+
+    def test_async_hedge_and_retry(self):
+        statuses = [503, 200]
+
+        class Session(FakeAsyncSession):
+            def post(self, url, data=None, **kwargs):
+                self.calls.append(data)
+                return FakeAsyncResponse({"MetarResult": "ok"}, status=statuses.pop(0))
+
+        session = Session(None)
+
+        async def go():
+            client = AsyncClient("user", "key", session=session, retry=RetryPolicy(backoff=0.001),
+                                 hedge=HedgePolicy(delay=1))
+            return await client.metar("KBNA")
+        self.assertEqual(asyncio.run(go()), "ok")
+        self.assertEqual(len(session.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from flightaware.client import Client
+from flightaware.snapshot import PositionSnapshot, parse_query
+from tests.fakes import FakeSession
+
+FLIGHTS = [
+    {"ident": "UAL1", "type": "B772", "origin": "KSFO", "destination": "KLAX", "altitude": 350, "groundspeed": 480,
+     "latitude": 36.0, "longitude": -120.0, "prefix": "", "suffix": ""},
+    {"ident": "UAL22", "type": "B738", "origin": "KORD", "destination": "KSFO", "altitude": 90, "groundspeed": 250,
+     "latitude": 41.0, "longitude": -90.0, "prefix": "", "suffix": ""},
+    {"ident": "DAL5", "type": "B77W", "origin": "KATL", "destination": "KLAX", "altitude": 380, "groundspeed": 510,
+     "latitude": 34.0, "longitude": -100.0, "prefix": "H", "suffix": ""},
+    {"ident": "N12345", "type": "C172", "origin": "KBNA", "destination": "KMQY", "altitude": 45, "groundspeed": 110,
+     "latitude": 36.1, "longitude": -86.6, "prefix": "", "suffix": ""},
+]
+
+
+class TestParseQuery(unittest.TestCase):
+    def test_string_and_dict(self):
+        self.assertEqual(parse_query('-type B77* -latlong "30 -125 40 -110"'),
+                         {"type": "B77*", "latlong": "30 -125 40 -110"})
+        self.assertEqual(parse_query({"belowAltitude": 100}), {"belowAltitude": 100})
+        self.assertRaises(ValueError, parse_query, "-type")
+
+
+class TestPositionSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = PositionSnapshot(FLIGHTS)
+
+    def idents(self, query):
+        return [record["ident"] for record in self.snapshot.search(query)]
+
+    def test_wildcards(self):
+        self.assertEqual(self.idents("-type B77*"), ["UAL1", "DAL5"])
+        self.assertEqual(self.idents("-idents UAL* -type B73*"), ["UAL22"])
+        self.assertEqual(self.idents("-idents U?L1"), ["UAL1"])
+        self.assertEqual(self.idents("-idents UAL1,DAL5"), ["UAL1", "DAL5"])
+
+    def test_ranges(self):
+        self.assertEqual(self.idents("-belowAltitude 100 -aboveGroundspeed 200"), ["UAL22"])
+        self.assertEqual(self.idents('-latlong "30 -125 40 -110"'), ["UAL1"])
+        self.assertEqual(self.idents('-latlong "30 170 40 -100"'), ["UAL1", "DAL5"])
+
+    def test_airports_and_filters(self):
+        self.assertEqual(self.idents("-destination LAX -prefix H"), ["DAL5"])
+        self.assertEqual(self.idents("-destination KLAX -prefix H"), ["DAL5"])
+        self.assertEqual(self.idents("-origin SF?"), ["UAL1"])
+        self.assertEqual(self.idents("-destination MQY"), ["N12345"])
+        self.assertEqual(self.idents("-originOrDestination KSFO"), ["UAL1", "UAL22"])
+        self.assertEqual(self.idents("-filter ga"), ["N12345"])
+        self.assertEqual(self.snapshot.count({"filter": "airline"}), 3)
+
+    def test_unknown_key(self):
+        self.assertRaises(ValueError, self.snapshot.search, "-colour red")
+
+    def test_from_client(self):
+        def responder(method, data):
+            return {"SearchResult": {"next_offset": -1, "aircraft": FLIGHTS}}
+        session = FakeSession(responder)
+        snapshot = PositionSnapshot.from_client(Client("user", "key", session=session), {"inAir": 1})
+        self.assertEqual(len(snapshot), 4)
+        self.assertEqual(session.calls[0][1]["query"], "-inAir 1 ")
+
+    def test_from_models_client(self):
+        def responder(method, data):
+            return {"SearchBirdseyeInFlightResult": {"next_offset": -1, "aircraft": FLIGHTS}}
+        client = Client("user", "key", session=FakeSession(responder), models=True)
+        snapshot = PositionSnapshot.from_birdseye(client, "{true inAir}")
+        self.assertEqual(len(snapshot.search("-filter ga")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from flightaware import geo
+from flightaware.client import Client
+from flightaware.spatial import AirportIndex
+from tests.fakes import FakeSession
+
+AIRPORTS = {
+    "KBNA": (36.1244722, -86.6781944),
+    "KATL": (33.6366996, -84.4278640),
+    "KJFK": (40.6398262, -73.7787443),
+    "KLAX": (33.9424955, -118.4080684),
+    "EGLL": (51.4700223, -0.4542955),
+    "NZAA": (-37.0080556, 174.7916667),
+    "PHNL": (21.3187500, -157.9224444),
+    "NFFN": (-17.7553333, 177.4433611),
+}
+
+
+def build():
+    index = AirportIndex()
+    for code, (latitude, longitude) in AIRPORTS.items():
+        index.add(code, latitude, longitude)
+    return index
+
+
+class TestAirportIndex(unittest.TestCase):
+    def test_nearest(self):
+        index = build()
+        self.assertEqual(index.nearest(36.0, -86.5)[0][1], "KBNA")
+        self.assertEqual([code for _, code in index.nearest(36.0, -86.5, count=3)], ["KBNA", "KATL", "KJFK"])
+
+    def test_nearest_more_than_indexed(self):
+        index = build()
+        scanned = []
+        codes_in_cells = index._codes_in_cells
+
+        def counting(latitudes, longitudes):
+            scanned.append(latitudes)
+            return codes_in_cells(latitudes, longitudes)
+        index._codes_in_cells = counting
+        self.assertEqual(len(index.nearest(36.0, -86.5, count=20)), len(AIRPORTS))
+        self.assertLess(len(scanned), 200)
+
+    def test_nearest_matches_brute_force(self):
+        index = AirportIndex(cell_size=2.0)
+        rng = random.Random(7)
+        points = {}
+        for number in range(2000):
+            code = "A{}".format(number)
+            points[code] = (rng.uniform(-80, 80), rng.uniform(-180, 180))
+            index.add(code, *points[code])
+        for _ in range(50):
+            latitude, longitude = rng.uniform(-85, 85), rng.uniform(-180, 180)
+            expected = sorted((geo.distance(latitude, longitude, *position), code) for code, position in points.items())[:5]
+            self.assertEqual([code for _, code in index.nearest(latitude, longitude, count=5)],
+                             [code for _, code in expected])
+
+    def test_within_across_antimeridian(self):
+        index = build()
+        codes = [code for _, code in index.within(-17.0, 179.9, 1500)]
+        self.assertIn("NFFN", codes)
+        self.assertIn("NZAA", codes)
+        self.assertNotIn("PHNL", codes)
+
+    def test_bbox(self):
+        index = build()
+        self.assertEqual(sorted(index.bbox(30, -90, 41, -70)), ["KATL", "KBNA", "KJFK"])
+        self.assertEqual(sorted(index.bbox(-40, 170, -10, -170)), ["NFFN", "NZAA"])
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "airports.json")
+            build().save(path)
+            index = AirportIndex.load(path)
+            self.assertEqual(len(index), len(AIRPORTS))
+            self.assertEqual(index.nearest(51.5, -0.5)[0][1], "EGLL")
+        finally:
+            shutil.rmtree(directory)
+
+    def test_from_client(self):
+        def responder(method, data):
+            if method == "AllAirports":
+                return {"AllAirportsResult": {"data": list(AIRPORTS) + ["XXXX"]}}
+            code = data["airportCode"]
+            if code not in AIRPORTS:
+                return {"error": "unknown airport"}
+            latitude, longitude = AIRPORTS[code]
+            return {"AirportInfoResult": {"name": code, "latitude": latitude, "longitude": longitude}}
+        for models in (False, True):
+            index = AirportIndex.from_client(Client("user", "key", session=FakeSession(responder), models=models))
+            self.assertEqual(len(index), len(AIRPORTS))
+            self.assertEqual(index.info("KBNA")["name"], "KBNA")
+
+
+if __name__ == "__main__":
+    unittest.main()
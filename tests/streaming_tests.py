@@ -0,0 +1,82 @@
+import json
+import asyncio
+import unittest
+
+from flightaware.async_client import AsyncClient
+from flightaware.client import Client
+from flightaware.exceptions import FlightAwareError
+from flightaware.retry import RetryPolicy
+from flightaware.streaming import ArrayStreamParser, iter_array
+from tests.fakes import FakeAsyncResponse, FakeAsyncSession, FakeResponse, FakeSession
+
+
+def chunked(document, size):
+    raw = json.dumps(document).encode("utf-8")
+    return [raw[start:start + size] for start in range(0, len(raw), size)]
+
+
+class TestArrayStreamParser(unittest.TestCase):
+    def test_records_across_chunk_boundaries(self):
+        records = [{"ident": "N{}".format(i), "altitude": i * 10, "name": u"Zürich"} for i in range(50)]
+        document = {"SearchResult": {"next_offset": -1, "aircraft": records}}
+        for size in (1, 3, 7, 64, 10000):
+            self.assertEqual(list(iter_array(chunked(document, size), "aircraft")), records)
+
+    def test_numbers_split_between_chunks(self):
+        chunks = [b'{"XResult":{"data":[12', b'34, 5', b'6]}}']
+        self.assertEqual(list(iter_array(chunks, "data")), [1234, 56])
+
+    def test_yields_before_document_is_complete(self):
+        parser = ArrayStreamParser("data")
+        self.assertEqual(parser.feed(b'{"AllAirportsResult":{"data":["KBNA", "KJ'), ["KBNA"])
+        self.assertEqual(parser.feed(b'FK"]}}'), ["KJFK"])
+        self.assertEqual(parser.close(), [])
+
+    def test_error_record(self):
+        self.assertRaises(FlightAwareError, list, iter_array(chunked({"error": "NO_DATA"}, 4), "data"))
+
+    def test_truncated_response(self):
+        self.assertRaises(ValueError, list, iter_array([b'{"XResult":{"data":[1, 2'], "data"))
+
+    def test_body_without_the_array(self):
+        self.assertRaises(ValueError, list, iter_array([b"<html>Service Unavailable</html>"], "data"))
+        self.assertRaises(ValueError, list, iter_array(chunked({"XResult": {"next_offset": -1}}, 4), "data"))
+
+
+class TestClientStream(unittest.TestCase):
+    def test_stream_all_airports(self):
+        airports = ["K{:03d}".format(i) for i in range(500)]
+        session = FakeSession(lambda method, data: {"AllAirportsResult": {"data": airports}})
+        client = Client("user", "key", session=session)
+        self.assertEqual(list(client.stream("AllAirports", chunk_size=100)), airports)
+        self.assertTrue(session.calls[0][2]["stream"])
+
+    def test_error_status(self):
+        statuses = [503, 200]
+
+        def responder(method, data):
+            return FakeResponse({"AllAirportsResult": {"data": ["KBNA"]}}, statuses.pop(0))
+        client = Client("user", "key", session=FakeSession(responder), retry=RetryPolicy(backoff=0.001))
+        self.assertEqual(list(client.stream("AllAirports")), ["KBNA"])
+        self.assertEqual(statuses, [])
+
+        client = Client("user", "key", session=FakeSession(lambda method, data: FakeResponse("Unavailable", 503)))
+        self.assertRaises(FlightAwareError, list, client.stream("AllAirports"))
+
+    def test_async_error_status(self):
+        statuses = [503, 200]
+
+        class Session(FakeAsyncSession):
+            def post(self, url, data=None, **kwargs):
+                return FakeAsyncResponse({"AllAirportsResult": {"data": ["KBNA"]}}, statuses.pop(0))
+
+        async def go(retry):
+            async with AsyncClient("user", "key", session=Session(None), retry=retry) as client:
+                return [record async for record in client.stream("AllAirports")]
+        self.assertEqual(asyncio.run(go(RetryPolicy(backoff=0.001))), ["KBNA"])
+        statuses.append(503)
+        self.assertRaises(FlightAwareError, asyncio.run, go(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import datetime
+import threading
+import unittest
+
+from flightaware.client import Client
+from flightaware.sweep import ScheduleSweeper, dedupe_schedules
+from flightaware.timestamps import UTC
+from tests.fakes import FakeSession
+
+START = datetime.datetime(2015, 1, 1, tzinfo=UTC)
+T0 = 1420070400
+HOUR = 3600
+
+
+def schedule(ident, hour, actual_ident=""):
+    return {"ident": ident, "actual_ident": actual_ident, "departuretime": T0 + hour * HOUR,
+            "arrivaltime": T0 + hour * HOUR + 5400, "origin": "KBNA", "destination": "KATL"}
+
+
+class FakeSchedules(object):
+    # Serves AirlineFlightSchedules from a list of rows, honouring the date window and paging
+    def __init__(self, rows):
+        self.rows = rows
+        self.windows = []
+        self.served = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, method, data):
+        start, end = data["startDate"], data["endDate"]
+        with self.lock:
+            self.windows.append((start, end))
+        rows = [row for row in self.rows if start <= row["departuretime"] <= end]
+        offset = data["offset"]
+        page = rows[offset:offset + data["howMany"]]
+        next_offset = offset + len(page) if offset + len(page) < len(rows) else -1
+        with self.lock:
+            self.served += len(page)
+        return {"AirlineFlightSchedulesResult": {"next_offset": next_offset, "data": [dict(row) for row in page]}}
+
+
+class TestDedupe(unittest.TestCase):
+    def test_codeshares(self):
+        rows = [schedule("DAL100", 1, actual_ident="SWA1"), schedule("SWA1", 1), schedule("SWA1", 1),
+                schedule("SWA2", 2)]
+        deduped = dedupe_schedules([dict(row) for row in rows])
+        self.assertEqual([row["ident"] for row in deduped], ["SWA1", "SWA2"])
+        self.assertEqual(deduped[0]["codeshares"], ["DAL100"])
+        self.assertEqual(len(dedupe_schedules([dict(row) for row in rows], merge_codeshares=False)), 3)
+
+
+class TestScheduleSweeper(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_splits_dense_windows(self):
+        # Hour 30 is dense; everything else is sparse
+        rows = [schedule("SWA{}".format(hour), hour) for hour in range(0, 72, 6)]
+        rows += [schedule("DEN{}".format(index), 30) for index in range(3)]
+        rows += [schedule("DAL{}".format(index), 30, actual_ident="DEN{}".format(index)) for index in range(3)]
+        server = FakeSchedules(rows)
+        sweeper = ScheduleSweeper(Client("user", "key", session=FakeSession(server)), max_rows=4, page_size=2,
+                                  max_workers=4)
+        swept = list(sweeper.sweep(START, START + datetime.timedelta(days=3)))
+        self.assertEqual(sorted(row["ident"] for row in swept),
+                         sorted(["SWA{}".format(hour) for hour in range(0, 72, 6)] + ["DEN0", "DEN1", "DEN2"]))
+        self.assertGreater(sweeper.windows_split, 0)
+        self.assertTrue(all(end - start < 24 * HOUR for start, end in server.windows))
+
+    def test_split_keeps_fetched_rows(self):
+        rows = [schedule("SWA{}".format(hour), hour) for hour in range(48)]
+        server = FakeSchedules(rows)
+        sweeper = ScheduleSweeper(Client("user", "key", session=FakeSession(server)), max_rows=4, page_size=2,
+                                  max_workers=2)
+        swept = list(sweeper.sweep(START, START + datetime.timedelta(days=2)))
+        self.assertEqual(sorted(row["ident"] for row in swept), sorted(row["ident"] for row in rows))
+        self.assertGreater(sweeper.windows_split, 0)
+        # Only the page holding each cut is fetched twice
+        self.assertLessEqual(server.served, len(rows) + 2 * sweeper.windows_split)
+
+    def test_close_waits_for_fetches(self):
+        running = []
+
+        def slow(method, data):
+            running.append(1)
+            time.sleep(0.05 if data["startDate"] > T0 else 0)
+            result = FakeSchedules([schedule("SWA1", 1)])(method, data)
+            running.pop()
+            return result
+
+        sweeper = ScheduleSweeper(Client("user", "key", session=FakeSession(slow)), max_workers=2)
+        sweep = sweeper.sweep(START, START + datetime.timedelta(days=10))
+        next(sweep)
+        sweep.close()
+        self.assertEqual(running, [])
+
+    def test_checkpoint_resume(self):
+        rows = [schedule("SWA{}".format(hour), hour) for hour in range(0, 96, 12)]
+        path = os.path.join(self.directory, "sweep.json")
+        server = FakeSchedules(rows)
+        sweeper = ScheduleSweeper(Client("user", "key", session=FakeSession(server)), checkpoint=path, max_workers=1)
+        end = START + datetime.timedelta(days=4)
+        sweep = sweeper.sweep(START, end, origin="KBNA")
+        first = [next(sweep) for _ in range(3)]
+        sweep.close()
+        with open(path) as f:
+            self.assertEqual(len(json.load(f)["done"]), 1)
+
+        server.windows = []
+        rest = list(sweeper.sweep(START, end, origin="KBNA"))
+        self.assertEqual(len(server.windows), 3)
+        self.assertEqual(sorted(row["ident"] for row in first[:2] + rest), sorted(row["ident"] for row in rows))
+        self.assertRaises(ValueError, list, sweeper.sweep(START, end, origin="KATL"))
@@ -0,0 +1,106 @@
+import os
+import time
+import datetime
+import unittest
+
+from flightaware import timestamps
+from flightaware.cache import TTLCache
+from flightaware.client import Client
+from flightaware.timestamps import (UTC, LazyTimes, add_datetimes, datetime64_column, from_unix_timestamp,
+                                    to_unix_timestamp)
+from tests.fakes import FakeSession
+
+
+class TestConversion(unittest.TestCase):
+    def test_round_trip_is_utc(self):
+        value = from_unix_timestamp(1400000000)
+        self.assertEqual(value, datetime.datetime(2014, 5, 13, 16, 53, 20, tzinfo=UTC))
+        self.assertEqual(to_unix_timestamp(value), 1400000000)
+        self.assertEqual(to_unix_timestamp(value.replace(tzinfo=None)), 1400000000)
+        self.assertIsNone(to_unix_timestamp(None))
+        self.assertRaises(ValueError, to_unix_timestamp, 1400000000)
+
+    def test_aware_datetimes(self):
+        central = datetime.timezone(datetime.timedelta(hours=-5))
+        self.assertEqual(to_unix_timestamp(datetime.datetime(2014, 5, 13, 11, 53, 20, tzinfo=central)), 1400000000)
+
+    def test_independent_of_host_timezone(self):
+        if not hasattr(time, "tzset"):
+            self.skipTest("needs time.tzset")
+        previous = os.environ.get("TZ")
+        os.environ["TZ"] = "America/Chicago"
+        time.tzset()
+        try:
+            self.assertEqual(to_unix_timestamp(from_unix_timestamp(1400000000)), 1400000000)
+            self.assertEqual(from_unix_timestamp(0), timestamps.EPOCH)
+        finally:
+            if previous is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = previous
+            time.tzset()
+
+    def test_client_reexports(self):
+        from flightaware import client
+        self.assertIs(client.EPOCH, timestamps.EPOCH)
+        self.assertIs(client.from_unix_timestamp, from_unix_timestamp)
+        self.assertIs(client.to_unix_timestamp, to_unix_timestamp)
+
+
+class TestAddDatetimes(unittest.TestCase):
+    def records(self):
+        return [{"departuretime": 1400000000, "arrivaltime": 1400003600},
+                {"departuretime": 1400000000, "arrivaltime": None}]
+
+    def test_eager(self):
+        records = add_datetimes(self.records())
+        self.assertEqual(records[0]["departure_time"], from_unix_timestamp(1400000000))
+        self.assertIs(records[0]["departure_time"], records[1]["departure_time"])
+        self.assertIsNone(records[1]["arrival_time"])
+        self.assertEqual(add_datetimes({"error": "no"}), {"error": "no"})
+
+    def test_lazy(self):
+        records = add_datetimes(self.records(), lazy=True)
+        self.assertIsInstance(records[0], LazyTimes)
+        self.assertNotIn("arrival_time", list(records[0]))
+        self.assertIn("arrival_time", records[0])
+        self.assertEqual(records[0]["arrival_time"], from_unix_timestamp(1400003600))
+        self.assertEqual(records[0].get("departure_time"), from_unix_timestamp(1400000000))
+        self.assertIsNone(records[0].get("nothing"))
+        self.assertRaises(KeyError, lambda: records[0]["nothing"])
+
+    def test_client(self):
+        session = FakeSession(lambda method, data: {"AirlineFlightSchedulesResult": {"data": self.records()}})
+        client = Client("user", "key", session=session)
+        start = datetime.datetime(2014, 5, 13, tzinfo=UTC)
+        results = client.airline_flight_schedules(start, start + datetime.timedelta(days=1), lazy_times=True)
+        self.assertEqual(session.calls[0][1]["startDate"], 1399939200)
+        self.assertEqual(results[0]["departure_time"].tzinfo, UTC)
+
+    def test_copy(self):
+        records = self.records()
+        for lazy in (False, True):
+            converted = add_datetimes(records, lazy=lazy, copy=True)
+            self.assertEqual(converted[0]["departure_time"], from_unix_timestamp(1400000000))
+            self.assertEqual(records, self.records())
+
+    def test_cached_results_are_not_converted_in_place(self):
+        session = FakeSession(lambda method, data: {"AirlineFlightSchedulesResult": {"data": self.records()}})
+        client = Client("user", "key", session=session, cache=TTLCache(ttls={"AirlineFlightSchedules": 60}))
+        start = datetime.datetime(2014, 5, 13, tzinfo=UTC)
+        end = start + datetime.timedelta(days=1)
+        lazy = client.airline_flight_schedules(start, end, lazy_times=True)
+        eager = client.airline_flight_schedules(start, end)
+        self.assertEqual(len(session.calls), 1)
+        self.assertIsInstance(lazy[0], LazyTimes)
+        self.assertNotIsInstance(eager[0], LazyTimes)
+        self.assertNotIn("departure_time", list(lazy[0]))
+        self.assertEqual(eager[0]["departure_time"], from_unix_timestamp(1400000000))
+
+    def test_datetime64_column(self):
+        if timestamps.numpy is None:
+            self.assertRaises(ImportError, datetime64_column, self.records(), "arrivaltime")
+            return
+        column = datetime64_column(self.records(), "arrivaltime")
+        self.assertEqual(str(column[0]), "2014-05-13T17:53:20")
+        self.assertTrue(timestamps.numpy.isnat(column[1]))
@@ -0,0 +1,80 @@
+import sys
+import unittest
+
+from flightaware.client import Client
+from flightaware import track as track_module
+from flightaware.track import Track, TrackPoint
+from tests.fakes import FakeSession
+
+
+def positions(count):
+    return [{
+        "timestamp": 1400000000 + i * 60,
+        "latitude": 36.12447 + i * 0.01,
+        "longitude": -86.67819 - i * 0.01,
+        "groundspeed": 300 + i,
+        "altitude": 350,
+        "altitudeStatus": "C" if i % 5 == 0 else "",
+        "updateType": "TZ" if i % 2 else "TA",
+        "altitudeChange": "",
+    } for i in range(count)]
+
+
+class TestTrack(unittest.TestCase):
+    def test_round_trip(self):
+        records = positions(20)
+        track = Track.from_records(records)
+        self.assertEqual(len(track), 20)
+        self.assertEqual(track[3], TrackPoint(1400000180, 36.15447, -86.70819, 303, 350, "", "TZ", ""))
+        self.assertEqual(track[-1].timestamp, records[-1]["timestamp"])
+        self.assertEqual(track.to_records(), records)
+        self.assertEqual(track.codes("altitudestatus"), ["C", ""])
+
+    def test_missing_values(self):
+        records = positions(3)
+        del records[1]["altitude"]
+        records[2]["groundspeed"] = None
+        del records[2]["latitude"]
+        track = Track.from_records(records)
+        self.assertEqual((track[1].altitude, track[2].groundspeed, track[2].latitude), (None, None, None))
+        self.assertEqual(track[0].altitude, 350)
+        self.assertEqual((track.missing("altitude"), track.missing("groundspeed")), ([1], [2]))
+        self.assertNotEqual(track.column("latitude")[2], track.column("latitude")[2])
+        self.assertEqual(track[1:].missing("altitude"), [0])
+        self.assertNotIn("altitude", track.to_records()[1])
+        self.assertEqual(Track.from_records(list(track)).to_records()[0], records[0])
+
+    def test_slicing_and_columns(self):
+        track = Track.from_records(positions(100))
+        tail = track[90:]
+        self.assertIsInstance(tail, Track)
+        self.assertEqual([point.groundspeed for point in tail], list(range(390, 400)))
+        altitudes = track.column("altitude")
+        self.assertEqual(altitudes.format, "i")
+        self.assertEqual(altitudes[5], 350)
+        self.assertEqual(list(track.column("updatetype")[:4]), [0, 1, 0, 1])
+
+    def test_is_smaller_than_dicts(self):
+        records = positions(1000)
+        track = Track.from_records(records)
+        size = sum(sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record.values()) for record in records)
+        self.assertLess(track.nbytes() * 10, size)
+
+    @unittest.skipIf(track_module.numpy is None, "numpy not installed")
+    def test_numpy_view(self):
+        track = Track.from_records(positions(10))
+        self.assertEqual(track.to_numpy("groundspeed").sum(), sum(range(300, 310)))
+
+
+class TestClientTracks(unittest.TestCase):
+    def test_compact_tracks(self):
+        session = FakeSession(lambda method, data: {"{}Result".format(method): {"data": positions(5)}})
+        client = Client("user", "key", session=session)
+        self.assertIsInstance(client.get_last_track("SWA2558", compact=True), Track)
+        self.assertEqual(len(client.get_historical_track("SWA2558-1400000000-0", compact=True)), 5)
+        self.assertIsInstance(client.get_last_track("SWA2558"), list)
+        self.assertEqual(session.calls[1][:2], ("GetHistoricalTrack", {"faFlightID": "SWA2558-1400000000-0"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
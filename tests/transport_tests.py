@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from flightaware.client import Client
+from flightaware.exceptions import FlightAwareError
+from flightaware.transport import RECORD, RecordingTransport, ReplayTransport
+from tests.fakes import FakeResponse, FakeSession
+
+
+class TestRecordReplay(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "traffic.fxr")
+
+    def record(self, responder, calls):
+        client = Client("user", "key", session=FakeSession(responder))
+        with RecordingTransport(self.path, client.transport) as recorder:
+            client.transport = recorder
+            return [call(client) for call in calls]
+
+    def test_round_trip(self):
+        metars = iter(["first", "second"])
+        responder = lambda method, data: {"MetarResult": next(metars)} if method == "Metar" else \
+            {"AllAirportsResult": {"data": ["KBNA", "KATL"]}}
+        recorded = self.record(responder, [lambda c: c.metar("KBNA"), lambda c: c.metar("KBNA"),
+                                           lambda c: list(c.stream("AllAirports"))])
+        self.assertEqual(recorded, ["first", "second", ["KBNA", "KATL"]])
+
+        with ReplayTransport(self.path) as replay:
+            client = Client("replay", "replay", transport=replay)
+            self.assertEqual(len(replay), 3)
+            self.assertEqual([client.metar("KBNA") for _ in range(3)], ["first", "second", "second"])
+            self.assertEqual(list(client.stream("AllAirports")), ["KBNA", "KATL"])
+            self.assertRaises(FlightAwareError, client.metar, "KATL")
+            replay.rewind()
+            self.assertEqual(client.metar("KBNA"), "first")
+            entries = list(replay.entries())
+        self.assertEqual([(entry.method, entry.data) for entry in entries],
+                         [("Metar", {"airport": "KBNA"})] * 2 + [("AllAirports", {})])
+
+    def test_appends_and_keeps_status(self):
+        self.record(lambda method, data: FakeResponse({"error": "busy"}, status_code=503),
+                    [lambda c: c._send("http://x/Metar", "Metar", {"airport": "KBNA"}, 1)[0].status_code])
+        self.record(lambda method, data: {"MetarResult": "ok"}, [lambda c: c.metar("KBNA")])
+        with ReplayTransport(self.path) as replay:
+            self.assertEqual(replay.post("Metar", "", {"airport": "KBNA"}, 1).status_code, 503)
+            self.assertEqual(replay.post("Metar", "", {"airport": "KBNA"}, 1).json(), {"MetarResult": "ok"})
+
+    def test_truncated_tail_is_ignored(self):
+        self.record(lambda method, data: {"MetarResult": "ok"}, [lambda c: c.metar("KBNA"), lambda c: c.metar("KATL")])
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        with ReplayTransport(self.path) as replay:
+            self.assertEqual(len(replay), 1)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a recording" + b"\0" * RECORD.size)
+        self.assertRaises(ValueError, ReplayTransport, self.path)
+        self.assertRaises(ValueError, RecordingTransport, self.path, None)
@@ -0,0 +1,87 @@
+import unittest
+
+from flightaware.client import Client
+from flightaware.watch import BoardWatcher
+from tests.fakes import FakeSession
+
+
+class Board(object):
+    def __init__(self, method, key):
+        self.method = method
+        self.key = key
+        self.flights = []
+
+    def __call__(self, method, data):
+        offset, how_many = data["offset"], data["howMany"]
+        page = self.flights[offset:offset + how_many]
+        end = offset + len(page)
+        return {"{}Result".format(self.method): {
+            "next_offset": end if end < len(self.flights) else -1,
+            self.key: [dict(flight) for flight in page],
+        }}
+
+
+def arrival(number, when):
+    return {"faFlightID": "F{}".format(number), "ident": "SWA{}".format(number), "actualarrivaltime": when}
+
+
+class TestBoardWatcher(unittest.TestCase):
+    def test_arrived_stops_at_seen_flights(self):
+        now = 1400100000
+        board = Board("Arrived", "arrivals")
+        board.flights = [arrival(number, now - number * 60) for number in range(40)]
+        session = FakeSession(board)
+        watcher = BoardWatcher(Client("user", "key", session=session), "arrived", page_size=10, clock=lambda: now)
+
+        delta = watcher.poll("KBNA")
+        self.assertEqual(len(delta.added), 40)
+        self.assertEqual(len(session.calls), 4)
+
+        board.flights = [arrival(100, now), arrival(101, now - 1)] + board.flights
+        delta = watcher.poll("KBNA")
+        self.assertEqual([flight["faFlightID"] for flight in delta.added], ["F100", "F101"])
+        self.assertEqual(delta.removed, [])
+        self.assertEqual(len(session.calls), 5)
+        self.assertEqual(len(watcher.snapshots["KBNA"]), 42)
+
+    def test_arrived_ages_flights_off(self):
+        now = [1400100000]
+        board = Board("Arrived", "arrivals")
+        board.flights = [arrival(1, now[0] - 100), arrival(2, now[0] - 200)]
+        watcher = BoardWatcher(Client("user", "key", session=FakeSession(board)), "arrived", retention=150,
+                               clock=lambda: now[0])
+        watcher.poll("KBNA")
+        delta = watcher.poll("KBNA")
+        self.assertEqual([flight["faFlightID"] for flight in delta.removed], ["F2"])
+
+    def test_enroute_reports_changes_and_removals(self):
+        board = Board("Enroute", "enroute")
+        board.flights = [{"faFlightID": "A", "estimatedarrivaltime": 1}, {"faFlightID": "B", "estimatedarrivaltime": 2}]
+        watcher = BoardWatcher(Client("user", "key", session=FakeSession(board)), "enroute")
+        watcher.poll("KBNA")
+        board.flights = [{"faFlightID": "B", "estimatedarrivaltime": 3}, {"faFlightID": "C", "estimatedarrivaltime": 4}]
+        delta = watcher.poll("KBNA")
+        self.assertEqual([flight["faFlightID"] for flight in delta.added], ["C"])
+        self.assertEqual(delta.changed, [{"faFlightID": "B", "estimatedarrivaltime": 3}])
+        self.assertEqual([flight["faFlightID"] for flight in delta.removed], ["A"])
+
+    def test_poll_many(self):
+        board = Board("Scheduled", "scheduled")
+        board.flights = [{"faFlightID": "A"}]
+        watcher = BoardWatcher(Client("user", "key", session=FakeSession(board)), "scheduled")
+        deltas = watcher.poll_many(["KBNA", "KATL", "KJFK"])
+        self.assertEqual([delta.airport for delta in deltas], ["KBNA", "KATL", "KJFK"])
+
+    def test_models_client(self):
+        board = Board("Arrived", "arrivals")
+        board.flights = [arrival(1, 1400100000)]
+        watcher = BoardWatcher(Client("user", "key", session=FakeSession(board), models=True), "arrived",
+                               clock=lambda: 1400100000)
+        self.assertEqual([flight["faFlightID"] for flight in watcher.poll("KBNA").added], ["F1"])
+
+    def test_unknown_board(self):
+        self.assertRaises(ValueError, BoardWatcher, None, "landed")
+
+
+if __name__ == "__main__":
+    unittest.main()
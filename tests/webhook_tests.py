@@ -0,0 +1,115 @@
+import json
+import asyncio
+import unittest
+
+from flightaware.webhook import AlertReceiver, parse_alert
+
+ALERT = {
+    "long_desc": "Southwest flight 1 has arrived at Atlanta",
+    "summary": "SWA1 arrived at KATL",
+    "eventcode": "arrival",
+    "alert_id": 1234,
+    "flight": {"ident": "SWA1", "faFlightID": "SWA1-1400000000-airline-0001", "origin": "KBNA", "destination": "KATL"},
+}
+
+
+async def post(port, bodies, path="/alerts"):
+    # Send POSTs over one keep-alive connection and return their status codes
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    statuses = []
+    for body in bodies:
+        writer.write("POST {} HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n"
+                     .format(path, len(body)).encode("ascii") + body)
+        head = await reader.readuntil(b"\r\n\r\n")
+        statuses.append(int(head.split()[1]))
+    writer.close()
+    return statuses
+
+
+class TestParseAlert(unittest.TestCase):
+    def test_valid(self):
+        event = parse_alert(json.dumps(ALERT).encode("utf-8"))
+        self.assertEqual((event.eventcode, event.alert_id, event.flight["ident"]), ("arrival", 1234, "SWA1"))
+
+    def test_invalid(self):
+        for body in [b"not json", b"[]", json.dumps({"flight": {}}).encode("utf-8"),
+                     json.dumps(dict(ALERT, flight=None)).encode("utf-8"),
+                     json.dumps(dict(ALERT, alert_id="x")).encode("utf-8")]:
+            self.assertRaises(ValueError, parse_alert, body)
+
+
+class TestAlertReceiver(unittest.TestCase):
+    def test_handlers(self):
+        seen = []
+
+        async def on_arrival(event):
+            seen.append(("arrival", event.flight["ident"]))
+
+        async def run():
+            receiver = AlertReceiver(host="127.0.0.1", port=0, path="/alerts")
+            receiver.on("arrival", on_arrival)
+            receiver.on("*", lambda event: seen.append(("any", event.eventcode)))
+            async with receiver:
+                body = json.dumps(ALERT).encode("utf-8")
+                departure = json.dumps(dict(ALERT, eventcode="departure")).encode("utf-8")
+                statuses = await post(receiver.port, [body, departure, b"{}"])
+                statuses += await post(receiver.port, [body], path="/elsewhere")
+            return statuses, receiver
+
+        statuses, receiver = asyncio.run(run())
+        self.assertEqual(statuses, [200, 200, 400, 404])
+        self.assertEqual(sorted(seen), [("any", "arrival"), ("any", "departure"), ("arrival", "SWA1")])
+        self.assertEqual((receiver.received, receiver.invalid), (2, 1))
+
+    def test_handler_registered_after_start(self):
+        seen = []
+
+        async def run():
+            async with AlertReceiver(host="127.0.0.1", port=0, path="/alerts") as receiver:
+                receiver.on("arrival", lambda event: seen.append(event.flight["ident"]))
+                await post(receiver.port, [json.dumps(ALERT).encode("utf-8")])
+
+        asyncio.run(run())
+        self.assertEqual(seen, ["SWA1"])
+
+    def test_failing_handler_does_not_stop_others(self):
+        seen = []
+
+        def broken(event):
+            raise RuntimeError("broken")
+
+        async def run():
+            receiver = AlertReceiver(host="127.0.0.1", port=0, path="/alerts")
+            receiver.on("arrival", broken)
+            receiver.on("*", lambda event: seen.append(event.eventcode))
+            async with receiver:
+                await post(receiver.port, [json.dumps(ALERT).encode("utf-8")])
+
+        with self.assertLogs("flightaware.webhook", "ERROR"):
+            asyncio.run(run())
+        self.assertEqual(seen, ["arrival"])
+
+    def test_stalled_body_times_out(self):
+        async def run():
+            async with AlertReceiver(host="127.0.0.1", port=0, path="/alerts", header_timeout=0.05) as receiver:
+                reader, writer = await asyncio.open_connection("127.0.0.1", receiver.port)
+                writer.write(b"POST /alerts HTTP/1.1\r\nHost: x\r\nContent-Length: 100\r\n\r\n{")
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 1)
+                writer.close()
+                return int(head.split()[1])
+
+        self.assertEqual(asyncio.run(run()), 408)
+
+    def test_backpressure_and_queue(self):
+        async def run():
+            async with AlertReceiver(host="127.0.0.1", port=0, path="/alerts", queue_size=2) as receiver:
+                body = json.dumps(ALERT).encode("utf-8")
+                statuses = await post(receiver.port, [body, body, body])
+                first = await receiver.get()
+                statuses += await post(receiver.port, [body])
+            return statuses, first, receiver
+
+        statuses, first, receiver = asyncio.run(run())
+        self.assertEqual(statuses, [200, 200, 503, 200])
+        self.assertEqual(first.summary, "SWA1 arrived at KATL")
+        self.assertEqual(receiver.rejected, 1)